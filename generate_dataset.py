@@ -0,0 +1,55 @@
+"""
+===================
+== Usage Example ==
+===================
+python3 -B generate_dataset.py -n 1000 -l clustered -f INMET-BR
+python3 -B generate_dataset.py -n 100000 -l grid -f binary -o synthetic_farms
+"""
+
+# Python Libraries
+import argparse
+
+# Helper Methods
+from simulator.misc.synthetic_dataset import generate_dataset
+
+
+def main():
+    # Parsing named arguments from the command line
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--number-of-stations", "-n", help="Number of stations", type=int, required=True)
+    parser.add_argument(
+        "--layout",
+        "-l",
+        help="Spatial layout of the stations",
+        choices=["uniform", "clustered", "grid"],
+        default="uniform",
+    )
+    parser.add_argument(
+        "--format", "-f", help="Output format", choices=["INMET-BR", "binary"], default="INMET-BR", dest="formatting"
+    )
+    parser.add_argument("--output", "-o", help="Name of the dataset directory (created inside 'data')")
+    parser.add_argument("--clusters", "-c", help="Number of clusters or farm plots", type=int)
+    parser.add_argument("--plot-size", help="Number of stations on each side of a farm plot", type=int)
+    parser.add_argument("--missing-rate", help="Fraction of measurements left empty", type=float, default=0.0)
+    parser.add_argument("--seed", help="Seed of the random number generator", type=int, default=1)
+    args = parser.parse_args()
+
+    name = args.output or f"synthetic_{args.layout}_{args.number_of_stations}"
+
+    path = generate_dataset(
+        name=name,
+        stations=args.number_of_stations,
+        layout=args.layout,
+        formatting=args.formatting,
+        clusters=args.clusters,
+        plot_size=args.plot_size,
+        missing_rate=args.missing_rate,
+        seed=args.seed,
+    )
+
+    print(f"Dataset created: {path}")
+
+
+if __name__ == "__main__":
+    main()
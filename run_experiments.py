@@ -1,38 +1,274 @@
 # Python Libraries
 import csv
 import os
-import re
+import json
 import random
+import uuid
+import hashlib
+import argparse
+import subprocess
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+# General-purpose Simulator Modules
+from simulator.misc.result_store import ResultStore
 
 VERBOSE = 1
 
+# Result store (directory with Parquet files or SQLite database file) where the simulations append their results
+RESULTS = "experiment_results"
+
+# File that records the results of finished configurations, so that interrupted sweeps can be resumed
+CHECKPOINT = "sweep_checkpoint.jsonl"
+
+# Directory where the profiling report of each simulation is stored (used to measure the cost of each configuration)
+PROFILES = "experiment_profiles"
+
+# File with the accuracy and cost of each configuration, indicating which ones are in the accuracy/throughput frontier
+FRONTIER = "accuracy_cost_frontier.csv"
+
+# Measured cost of each simulation: time spent finding geometry (seconds), mean time spent inferring measurements per
+# step (seconds, excluding geometry), peak memory of the simulation process (megabytes), and hot-path counters
+COST_FIELDS = ["compile_time", "inference_time", "peak_memory", "triangles_enumerated", "triangles_accepted"]
 
-def run_simulation(dataset, metric, steps, virtual_sensors, k, heuristic_name):
+
+def run_simulation(dataset, metric, steps, virtual_sensors, k, heuristic_name, results=RESULTS, seed=1, run_id=None):
     """Executes the simulation with specified parameters."""
 
+    run_id = run_id or uuid.uuid4().hex
+    os.makedirs(PROFILES, exist_ok=True)
+
     # Adjusting the simulation command based on the parameters
-    cmd = f'python3 -B -m simulator -d "{dataset}" -m "{metric}" -s {steps} -n {virtual_sensors} -k {k} -a "{heuristic_name}"'
+    cmd = f'python3 -B -m simulator -d "{dataset}" -m "{metric}" -n {virtual_sensors} -k {k} -a "{heuristic_name}"'
+    cmd += f" --seed {seed}"
+
+    # Running the simulation with the specified parameters (geometry plans found by previous simulations are reused).
+    # Simulations that fail raise an exception, so that their configurations are not recorded as finished
+    profile_file = os.path.join(PROFILES, f"{run_id}.json")
+    subprocess.run(
+        f'{cmd} -s {steps} --profile "{profile_file}" --results "{results}" --run-id {run_id}',
+        shell=True,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+    # Reading simulation results from the result store (the simulation output changes with the number of metrics)
+    with ResultStore(path=results) as store:
+        runs = store.read(table="runs", columns=["metric", "rmse", "mae"], run_ids=[run_id])
+    runs = runs[runs["metric"] == metric]
+    if len(runs) == 0:
+        raise Exception(f"Simulation {run_id} did not store its results.")
 
-    # Running the simulation with the specified parameters
-    stream = os.popen(cmd)
-    output = stream.read()
+    cost = measure_cost(profile_file)
+
+    # When the geometry plan was loaded from the plan cache, the cost of finding geometry is measured by a
+    # single-step simulation that doesn't use the plan cache
+    if cost["compile_time"] is None:
+        compile_profile_file = os.path.join(PROFILES, f"{run_id}_compile.json")
+        subprocess.run(
+            f'{cmd} -s 1 --profile "{compile_profile_file}" --no-plan-cache',
+            shell=True,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+        compile_cost = measure_cost(compile_profile_file)
+        for field in ["compile_time", "triangles_enumerated", "triangles_accepted"]:
+            cost[field] = compile_cost[field]
+        cost["peak_memory"] = max(
+            [memory for memory in [cost["peak_memory"], compile_cost["peak_memory"]] if memory is not None],
+            default=None,
+        )
 
-    # Parsing simulation results
-    rmse = float(re.findall("\d+\.\d+", output.splitlines()[5])[0])
-    mae = float(re.findall("\d+\.\d+", output.splitlines()[6])[0])
     result = {
         "heuristic": heuristic_name,
         "metric": metric,
         "k": k,
-        "rmse": rmse,
-        "mae": mae,
+        "rmse": float(runs["rmse"].iloc[-1]),
+        "mae": float(runs["mae"].iloc[-1]),
+        "seed": seed,
+        **cost,
     }
 
     return result
 
 
-def main():
+def measure_cost(profile_file):
+    """Extracts the cost of a simulation from its profiling report.
+
+    Parameters
+    ==========
+    profile_file : string
+        Profiling report of the simulation
+
+    Returns
+    =======
+    cost : dict
+        Measured cost of the simulation (see 'COST_FIELDS'). The cost of finding geometry is None when the geometry
+        plan was loaded from the plan cache
+    """
+
+    with open(profile_file, encoding="utf-8") as report_file:
+        report = json.load(report_file)
+
+    # Geometry is found inside the heuristic phase of the first step, so it is subtracted from the inference time
+    inference_times = [
+        step["phases"].get("heuristic", 0.0) - step["phases"].get("geometry", 0.0) for step in report["steps"]
+    ]
+
+    compiled = report["counters"].get("plan_cache_hits", 0) == 0
+
+    cost = {
+        "compile_time": report["phases"].get("geometry", {}).get("time", 0.0) if compiled else None,
+        "inference_time": float(np.mean(inference_times)) if len(inference_times) > 0 else None,
+        "peak_memory": report["peak_memory"] / 2**20 if report.get("peak_memory") is not None else None,
+        "triangles_enumerated": report["counters"].get("triangles_enumerated", 0) if compiled else None,
+        "triangles_accepted": report["counters"].get("triangles_accepted", 0) if compiled else None,
+    }
+
+    return cost
+
+
+def accuracy_cost_frontier(results):
+    """Finds the configurations in the accuracy/throughput Pareto frontier of each metric, i.e., the configurations
+    for which no other configuration is at least as accurate (RMSE) and as fast (inference time per step) while
+    being better in one of them. Results of the same configuration with different seeds are averaged.
+
+    Parameters
+    ==========
+    results : list
+        Results of the simulations
+
+    Returns
+    =======
+    configurations : list
+        Accuracy and cost of each configuration (heuristic, metric, and k) and whether it is in the frontier
+    """
+
+    # Results recorded before the cost of simulations was measured are not considered
+    groups = {}
+    for result in results:
+        if result.get("inference_time") is not None:
+            groups.setdefault((result["metric"], result["heuristic"], result["k"]), []).append(result)
+
+    configurations = []
+    for (metric, heuristic, k), group in groups.items():
+        configuration = {"heuristic": heuristic, "metric": metric, "k": k}
+        for field in ["rmse", "mae"] + COST_FIELDS:
+            values = [result[field] for result in group if result.get(field) is not None]
+            configuration[field] = float(np.mean(values)) if len(values) > 0 else None
+
+        # Steps inferred per second
+        inference_time = configuration["inference_time"]
+        configuration["throughput"] = 1 / inference_time if inference_time > 0 else float("inf")
+
+        configurations.append(configuration)
+
+    # Configurations that inferred no measurements (i.e., without RMSE) are dominated by any other configuration
+    inferred = [configuration for configuration in configurations if configuration["rmse"] is not None]
+    for configuration in configurations:
+        configuration["frontier"] = configuration["rmse"] is not None and not any(
+            other["metric"] == configuration["metric"]
+            and other["rmse"] <= configuration["rmse"]
+            and other["inference_time"] <= configuration["inference_time"]
+            and (other["rmse"] < configuration["rmse"] or other["inference_time"] < configuration["inference_time"])
+            for other in inferred
+        )
+
+    return sorted(
+        configurations,
+        key=lambda configuration: (
+            configuration["metric"],
+            configuration["rmse"] is None,
+            configuration["rmse"] or 0,
+        ),
+    )
+
+
+def configuration_key(configuration):
+    """Creates a deterministic key for a simulation configuration (the same parameters always lead to the same key).
+
+    Parameters
+    ==========
+    configuration : dict
+        Simulation parameters
+
+    Returns
+    =======
+    key : string
+        Key of the configuration
+    """
+
+    return hashlib.sha256(json.dumps(configuration, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_checkpoint(checkpoint_file):
+    """Loads the results of the configurations finished by previous executions of the sweep.
+
+    Parameters
+    ==========
+    checkpoint_file : string
+        Name of the checkpoint file
+
+    Returns
+    =======
+    finished : dict
+        Results indexed by configuration key
+    """
+
+    finished = {}
+
+    if os.path.isfile(checkpoint_file):
+        with open(checkpoint_file, encoding="utf-8") as checkpoint:
+            for line in checkpoint:
+                # Lines that were being written when the sweep was interrupted are discarded
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                finished[record["key"]] = record["result"]
+
+    return finished
+
+
+def save_checkpoint(checkpoint_file, key, result):
+    """Records the result of a finished configuration.
+
+    Parameters
+    ==========
+    checkpoint_file : string
+        Name of the checkpoint file
+
+    key : string
+        Key of the configuration
+
+    result : dict
+        Result of the configuration
+    """
+
+    with open(checkpoint_file, mode="a", encoding="utf-8") as checkpoint:
+        checkpoint.write(json.dumps({"key": key, "result": result}, ensure_ascii=False) + "\n")
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+
+def main(workers=1, checkpoint_file=CHECKPOINT, restart=False):
+    """Executes all experiments. Configurations that were finished by previous (interrupted) executions are skipped.
+
+    Parameters
+    ==========
+    workers : int (optional)
+        Number of simulations executed in parallel
+
+    checkpoint_file : string (optional)
+        File that records the results of finished configurations
+
+    restart : boolean (optional)
+        Whether results of previous executions are discarded
+    """
+
     random.seed(1)
     np.random.seed(1)
     np.random.default_rng(1)
@@ -47,6 +283,7 @@ def main():
 
     steps = 12  # Simulation time steps (e.g., 12, 24, 168, etc.)
     virtual_sensors = 3  # Number of random virtual sensors whose values will be estimated
+    seeds = [1]  # Seeds of each Monte Carlo draw (i.e., each draw picks a different group of virtual sensors)
 
     # Specific experiment parameters (which are tested exhaustively)
     heuristics = [
@@ -54,56 +291,113 @@ def main():
         {"name": "first_fit_proposal", "k": False},
         {"name": "idw", "k": True},
         {"name": "knn", "k": True},
+        {"name": "kriging", "k": True},
     ]
 
     # Number of nearest neighbor physical sensors that will be used to estimate the value of virtual sensors
     k_values = [1, 2, 4, 8, 16, 32]
 
-    # List that stores the experiments results
-    results = []
+    # Listing all configurations. Heuristics that don't use the parameter k are executed with a fixed value (i.e., 0)
+    configurations = [
+        {
+            "dataset": dataset,
+            "metric": metric,
+            "steps": steps,
+            "virtual_sensors": virtual_sensors,
+            "k": k,
+            "heuristic_name": heuristic["name"],
+            "seed": seed,
+        }
+        for seed in seeds
+        for metric in metrics
+        for heuristic in heuristics
+        for k in (k_values if heuristic["k"] else [0])
+    ]
 
-    # Helper variable that stores the number of simulations performed
-    execution_count = 1
+    if restart and os.path.isfile(checkpoint_file):
+        os.remove(checkpoint_file)
 
-    # Executing simulations
-    for metric in metrics:
-        for heuristic in heuristics:
-            heuristic_name = heuristic["name"]
-            if heuristic["k"]:
-                for k in k_values:
-                    # Executing simulation
-                    result = run_simulation(dataset, metric, steps, virtual_sensors, k, heuristic_name)
+    finished = load_checkpoint(checkpoint_file)
+    pending = [configuration for configuration in configurations if configuration_key(configuration) not in finished]
 
-                    # Storing results in the 'results' list
-                    results.append(result)
+    if VERBOSE >= 1:
+        print(f"Configurations: {len(configurations)} ({len(configurations) - len(pending)} already finished)")
 
-                    if VERBOSE >= 1:
-                        # Printing the results of the current simulation
-                        print(f"{result}")
+    # Results of each simulation are appended to this CSV file (and to the result store, which also keeps the
+    # inferences of each virtual sensor in each step) as soon as the simulation finishes
+    with open("sensitivity_analysis.csv", mode="w", newline="") as csv_file:
+
+        # Writing CSV header
+        field_names = ["heuristic", "metric", "k", "rmse", "mae", "seed"] + COST_FIELDS
+        writer = csv.DictWriter(csv_file, fieldnames=field_names)
+        writer.writeheader()
 
-            else:
-                # Executing simulation with a fixed value (i.e., 0) in the unused parameter k
-                result = run_simulation(dataset, metric, steps, virtual_sensors, 0, heuristic_name)
+        # Writing the results of configurations finished by previous executions
+        results = []
+        for configuration in configurations:
+            if configuration_key(configuration) in finished:
+                results.append(finished[configuration_key(configuration)])
+                writer.writerow(finished[configuration_key(configuration)])
+        csv_file.flush()
 
-                # Storing results in the 'results' list
+        # Executing simulations. Each simulation runs in its own process, so threads are enough to run them in parallel
+        failures = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    run_simulation, **configuration, results=RESULTS, run_id=configuration_key(configuration)
+                ): configuration
+                for configuration in pending
+            }
+
+            for future in as_completed(futures):
+                configuration = futures[future]
+
+                try:
+                    result = future.result()
+                except Exception as error:
+                    # Failed configurations are not recorded, so they are executed again when the sweep is resumed
+                    failures += 1
+                    print(f"Simulation failed ({error}): {configuration}")
+                    continue
+
+                # Recording the configuration as finished and writing its results
+                save_checkpoint(checkpoint_file, key=configuration_key(configuration), result=result)
                 results.append(result)
+                writer.writerow(result)
+                csv_file.flush()
 
                 if VERBOSE >= 1:
                     # Printing the results of the current simulation
                     print(f"{result}")
 
-    # Exporting results
-    with open("sensitivity_analysis.csv", mode="w") as csv_file:
-
-        # Writing CSV header
-        field_names = ["heuristic", "metric", "k", "rmse", "mae"]
-        writer = csv.DictWriter(csv_file, fieldnames=field_names)
+    # Reporting the accuracy and cost of each configuration and which ones are in the accuracy/throughput frontier
+    frontier = accuracy_cost_frontier(results)
+    with open(FRONTIER, mode="w", newline="") as csv_file:
+        writer = csv.DictWriter(
+            csv_file, fieldnames=["heuristic", "metric", "k", "rmse", "mae"] + COST_FIELDS + ["throughput", "frontier"]
+        )
         writer.writeheader()
+        writer.writerows(frontier)
 
-        # Writing CSV body
-        for row in results:
-            writer.writerow(row)
+    if VERBOSE >= 1:
+        print("Accuracy/throughput frontier:")
+        for configuration in [configuration for configuration in frontier if configuration["frontier"]]:
+            print(
+                f"    {configuration['metric']} | {configuration['heuristic']} (k={configuration['k']}) | "
+                f"RMSE: {configuration['rmse']:.4f} | {configuration['throughput']:.1f} steps/s"
+            )
+
+    if failures > 0:
+        print(f"{failures} simulations failed. Run the sweep again to retry them.")
 
 
 if __name__ == "__main__":
-    main()
+    # Parsing named arguments from the command line
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", "-w", help="Number of simulations executed in parallel", type=int, default=1)
+    parser.add_argument("--checkpoint", help="File that records finished configurations", default=CHECKPOINT)
+    parser.add_argument("--restart", help="Discards results of previous executions", action="store_true")
+    args = parser.parse_args()
+
+    main(workers=args.workers, checkpoint_file=args.checkpoint, restart=args.restart)
@@ -3,6 +3,12 @@
 == Usage Example ==
 ===================
 python3 -B -m simulator -d "inmet_2020_rs" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -s 24 -n 3 -a "proposed_heuristic" -o "topo1.png"
+python3 -B -m simulator -d "inmet_2020_rs" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -s 24 -n 3 -a "idw" -k 4 --profile --pstats "simulator.prof"
+python3 -B -m simulator -d "inmet_2020_rs" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -m "UMIDADE RELATIVA DO AR, HORARIA (%)" -s 24 -n 3 -a "knn" -k 4
+python3 -B -m simulator -d "synthetic_grid_20000" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -s 8000 -n 100 -a "idw" -k 4 --chunk-size 168 --float32
+python3 -B -m simulator -d "synthetic_grid_20000" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -s 24 -n 1000 -a "kriging" -k 8 --projected-coordinates --tile-size 200 --tile-workers 4
+python3 -B -m simulator -d "inmet_2020_rs" -m "TEMPERATURA DO PONTO DE ORVALHO (°C)" -s 24 -n 3 -a "bounded_proposal" -k 16 --max-triangles 50 --triangle-time-budget 5
+python3 -B -m simulator serve --port 8765 --workers 2
 
 =========================
 == Metrics of Interest ==
@@ -13,12 +19,18 @@ UMIDADE RELATIVA DO AR, HORARIA (%)
 """
 
 # Python Libraries
+import sys
 import random
 import argparse
+import cProfile
 import numpy as np
 
 # General-purpose Simulator Modules
 from simulator.simulator import Simulator
+from simulator.misc.profiler import Profiler
+from simulator.misc.plan_cache import PlanCache
+from simulator.server import serve
+from simulator.server import RESULTS_DIRECTORY
 
 # Helper variable that dictates whether the simulator execution will be profiled by 'cProfile'
 PROFILING = False
@@ -32,6 +44,20 @@ def main(
     neighbors,
     metric,
     output,
+    alignment_tolerance=0,
+    topology_events=None,
+    fallback_plans=4,
+    results=None,
+    run_id=None,
+    projected=False,
+    precision="float64",
+    chunk_size=None,
+    tile_size=None,
+    tile_halo=None,
+    tile_workers=1,
+    incremental=False,
+    max_triangles=None,
+    triangle_time_budget=None,
 ):
     """Executes the simulation.
 
@@ -52,36 +78,136 @@ def main(
     neighbors : int
         Number of nearest neighbor sensors that can be used to estimate the value of a virtual sensor
 
-    metric : string
-        Metric to be inferred
+    metric : string or list
+        Metric to be inferred (or list of metrics inferred in the same simulation)
 
     output : string
         Output file (image with topology)
+
+    alignment_tolerance : float (optional)
+        Maximum absolute determinant for which a virtual sensor is considered aligned with two physical sensors
+
+    topology_events : string (optional)
+        CSV file with sensors disabled, enabled, or removed during the simulation
+
+    fallback_plans : int (optional)
+        Number of alternative groups of sensors kept for virtual sensors whose sensors miss measurements
+
+    results : string (optional)
+        Result store (directory with Parquet files or SQLite database file) where results are appended
+
+    run_id : string (optional)
+        Identifier of the run in the result store
+
+    projected : boolean (optional)
+        Whether coordinates are projected onto a local plane (in kilometers) instead of kept in degrees
+
+    precision : string (optional)
+        Data type of the stored measurements ('float64' or 'float32')
+
+    chunk_size : int (optional)
+        Number of time steps kept in memory at once (only the accuracy metrics are accumulated when informed)
+
+    tile_size : float (optional)
+        Width of the square tiles whose geometry is planned independently (the topology isn't tiled by default)
+
+    tile_halo : float (optional)
+        Width of the band around tiles whose sensors can also be used by the tile (half the tile size by default)
+
+    tile_workers : int (optional)
+        Number of processes that plan the geometry of tiles in parallel
+
+    incremental : boolean (optional)
+        Whether only the rows appended to dataset files (and new files) since the previous ingest are parsed
+
+    max_triangles : int (optional)
+        Number of valid triangles after which bounded triangle searches stop (unbounded by default)
+
+    triangle_time_budget : float (optional)
+        Time (in seconds) after which bounded triangle searches of each virtual sensor stop (unbounded by default)
     """
 
-    Simulator.load_dataset(target=dataset, metric=metric)
+    Simulator.load_dataset(
+        target=dataset,
+        metric=metric,
+        projected=projected,
+        precision=precision,
+        chunk_size=chunk_size,
+        incremental=incremental,
+    )
     Simulator.run(
         steps=steps,
         metric=metric,
         algorithm=algorithm,
         neighbors=neighbors,
         sensors=sensors,
+        alignment_tolerance=alignment_tolerance,
+        topology_events=Simulator.load_topology_events(input_file=topology_events) if topology_events else [],
+        fallback_plans=fallback_plans,
+        accumulate_metrics=chunk_size is not None,
+        tile_size=tile_size,
+        tile_halo=tile_halo,
+        tile_workers=tile_workers,
+        max_triangles=max_triangles,
+        triangle_time_budget=triangle_time_budget,
     )
-    Simulator.show_output(output_file=output)
+    try:
+        Simulator.show_output(output_file=output)
+    finally:
+        # Storing results even if the topology can't be rendered
+        if results and Simulator.summary:
+            Simulator.export_results(path=results, algorithm=algorithm, neighbors=neighbors, run_id=run_id)
 
 
-if __name__ == "__main__":
-    # Defining a seed value to enable reproducibility in case any stochastic behavior occurs during simulation
-    random.seed(1)
-    np.random.seed(1)
-    np.random.default_rng(1)
+if __name__ == "__main__" and sys.argv[1:2] == ["serve"]:
+    # Parsing named arguments of the 'serve' command, which starts a daemon that runs simulations requested over HTTP
+    parser = argparse.ArgumentParser(prog="python3 -B -m simulator serve")
 
+    parser.add_argument("--host", help="Address the daemon listens to", default="127.0.0.1")
+    parser.add_argument("--port", "-p", help="Port the daemon listens to", type=int, default=8765)
+    parser.add_argument("--workers", "-w", help="Number of simulations executed in parallel", type=int, default=1)
+    parser.add_argument("--queue-size", help="Number of simulations that can wait for a worker", type=int, default=16)
+    parser.add_argument("--plan-cache", help="Directory where geometry plans are cached", default=PlanCache.directory)
+    parser.add_argument(
+        "--plan-cache-size",
+        help="Maximum size (in megabytes) of the geometry plan cache",
+        type=float,
+        default=PlanCache.max_size / 2**20,
+    )
+    parser.add_argument("--no-plan-cache", help="Disables the geometry plan cache", action="store_true")
+    parser.add_argument(
+        "--plans-in-memory", help="Number of geometry plans each worker keeps in memory", type=int, default=256
+    )
+    parser.add_argument(
+        "--results-directory",
+        help="Directory where the result stores of run requests are created",
+        default=RESULTS_DIRECTORY,
+    )
+    args = parser.parse_args(sys.argv[2:])
+
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        plan_cache={
+            "directory": args.plan_cache,
+            "max_size": int(args.plan_cache_size * 2**20),
+            "enabled": not args.no_plan_cache,
+            "memory_size": args.plans_in_memory,
+        },
+        results_directory=args.results_directory,
+    )
+
+elif __name__ == "__main__":
     # Parsing named arguments from the command line
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--dataset", "-d", help="Dataset file or directory containing list of dataset files")
     parser.add_argument("--simulation-steps", "-s", help="Number of simulation steps")
-    parser.add_argument("--metric", "-m", help="Metric to be inferred")
+    parser.add_argument(
+        "--metric", "-m", help="Metric to be inferred (repeat it to infer several metrics at once)", action="append"
+    )
     parser.add_argument(
         "--number-of-sensors", "-n", help="Number of virtual sensors whose measurements will be inferred"
     )
@@ -93,15 +219,132 @@ if __name__ == "__main__":
     )
     parser.add_argument("--algorithm", "-a", help="Heuristic algorithm to be executed")
     parser.add_argument("--output", "-o", help="Output file name", default="topology.png")
+    parser.add_argument(
+        "--alignment-tolerance",
+        help="Maximum absolute determinant for which a virtual sensor is considered aligned with two physical sensors",
+        type=float,
+        default=0,
+    )
+    parser.add_argument(
+        "--profile",
+        help="Output file (JSON) with the time spent in each phase and hot-path counters of each step",
+        nargs="?",
+        const="profile.json",
+    )
+    parser.add_argument("--pstats", help="Output file with cProfile statistics (readable with 'pstats')")
+    parser.add_argument("--plan-cache", help="Directory where geometry plans are cached", default=PlanCache.directory)
+    parser.add_argument(
+        "--plan-cache-size",
+        help="Maximum size (in megabytes) of the geometry plan cache",
+        type=float,
+        default=PlanCache.max_size / 2**20,
+    )
+    parser.add_argument("--no-plan-cache", help="Disables the geometry plan cache", action="store_true")
+    parser.add_argument(
+        "--topology-events", help="CSV file (columns: step, action, sensor) with sensors that fail or come back online"
+    )
+    parser.add_argument(
+        "--fallback-plans",
+        help="Number of alternative groups of sensors used when the sensors of a virtual sensor miss measurements",
+        type=int,
+        default=4,
+    )
+    parser.add_argument(
+        "--results", help="Directory (Parquet files) or SQLite database file where results and inferences are appended"
+    )
+    parser.add_argument("--run-id", help="Identifier of the run in the result store")
+    parser.add_argument(
+        "--projected-coordinates",
+        help="Projects coordinates onto a local plane, so that distances are measured in kilometers instead of degrees",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Number of time steps read at once from binary datasets (only the accuracy metrics are accumulated)",
+        type=int,
+    )
+    parser.add_argument("--float32", help="Stores measurements with single precision", action="store_true")
+    parser.add_argument(
+        "--incremental",
+        help="Only parses the rows appended to dataset files (and new files) since the previous ingest",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--tile-size",
+        help="Partitions sensors into square tiles of this width (in degrees, or kilometers if coordinates are "
+        "projected) whose geometry is planned independently",
+        type=float,
+    )
+    parser.add_argument(
+        "--tile-halo",
+        help="Width of the band around tiles whose sensors are also used (half the tile size by default)",
+        type=float,
+    )
+    parser.add_argument(
+        "--tile-workers", help="Number of processes that plan the geometry of tiles in parallel", type=int, default=1
+    )
+    parser.add_argument(
+        "--max-triangles",
+        help="Number of valid triangles after which the triangle search of 'bounded_proposal' stops",
+        type=int,
+    )
+    parser.add_argument(
+        "--triangle-time-budget",
+        help="Time budget (in milliseconds) of the triangle search of each virtual sensor in 'bounded_proposal'",
+        type=float,
+    )
+    parser.add_argument(
+        "--seed", help="Seed of the random number generators (e.g., used to pick virtual sensors)", type=int, default=1
+    )
     args = parser.parse_args()
 
-    # Calling the main method
-    main(
-        dataset=args.dataset,
-        steps=args.simulation_steps,
-        sensors=int(args.number_of_sensors),
-        output=args.output,
-        metric=args.metric,
-        neighbors=int(args.number_of_neighbors),
-        algorithm=args.algorithm,
+    # Defining a seed value to enable reproducibility in case any stochastic behavior occurs during simulation
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    np.random.default_rng(args.seed)
+
+    if args.profile:
+        Profiler.enable()
+
+    PlanCache.configure(
+        directory=args.plan_cache, max_size=int(args.plan_cache_size * 2**20), enabled=not args.no_plan_cache
     )
+
+    PROFILING = PROFILING or args.pstats is not None
+    if PROFILING:
+        profile = cProfile.Profile()
+        profile.enable()
+
+    try:
+        # Calling the main method
+        main(
+            dataset=args.dataset,
+            steps=args.simulation_steps,
+            sensors=int(args.number_of_sensors),
+            output=args.output,
+            metric=args.metric,
+            neighbors=int(args.number_of_neighbors),
+            algorithm=args.algorithm,
+            alignment_tolerance=args.alignment_tolerance,
+            topology_events=args.topology_events,
+            fallback_plans=args.fallback_plans,
+            results=args.results,
+            run_id=args.run_id,
+            projected=args.projected_coordinates,
+            precision="float32" if args.float32 else "float64",
+            chunk_size=args.chunk_size,
+            tile_size=args.tile_size,
+            tile_halo=args.tile_halo,
+            tile_workers=args.tile_workers,
+            incremental=args.incremental,
+            max_triangles=args.max_triangles,
+            triangle_time_budget=args.triangle_time_budget / 1000 if args.triangle_time_budget is not None else None,
+        )
+    finally:
+        # Exporting profiling data even if the simulation fails (e.g., when the topology can't be rendered)
+        if PROFILING:
+            profile.disable()
+            profile.dump_stats(args.pstats or "simulator.prof")
+
+        if args.profile:
+            Profiler.export(output_file=args.profile)
@@ -0,0 +1,176 @@
+# Python Libraries
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.misc.profiler import Profiler
+
+
+class GeometryPlan:
+    """Geometry plans hold, for each virtual sensor, a ranked list of alternative groups of physical sensors that can
+    be used to infer its measurement and the weight of each sensor. As geometry only depends on coordinates, plans are
+    created once and, at every step, each virtual sensor uses the first alternative whose sensors have measurements.
+    """
+
+    def __init__(self, virtual_ids, sensors, weights, quotas=None):
+        """Creates a geometry plan.
+
+        Parameters
+        ==========
+        virtual_ids : numpy.ndarray
+            Identifiers of the virtual sensors
+
+        sensors : numpy.ndarray
+            (virtual sensors x alternatives x neighbors) identifiers of the physical sensors used in each inference
+            (-1 for padding). Plans without alternatives can be informed as (virtual sensors x neighbors) arrays.
+
+        weights : numpy.ndarray
+            Weights of the physical sensors used in each inference (0 for padding), with the same shape as 'sensors'
+
+        quotas : numpy.ndarray (optional)
+            (virtual sensors x alternatives) number of sensors used by each alternative. Alternatives with quota 0 need
+            all their sensors, whereas alternatives with quota 'q' use their first 'q' sensors that have measurements
+            (and their weights are normalized to sum to one). All quotas are 0 by default.
+        """
+
+        self.virtual_ids = np.asarray(virtual_ids, dtype=np.int64)
+
+        sensors = np.asarray(sensors, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if sensors.ndim < 3:
+            sensors = sensors.reshape(len(self.virtual_ids), 1, -1)
+            weights = weights.reshape(len(self.virtual_ids), 1, -1)
+
+        self.sensors = sensors
+        self.weights = weights
+        self.quotas = (
+            np.zeros(sensors.shape[:2], dtype=np.int64) if quotas is None else np.asarray(quotas, dtype=np.int64)
+        )
+
+    @classmethod
+    def create(cls, virtual_sensors, find_sensors):
+        """Creates a geometry plan by finding the sensors and weights used to infer the measurement of each virtual sensor.
+
+        Parameters
+        ==========
+        virtual_sensors : list
+            Virtual sensors whose measurements will be inferred
+
+        find_sensors : function
+            Function that receives a virtual sensor and returns a ranked list of alternatives, each of them with the
+            physical sensors and weights that can be used to infer its measurement (an empty list if the measurement
+            can't be inferred)
+
+        Returns
+        =======
+        plan : GeometryPlan
+            Geometry plan of the virtual sensors
+        """
+
+        selections = []
+        for virtual_sensor in virtual_sensors:
+            alternatives = find_sensors(virtual_sensor)
+            selections.append([([sensor.id for sensor in sensors], list(weights)) for sensors, weights in alternatives])
+
+        depth = max([len(alternatives) for alternatives in selections] + [1])
+        width = max([len(ids) for alternatives in selections for ids, _ in alternatives] + [1])
+        sensors = np.full((len(selections), depth, width), -1, dtype=np.int64)
+        weights = np.zeros((len(selections), depth, width))
+
+        for i, alternatives in enumerate(selections):
+            for j, (ids, sensor_weights) in enumerate(alternatives):
+                sensors[i, j, : len(ids)] = ids
+                weights[i, j, : len(ids)] = sensor_weights
+
+        return cls(virtual_ids=[sensor.id for sensor in virtual_sensors], sensors=sensors, weights=weights)
+
+    def apply(self, store):
+        """Infers the measurements of the virtual sensors at the current step (of all metrics measured by the sensors).
+
+        Parameters
+        ==========
+        store : SensorStore
+            Sensor store that holds the current measurements and receives the inferences
+        """
+
+        used = self.sensors >= 0
+        rows = store.rows_of(np.where(used, self.sensors, self.virtual_ids[:, None, None]))
+
+        # (metrics x virtual sensors x alternatives x neighbors) measurements of the sensors used in each inference
+        measurements = store.current_measurements[:, rows]
+
+        # Sensors that have measurements at the current step
+        valid = used & ~np.isnan(measurements)
+
+        # Alternatives with quotas use their first valid sensors and normalize their weights
+        quotas = self.quotas[:, :, None]
+        has_quota = quotas > 0
+        chosen = np.where(has_quota, valid & (np.cumsum(valid, axis=-1) <= quotas), used)
+        weights = np.where(chosen, self.weights, 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weights = np.where(has_quota, weights / weights.sum(axis=-1, keepdims=True), weights)
+
+        complete = np.where(
+            has_quota[..., 0], valid.sum(axis=-1) >= self.quotas, (valid == used).all(axis=-1) & used.any(axis=-1)
+        )
+
+        # Picking the first complete alternative of each virtual sensor (metrics may pick different alternatives)
+        alternatives = complete.argmax(axis=-1)
+        products = np.where(chosen, weights * measurements, 0)
+        products = np.take_along_axis(products, alternatives[..., None, None], axis=-2)[..., 0, :]
+        inferences = products.sum(axis=-1)
+
+        # Virtual sensors without complete alternatives are not inferred
+        inferences[~complete.any(axis=-1)] = np.nan
+
+        store.inferences[:, store.rows_of(self.virtual_ids)] = inferences
+        Profiler.count("planned_inferences", inferences.size)
+        Profiler.count("fallback_plans", int((alternatives > 0).sum()))
+
+    def update(self, plan):
+        """Replaces the sensors and weights of the virtual sensors that are part of another plan.
+
+        Parameters
+        ==========
+        plan : GeometryPlan
+            Plan with the new sensors and weights of some of the virtual sensors
+        """
+
+        depth = max(self.sensors.shape[1], plan.sensors.shape[1])
+        width = max(self.sensors.shape[2], plan.sensors.shape[2])
+        if (depth, width) != self.sensors.shape[1:]:
+            padding = ((0, 0), (0, depth - self.sensors.shape[1]), (0, width - self.sensors.shape[2]))
+            self.sensors = np.pad(self.sensors, padding, constant_values=-1)
+            self.weights = np.pad(self.weights, padding)
+            self.quotas = np.pad(self.quotas, padding[:2])
+
+        rows = np.flatnonzero(np.isin(self.virtual_ids, plan.virtual_ids))
+        order = np.argsort(plan.virtual_ids)
+        positions = order[np.searchsorted(plan.virtual_ids, self.virtual_ids[rows], sorter=order)]
+
+        self.sensors[rows] = -1
+        self.weights[rows] = 0
+        self.quotas[rows] = 0
+        self.sensors[rows, : plan.sensors.shape[1], : plan.sensors.shape[2]] = plan.sensors[positions]
+        self.weights[rows, : plan.weights.shape[1], : plan.weights.shape[2]] = plan.weights[positions]
+        self.quotas[rows, : plan.quotas.shape[1]] = plan.quotas[positions]
+
+    def to_arrays(self):
+        """Returns the arrays that describe the plan (used to persist it)."""
+
+        return {
+            "virtual_ids": self.virtual_ids,
+            "sensors": self.sensors,
+            "weights": self.weights,
+            "quotas": self.quotas,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Creates a plan from the arrays returned by 'to_arrays'."""
+
+        return cls(
+            virtual_ids=arrays["virtual_ids"],
+            sensors=arrays["sensors"],
+            weights=arrays["weights"],
+            quotas=arrays["quotas"],
+        )
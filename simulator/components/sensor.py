@@ -1,27 +1,45 @@
 # Python Libraries
-import scipy.interpolate
+import numpy as np
 from scipy.spatial import distance
 from scipy.spatial import Delaunay
-import itertools
 
 # General-purpose Simulator Modules
 from simulator.misc.object_collection import ObjectCollection
+from simulator.misc.profiler import Profiler
 
 # Simulator Components
 from simulator.components.topology import Topology
+from simulator.components.sensor_store import SensorStore
+from simulator.components.spatial_index import SpatialIndex
 
 # Helper Methods
-from simulator.misc.helper_methods import matrix_determinant
-from simulator.misc.helper_methods import triangle_area
+from simulator.misc.helper_methods import find_aligned_pair
 from simulator.misc.helper_methods import line
 from simulator.misc.helper_methods import intersection
+from simulator.misc.helper_methods import encoded_positions
+from simulator.misc.helper_methods import interpolate_aligned_measurements
+from simulator.misc.helper_methods import aligned_interpolation_weights
+from simulator.misc.helper_methods import unproject_coordinates
 
 
 class Sensor(ObjectCollection):
+    """Sensors are thin views over a row of the sensor store, which keeps their attributes in NumPy arrays."""
 
     # Class attribute that allows the class to use ObjectCollection methods
     instances = []
 
+    # Sensor objects only hold a reference to the store and the row that contains their attributes
+    __slots__ = ("store", "row")
+
+    # Pairs of sensors aligned with each virtual sensor (coordinates don't change, so they are searched once per run)
+    aligned_sensors_cache = {}
+
+    # Spatial index of physical sensors (updated incrementally when sensors are added, removed, or disabled)
+    spatial_index = None
+
+    # Tolerance (relative to the area of the triangle) within which sensors on the edges of triangles are inside them
+    TRIANGLE_TOLERANCE = 1e-9
+
     def __init__(self, coordinates=None, type="physical", timestamps=[], measurements=[], alias=""):
         """Creates a new sensor.
 
@@ -33,41 +51,127 @@ class Sensor(ObjectCollection):
         type : string (optional)
             Sensor type ('physical' or 'virtual')
 
-        timestamp : datetime (optional)
-            Timestamp for the sensor measurement
+        timestamps : list (optional)
+            Timestamps of the sensor measurements (only needed when measurements don't start at the first time step)
 
-        measurements : float (optional)
-            Sensor measurements
+        measurements : list (optional)
+            Sensor measurements (aligned with the time axis of the sensor store)
 
         alias : string (optional)
             Name that identifies the sensor
         """
 
-        # Defining sensor attributes
-        self.id = Sensor.count() + 1
+        # Storing sensor attributes. The type attribute differs physical sensors from the virtual and auxiliary ones.
+        # The sensor measurement at the current step is initialized with the first one of the series
+        self.store = SensorStore.first()
+        self.row = self.store.add(
+            id=self.store.last_id + 1,
+            type=type,
+            coordinates=coordinates,
+            alias=alias,
+            measurements=measurements,
+            timestamps=timestamps,
+        )
+
+        # Adding the new object to the list of instances of its class
+        Sensor.instances.append(self)
 
-        # Helper attribute that differs physical sensors from the virtual and auxiliary ones
-        self.type = type
+    @property
+    def id(self):
+        """Sensor identifier."""
 
-        # Basic sensor attributes
-        self.alias = alias
-        self.coordinates = coordinates
-        self.measurements = measurements
-        self.timestamps = timestamps
+        return int(self.store.ids[self.row])
 
-        # Sensor measurement at the current timestamp
-        self.measurement = measurements[0] if len(measurements) > 0 else None
-        self.timestamp = timestamps[0] if len(timestamps) > 0 else None
+    @property
+    def type(self):
+        """Sensor type ('physical', 'virtual', 'auxiliary', or 'disabled')."""
 
-        # Inferred measurement
-        self.inferred_measurement = None
+        return SensorStore.TYPES[self.store.types[self.row]]
 
-        # NetworkX topology
-        self.topology = Topology.first()
-        self.topology.add_node(self)
+    @type.setter
+    def type(self, value):
+        self.store.types[self.row] = SensorStore.TYPES.index(value)
 
-        # Adding the new object to the list of instances of its class
-        Sensor.instances.append(self)
+    @property
+    def alias(self):
+        """Name that identifies the sensor."""
+
+        return self.store.aliases[self.row]
+
+    @property
+    def coordinates(self):
+        """Sensor coordinates."""
+
+        return tuple(self.store.coordinates[self.row].tolist())
+
+    @property
+    def geographic_coordinates(self):
+        """Sensor coordinates as (latitude, longitude), even if the coordinates in the sensor store are projected."""
+
+        if self.store.projection is None:
+            return self.coordinates
+
+        return tuple(unproject_coordinates(self.store.coordinates[self.row], origin=self.store.projection).tolist())
+
+    @property
+    def measurements(self):
+        """Sensor measurements (of the first metric, when sensors measure several metrics) at each time step, with
+        NaN for missing measurements. During chunked replays, only the chunk of time steps in memory is returned."""
+
+        series = self.store.series[self.row]
+        if series < 0:
+            return self.store.measurements[0, :0, 0]
+
+        return self.store.measurements[0, series]
+
+    @property
+    def timestamps(self):
+        """Timestamps of the sensor measurements (the time axis shared by all sensors)."""
+
+        if self.store.series[self.row] < 0:
+            return []
+
+        return self.store.timestamps.astype("datetime64[s]").tolist()
+
+    @property
+    def measurement(self):
+        """Sensor measurement (of the first metric) at the current step."""
+
+        if self.store.series[self.row] < 0:
+            return None
+
+        return float(self.store.current_measurements[0, self.row])
+
+    @measurement.setter
+    def measurement(self, value):
+        self.store.current_measurements[0, self.row] = value
+
+    @property
+    def timestamp(self):
+        """Timestamp of the sensor measurement at the current step."""
+
+        if self.store.series[self.row] < 0:
+            return None
+
+        return self.store.current_timestamp.item()
+
+    @property
+    def inferred_measurement(self):
+        """Inferred measurement of the first metric (None if the measurement of the sensor was not inferred)."""
+
+        inference = self.store.inferences[0, self.row]
+
+        return None if inference != inference else float(inference)
+
+    @inferred_measurement.setter
+    def inferred_measurement(self, value):
+        self.store.inferences[0, self.row] = float("nan") if value is None else value
+
+    @property
+    def topology(self):
+        """NetworkX topology (built from the existing sensors whenever it is requested)."""
+
+        return Topology.first().build(sensors=Sensor.all())
 
     def __str__(self):
         """Dictates the visual representation of sensors when they're printed."""
@@ -92,7 +196,7 @@ class Sensor(ObjectCollection):
             List of coordinates from sensors from 'physical_sensors' that comprise a mesh of triangles
         """
 
-        topo = Topology.first()
+        Profiler.count("delaunay_builds")
 
         sensors = [sensor.coordinates for sensor in physical_sensors]
         triangles = [
@@ -101,6 +205,7 @@ class Sensor(ObjectCollection):
         ]
 
         if create_edges:
+            topo = Topology.first().build(sensors=Sensor.all())
             for triangle in triangles:
                 topo.add_edge(triangle[2], triangle[0])
                 for i in range(0, 2):
@@ -123,6 +228,68 @@ class Sensor(ObjectCollection):
 
         return False
 
+    @classmethod
+    def remove_auxiliary_sensors(cls):
+        """Removes all auxiliary sensors."""
+
+        store = SensorStore.first()
+        rows = np.flatnonzero(store.types[: store.size] != SensorStore.TYPES.index("auxiliary"))
+
+        # Auxiliary sensors are created after the physical ones, so they usually just need to be cut off the end
+        Sensor.keep_rows(rows)
+
+    @classmethod
+    def remove(cls, sensors):
+        """Removes a list of sensors.
+
+        Parameters
+        ==========
+        sensors : list
+            Sensors that will be removed
+        """
+
+        store = SensorStore.first()
+        kept = np.ones(store.size, dtype=bool)
+        kept[[sensor.row for sensor in sensors]] = False
+
+        Sensor.keep_rows(np.flatnonzero(kept))
+
+    @classmethod
+    def keep_rows(cls, rows):
+        """Removes all sensors except the ones in the given rows of the sensor store.
+
+        Parameters
+        ==========
+        rows : numpy.ndarray
+            Rows of the sensors that will be kept
+        """
+
+        store = SensorStore.first()
+
+        if len(rows) == 0 or rows[-1] == len(rows) - 1:
+            del Sensor.instances[len(rows) :]
+            store.keep(rows)
+        else:
+            Sensor.instances = [Sensor.instances[row] for row in rows]
+            for sensor, row in zip(Sensor.instances, store.keep(rows)):
+                sensor.row = int(row)
+
+    @classmethod
+    def attach(cls, store):
+        """Creates sensor objects for all sensors of a store (e.g., a copy of a store created by a previous simulation).
+
+        Parameters
+        ==========
+        store : SensorStore
+            Sensor store whose sensors will be attached
+        """
+
+        for row in range(store.size):
+            sensor = Sensor.__new__(Sensor)
+            sensor.store = store
+            sensor.row = row
+            Sensor.instances.append(sensor)
+
     def find_neighbors_sorted_by_distance(self):
         """Finds all neighbor sensors sorted by their distance.
 
@@ -131,11 +298,62 @@ class Sensor(ObjectCollection):
         neighbors : list
             List of sensors sorted by their distance from 'self'
         """
-        sensors = [sensor for sensor in Sensor.all() if sensor != self and sensor.type == "physical"]
-        neighbors = sorted(sensors, key=lambda s: distance.euclidean(self.coordinates, s.coordinates))
+
+        # Distances are calculated at once from the coordinates in the sensor store. Ties are broken by the
+        # order of the sensors (i.e., sorting is stable)
+        store = SensorStore.first()
+        rows = store.rows("physical")
+        rows = rows[rows != self.row]
+        distances = np.linalg.norm(store.coordinates[rows] - store.coordinates[self.row], axis=1)
+
+        neighbors = [Sensor.instances[row] for row in rows[np.argsort(distances, kind="stable")]]
 
         return neighbors
 
+    @classmethod
+    def find_nearest_neighbors(cls, sensors, k):
+        """Finds the 'k' nearest physical sensors of a group of sensors at once. Ties are broken by the order
+        of the sensors, just like in 'find_neighbors_sorted_by_distance'.
+
+        Parameters
+        ==========
+        sensors : list
+            Sensors whose neighbors will be found
+
+        k : int
+            Number of neighbors of each sensor
+
+        Returns
+        =======
+        neighbors : numpy.ndarray
+            (sensors x k) identifiers of the nearest physical sensors sorted by their distance
+
+        distances : numpy.ndarray
+            (sensors x k) distances of the nearest physical sensors
+        """
+
+        store = SensorStore.first()
+        coordinates = store.coordinates[[sensor.row for sensor in sensors]].reshape(-1, 2)
+
+        return Sensor.get_spatial_index().query(coordinates=coordinates, k=k)
+
+    @classmethod
+    def get_spatial_index(cls):
+        """Returns the spatial index of physical sensors (which is built when it is first requested).
+
+        Returns
+        =======
+        spatial_index : SpatialIndex
+            KD-tree of the physical sensors
+        """
+
+        if Sensor.spatial_index is None:
+            store = SensorStore.first()
+            rows = store.rows("physical")
+            Sensor.spatial_index = SpatialIndex(ids=store.ids[rows], coordinates=store.coordinates[rows])
+
+        return Sensor.spatial_index
+
     def get_encoded_position(self):
         """Encodes sensor's coordinates into a single number [1].
 
@@ -166,13 +384,16 @@ class Sensor(ObjectCollection):
         inferred_measurement : float
             Inferred sensor measurement
         """
-        positions = [sensor1.get_encoded_position(), sensor2.get_encoded_position()]
-        measurements = [sensor1.measurement, sensor2.measurement]
-
-        interpolation = scipy.interpolate.interp1d(positions, measurements)
+        inferred_measurement = interpolate_aligned_measurements(
+            positions1=sensor1.get_encoded_position(),
+            positions2=sensor2.get_encoded_position(),
+            measurements1=sensor1.measurement,
+            measurements2=sensor2.measurement,
+            targets=self.get_encoded_position(),
+        )
+        Profiler.count("aligned_interpolations")
 
-        inferred_measurement = float(interpolation(self.get_encoded_position()))
-        return inferred_measurement
+        return float(inferred_measurement)
 
     def create_auxiliary_sensors(self, physical_sensors):
         """Creates a set of auxiliary sensors that will be
@@ -207,22 +428,30 @@ class Sensor(ObjectCollection):
         aux_sensor1 = Sensor(coordinates=intersection_physensor1_physensor2, type="auxiliary")
         aux_sensor2 = Sensor(coordinates=intersection_physensor1_physensor3, type="auxiliary")
         aux_sensor3 = Sensor(coordinates=intersection_physensor2_physensor3, type="auxiliary")
-
-        # https://stackoverflow.com/questions/8285599/is-there-a-formula-to-change-a-latitude-and-longitude-into-a-single-number
-        # https://stackoverflow.com/questions/4637031/geospatial-indexing-with-redis-sinatra-for-a-facebook-app
-        aux_sensor1.inferred_measurement = aux_sensor1.interpolate_measurement_aligned_sensors(
-            sensor1=physical_sensors[0], sensor2=physical_sensors[1]
+        Profiler.count("auxiliary_sensors", 3)
+
+        # Interpolating the measurements of the three auxiliary sensors at once. Each auxiliary sensor lies on the
+        # line formed by two physical sensors: aux_sensor1 (sensors 1 and 2), aux_sensor2 (sensors 1 and 3), and
+        # aux_sensor3 (sensors 2 and 3). Positions are encoded as single numbers [1, 2].
+        # [1] https://stackoverflow.com/questions/8285599/is-there-a-formula-to-change-a-latitude-and-longitude-into-a-single-number
+        # [2] https://stackoverflow.com/questions/4637031/geospatial-indexing-with-redis-sinatra-for-a-facebook-app
+        auxiliary_sensors = [aux_sensor1, aux_sensor2, aux_sensor3]
+        first_sensors = [physical_sensors[0], physical_sensors[0], physical_sensors[1]]
+        second_sensors = [physical_sensors[1], physical_sensors[2], physical_sensors[2]]
+
+        inferred_measurements = interpolate_aligned_measurements(
+            positions1=encoded_positions([sensor.coordinates for sensor in first_sensors]),
+            positions2=encoded_positions([sensor.coordinates for sensor in second_sensors]),
+            measurements1=[sensor.measurement for sensor in first_sensors],
+            measurements2=[sensor.measurement for sensor in second_sensors],
+            targets=encoded_positions([sensor.coordinates for sensor in auxiliary_sensors]),
         )
+        Profiler.count("aligned_interpolations", 3)
 
-        aux_sensor2.inferred_measurement = aux_sensor2.interpolate_measurement_aligned_sensors(
-            sensor1=physical_sensors[0], sensor2=physical_sensors[2]
-        )
-
-        aux_sensor3.inferred_measurement = aux_sensor3.interpolate_measurement_aligned_sensors(
-            sensor1=physical_sensors[1], sensor2=physical_sensors[2]
-        )
+        for auxiliary_sensor, inferred_measurement in zip(auxiliary_sensors, inferred_measurements):
+            auxiliary_sensor.inferred_measurement = inferred_measurement
 
-        return [aux_sensor1, aux_sensor2, aux_sensor3]
+        return auxiliary_sensors
 
     def calculate_measurement(self, physical_sensors, use_auxiliary_sensors=False, weighted=False):
         """Infers the value of a virtual sensor by triangulating the
@@ -264,6 +493,95 @@ class Sensor(ObjectCollection):
 
         return inference
 
+    def auxiliary_coordinates(self, physical_sensors):
+        """Calculates the positions of the auxiliary sensors of a triangle (the positions of the sensors created by
+        'create_auxiliary_sensors', without creating them).
+
+        Parameters
+        ==========
+        physical_sensors : list
+            List of physical sensors that form the triangle
+
+        Returns
+        =======
+        auxiliary_coordinates : list
+            Coordinates of the auxiliary sensors (NaN when the lines used to position them do not cross each other)
+        """
+
+        coordinates = [sensor.coordinates for sensor in physical_sensors]
+
+        # Auxiliary sensors lie on the triangle edges (1-2, 1-3, and 2-3) and on the lines that connect the
+        # opposite triangle vertex and the sensor
+        auxiliary_coordinates = []
+        for i, j, k in [(0, 1, 2), (0, 2, 1), (1, 2, 0)]:
+            auxiliary_coordinate = intersection(
+                line(coordinates[i], coordinates[j]), line(coordinates[k], self.coordinates)
+            )
+            auxiliary_coordinates.append(auxiliary_coordinate if auxiliary_coordinate else (np.nan, np.nan))
+
+        return auxiliary_coordinates
+
+    def interpolation_weights(self, physical_sensors, aligned=False, use_auxiliary_sensors=False, weighted=False):
+        """Calculates the weight of each physical sensor in the inference of the sensor measurement, i.e., the
+        geometry-only counterpart of 'interpolate_measurement_aligned_sensors' and 'calculate_measurement'
+        (the inferred measurement is given by the sum of the measurements of 'physical_sensors' times the weights).
+
+        Parameters
+        ==========
+        physical_sensors : list
+            List of physical sensors used to infer the measurement
+
+        aligned : boolean (optional)
+            Whether the two physical sensors form a line that crosses the sensor
+
+        use_auxiliary_sensors : boolean (optional)
+            Whether the three physical sensors form a triangle whose auxiliary sensors are used to infer the measurement
+
+        weighted : boolean (optional)
+            Whether measurements are weighted by the inverse of their distance to the sensor
+
+        Returns
+        =======
+        weights : numpy.ndarray
+            Weight of the measurement of each physical sensor
+        """
+
+        position = self.get_encoded_position()
+
+        if aligned:
+            weights1, weights2 = aligned_interpolation_weights(
+                positions1=physical_sensors[0].get_encoded_position(),
+                positions2=physical_sensors[1].get_encoded_position(),
+                targets=position,
+            )
+            return np.array([weights1, weights2])
+
+        if use_auxiliary_sensors:
+            coordinates = [sensor.coordinates for sensor in physical_sensors]
+            auxiliary_coordinates = self.auxiliary_coordinates(physical_sensors=physical_sensors)
+
+            # The inference is the arithmetic mean of the auxiliary sensors' measurements, each interpolated
+            # from the measurements of the two physical sensors that form the edge it lies on
+            weights = np.zeros(3)
+            for (i, j), auxiliary_coordinate in zip([(0, 1), (0, 2), (1, 2)], auxiliary_coordinates):
+                weight_i, weight_j = aligned_interpolation_weights(
+                    positions1=encoded_positions(coordinates[i]),
+                    positions2=encoded_positions(coordinates[j]),
+                    targets=encoded_positions(auxiliary_coordinate),
+                )
+                weights[i] += weight_i / 3
+                weights[j] += weight_j / 3
+
+            return weights
+
+        if weighted:
+            weights = np.array(
+                [1 / distance.euclidean(self.coordinates, sensor.coordinates) for sensor in physical_sensors]
+            )
+            return weights / weights.sum()
+
+        return np.full(len(physical_sensors), 1 / len(physical_sensors))
+
     def is_inside_line(self, sensor1, sensor2):
         """Checks if sensor is inside a line.
 
@@ -284,7 +602,7 @@ class Sensor(ObjectCollection):
             encoded_position2 < encoded_position1 and encoded_position2 > encoded_position3
         )
 
-    def crossed_by_line(self, sensors):
+    def crossed_by_line(self, sensors, tolerance=0):
         """Checks if sensor is crossed by a line formed by two physical sensors.
 
         Parameters
@@ -292,64 +610,63 @@ class Sensor(ObjectCollection):
         sensors : list
             List of physical sensors
 
+        tolerance : float (optional)
+            Maximum absolute determinant for which the sensor is considered aligned with two physical sensors
+
         Returns
         =======
         Tuple of sensors of 'False'
             Indication of whether a sensor is crossed by two physical sensors or not
         """
 
-        combinations = itertools.combinations(sensors, 2)
-        for pair in combinations:
+        key = (self.id, tolerance, tuple(sensor.id for sensor in sensors))
 
-            # Calculating the matrix determinant to check if the virtual sensor is aligned with two physical sensors
-            determinant = matrix_determinant(
-                coord1=pair[0].coordinates, coord2=self.coordinates, coord3=pair[1].coordinates
+        if key not in Sensor.aligned_sensors_cache:
+            # Checking all pairs of physical sensors at once. A pair is aligned with the sensor when the determinant
+            # of the matrix formed by their coordinates is zero and the sensor is inside the line formed by the pair
+            pair = find_aligned_pair(
+                coordinates=self.store.coordinates[[sensor.row for sensor in sensors]],
+                point=self.coordinates,
+                tolerance=tolerance,
             )
+            Sensor.aligned_sensors_cache[key] = (sensors[pair[0]], sensors[pair[1]]) if pair else False
 
-            # Checking if the sensor is inside the line formed by the two physical sensors
-            inside_line = self.is_inside_line(sensor1=pair[0], sensor2=pair[1])
-
-            if determinant == 0 and inside_line:
-                return pair
-
-        return False
+        return Sensor.aligned_sensors_cache[key]
 
     def is_inside_triangle(self, triangle):
-        """ """
-
-        sensor1 = triangle[0]
-        sensor2 = triangle[1]
-        sensor3 = triangle[2]
+        """Checks whether the sensor lies inside (or on the edges of) a triangle formed by three sensors.
 
-        # Calculate area of triangle ABC
-        A = triangle_area([sensor1, sensor2, sensor3])
+        Parameters
+        ==========
+        triangle : list
+            Sensors that form the triangle
 
-        # Calculate area of triangle PBC
-        A1 = triangle_area([self, sensor2, sensor3])
+        Returns
+        =======
+        inside : bool
+            Whether the sensor lies inside the triangle or not
+        """
 
-        # Calculate area of triangle PAC
-        A2 = triangle_area([sensor1, self, sensor3])
+        (x1, y1), (x2, y2), (x3, y3) = [sensor.coordinates for sensor in triangle]
+        x, y = self.coordinates
 
-        # Calculate area of triangle PAB
-        A3 = triangle_area([sensor1, sensor2, self])
+        # Twice the signed area of the triangle. Degenerate triangles (whose sensors are aligned) cover no area
+        area = (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+        if area == 0:
+            return False
 
-        # Calculating the minimum precision (number of decimal) of the sensors' coordinates. We use
-        # the minimum precision instead of the maximum to avoid misleading calculations of whether
-        # a point lies inside the triangle of not (in case the coordinates of a sensor has a higher precision
-        # than the coordinates of other sensor that comprises the triangle).
-        triangle_coordinates_precision = min(
-            [
-                min([str(sensor.coordinates[0])[::-1].find("."), str(sensor.coordinates[1])[::-1].find(".")])
-                for sensor in triangle
-            ]
-        )
+        # Orientation of the sensor in relation to each edge of the triangle (twice the signed areas of the triangles
+        # formed by the sensor and each edge). The sensor lies inside the triangle when it is on the same side of all
+        # edges as the opposite vertices. The tolerance is relative to the area of the triangle, so that the result
+        # doesn't depend on the unit of the coordinates (e.g., degrees or projected kilometers)
+        tolerance = Sensor.TRIANGLE_TOLERANCE * abs(area)
+        orientations = [
+            (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1),
+            (x3 - x2) * (y - y2) - (y3 - y2) * (x - x2),
+            (x1 - x3) * (y - y3) - (y1 - y3) * (x - x3),
+        ]
 
-        # Check if sum of A1, A2 and A3 is same as A. We are rounding both
-        # float values to 'triangle_coordinates_precision' decimal places
-        if round(A, triangle_coordinates_precision) == round(A1 + A2 + A3, triangle_coordinates_precision):
-            return True
-        else:
-            return False
+        return all(orientation * np.sign(area) >= -tolerance for orientation in orientations)
 
     @classmethod
     def get_triangle_centroid(cls, triangle):
@@ -395,6 +712,9 @@ class Sensor(ObjectCollection):
                 if self.is_inside_triangle(triangle=triangle):
                     triangles_that_cover_the_sensor.append(triangle)
 
+            Profiler.count("triangles_enumerated", len(triangles))
+            Profiler.count("triangles_accepted", len(triangles_that_cover_the_sensor))
+
             if len(triangles_that_cover_the_sensor) > 0:
                 return triangles_that_cover_the_sensor
 
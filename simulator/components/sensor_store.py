@@ -0,0 +1,441 @@
+# Python Libraries
+import copy
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.misc.object_collection import ObjectCollection
+from simulator.misc.profiler import Profiler
+
+# Helper Methods
+from simulator.misc.helper_methods import project_coordinates
+
+
+class SensorStore(ObjectCollection):
+    """This class keeps the attributes of all sensors in contiguous NumPy arrays (one row per sensor),
+    so that sensor objects are thin views over a row and bulk operations can work on the arrays directly.
+    """
+
+    # Class attribute that allows the class to use ObjectCollection methods
+    instances = []
+
+    # Sensor types and their codes (i.e., their index in the list). Disabled sensors are physical sensors that are
+    # temporarily offline (e.g., due to failures), so their measurements can't be used to infer other measurements
+    TYPES = ["physical", "virtual", "auxiliary", "disabled"]
+
+    def __init__(self, capacity=128, metrics=1, precision="float64"):
+        """Creates an empty sensor store.
+
+        Parameters
+        ==========
+        capacity : int (optional)
+            Number of sensors the store can hold before its arrays need to grow
+
+        metrics : int (optional)
+            Number of metrics measured by each sensor
+
+        precision : string (optional)
+            Data type of the stored series ('float32' halves their memory footprint)
+        """
+
+        # Number of sensors in the store
+        self.size = 0
+
+        # Highest identifier ever assigned to a sensor of the store. It never decreases (e.g., when sensors are
+        # removed), so that identifiers are never reused and rows stay sorted by identifier
+        self.last_id = 0
+
+        # Number of metrics measured by each sensor. Measurements and inferences have one row per metric
+        self.metric_count = metrics
+
+        # Attributes of each sensor
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.coordinates = np.full((capacity, 2), np.nan)
+        self.aliases = []
+
+        # Center (latitude, longitude) of the projection of the coordinates (None while coordinates are geographic)
+        self.projection = None
+
+        # Index of the sensor series in 'measurements' (-1 for sensors without series)
+        self.series = np.full(capacity, -1, dtype=np.int64)
+
+        # Measurement and inferred measurement of each sensor at the current step (NaN when missing)
+        self.current_measurements = np.full((metrics, capacity), np.nan)
+        self.inferences = np.full((metrics, capacity), np.nan)
+
+        # Timestamps (seconds since the epoch) of the time axis shared by all series and timestamp of the current step
+        self.timestamps = np.zeros(0, dtype=np.int64)
+        self.current_timestamp = np.datetime64("NaT", "s")
+
+        # Series of the sensors that have measurements, aligned with the time axis (NaN when measurements are missing)
+        self.precision = np.dtype(precision)
+        self.series_count = 0
+        self.measurements = np.full((metrics, 0, 0), np.nan, dtype=self.precision)
+
+        # Arrays (e.g., memory-mapped files) from which series are read in chunks of time steps during chunked replays
+        # (None when series are kept in memory). Only the chunk that contains the current step is kept in memory
+        self.source = None
+        self.chunk_size = 0
+        self.chunk_start = 0
+
+        # Adding the new object to the list of instances of its class
+        SensorStore.instances.append(self)
+
+    def add(self, id, type, coordinates, alias="", measurements=[], timestamps=[]):
+        """Adds a sensor to the store.
+
+        Parameters
+        ==========
+        id : int
+            Sensor identifier
+
+        type : string
+            Sensor type
+
+        coordinates : tuple
+            Sensor coordinates
+
+        alias : string (optional)
+            Name that identifies the sensor
+
+        measurements : list (optional)
+            Sensor measurements (a list with the measurements of each metric if the store holds several metrics).
+            Measurements are aligned with the time axis, starting from its first step
+
+        timestamps : list (optional)
+            Timestamps of the sensor measurements (a list with the timestamps of each metric if the store holds
+            several metrics), used to place measurements on the time axis when they don't match it step by step
+
+        Returns
+        =======
+        row : int
+            Row that holds the sensor attributes
+        """
+
+        if self.metric_count == 1:
+            measurements, timestamps = [measurements], [timestamps]
+        elif len(timestamps) == 0:
+            timestamps = [[]] * self.metric_count
+
+        if self.size == len(self.ids):
+            self._grow_rows(2 * len(self.ids))
+
+        row = self.size
+        self.size += 1
+
+        self.ids[row] = id
+        self.last_id = max(self.last_id, id)
+        self.types[row] = SensorStore.TYPES.index(type)
+        # Auxiliary sensors may have no coordinates when the lines used to position them do not cross each other
+        self.coordinates[row] = (np.nan, np.nan) if coordinates is None or coordinates is False else coordinates
+        self.aliases.append(alias)
+        self.current_measurements[:, row] = np.nan
+        self.inferences[:, row] = np.nan
+        self.series[row] = -1
+
+        if any(len(series) > 0 for series in measurements):
+            # Sensors added to empty stores without a time axis define it
+            if len(self.timestamps) == 0 and len(timestamps[0]) > 0:
+                self.set_time_axis(timestamps=timestamps[0])
+
+            steps = [
+                self._steps(series, series_timestamps) for series, series_timestamps in zip(measurements, timestamps)
+            ]
+            self.series[row] = self._add_series(measurements=measurements, steps=steps)
+            self.current_measurements[:, row] = self.measurements[:, self.series[row], 0]
+
+        return row
+
+    @staticmethod
+    def _epoch(timestamps):
+        """Converts timestamps (e.g., datetime objects) to seconds since the epoch."""
+
+        return np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+
+    def _steps(self, measurements, timestamps):
+        """Finds the time steps of a series (measurements whose timestamps are not in the time axis get step -1)."""
+
+        if len(timestamps) == 0:
+            return np.arange(len(measurements))
+
+        epoch = self._epoch(timestamps)
+        steps = np.minimum(np.searchsorted(self.timestamps, epoch), max(len(self.timestamps) - 1, 0))
+        found = len(self.timestamps) > 0 and self.timestamps[steps] == epoch
+
+        return np.where(found, steps, -1)
+
+    def set_time_axis(self, timestamps):
+        """Defines the time axis shared by all series.
+
+        Parameters
+        ==========
+        timestamps : numpy.ndarray
+            Timestamps of each time step (seconds since the epoch or datetime values), in increasing order
+        """
+
+        timestamps = np.asarray(timestamps)
+        self.timestamps = timestamps.astype(np.int64) if timestamps.dtype.kind in "iu" else self._epoch(timestamps)
+
+        if len(self.timestamps) > self.measurements.shape[2]:
+            self._grow_series(count=self.measurements.shape[1], length=len(self.timestamps))
+
+        if len(self.timestamps) > 0:
+            self.current_timestamp = self.timestamps[0].astype("datetime64[s]")
+
+    def _add_series(self, measurements, steps):
+        """Stores the series of a sensor.
+
+        Parameters
+        ==========
+        measurements : list
+            Sensor measurements of each metric
+
+        steps : list
+            Time steps of the sensor measurements of each metric (-1 for measurements outside the time axis)
+
+        Returns
+        =======
+        index : int
+            Index of the series
+        """
+
+        if self.source is not None:
+            raise Exception("Sensors with measurements can't be added to stores that read series in chunks.")
+
+        length = max(
+            [len(self.timestamps)] + [int(metric_steps.max()) + 1 for metric_steps in steps if len(metric_steps) > 0]
+        )
+
+        if self.series_count == self.measurements.shape[1] or length > self.measurements.shape[2]:
+            count = self.measurements.shape[1]
+            if self.series_count == count:
+                count = max(2 * count, 16)
+
+            self._grow_series(count=count, length=max(length, self.measurements.shape[2]))
+
+        index = self.series_count
+        self.series_count += 1
+
+        for metric, (series, metric_steps) in enumerate(zip(measurements, steps)):
+            found = metric_steps >= 0
+            self.measurements[metric, index, metric_steps[found]] = np.asarray(series, dtype=self.precision)[found]
+
+        return index
+
+    def _grow_rows(self, capacity):
+        """Increases the number of sensors the store can hold."""
+
+        def grow(array, fill, axis=0):
+            shape = list(array.shape)
+            shape[axis] = capacity
+            grown = np.full(shape, fill, dtype=array.dtype)
+            grown[(slice(None),) * axis + (slice(0, array.shape[axis]),)] = array
+            return grown
+
+        self.ids = grow(self.ids, 0)
+        self.types = grow(self.types, 0)
+        self.coordinates = grow(self.coordinates, np.nan)
+        self.series = grow(self.series, -1)
+        self.current_measurements = grow(self.current_measurements, np.nan, axis=1)
+        self.inferences = grow(self.inferences, np.nan, axis=1)
+
+    def _grow_series(self, count, length):
+        """Increases the number and length of series the store can hold."""
+
+        measurements = np.full((self.metric_count, count, length), np.nan, dtype=self.precision)
+        measurements[:, : self.measurements.shape[1], : self.measurements.shape[2]] = self.measurements
+        self.measurements = measurements
+
+    def stream(self, rows, measurements, timestamps, chunk_size):
+        """Reads the series of sensors in chunks of time steps instead of keeping them in memory, so that memory
+        is bounded by the chunk size rather than by the length of the series. Series share the same time axis
+        (missing measurements are NaN) and are read from arrays such as the ones of memory-mapped files.
+
+        Parameters
+        ==========
+        rows : numpy.ndarray
+            Rows of the sensors (in the order of the rows of the arrays with measurements)
+
+        measurements : list
+            Arrays (sensors x time steps) with the measurements of each metric
+
+        timestamps : numpy.ndarray
+            Timestamps (seconds since the epoch) of the time steps
+
+        chunk_size : int
+            Number of time steps read at once
+        """
+
+        self.series[rows] = np.arange(len(rows))
+        self.series_count = len(rows)
+
+        self.source = {"measurements": measurements, "timestamps": timestamps}
+        self.chunk_size = chunk_size
+        self._load_chunk(start=0)
+
+        # Sensors start with the first measurements of their series
+        self.set_step(0)
+
+    def _load_chunk(self, start):
+        """Reads the chunk of time steps that starts at a given step."""
+
+        stop = max(start, min(start + self.chunk_size, len(self.source["timestamps"])))
+
+        self.chunk_start = start
+        self.measurements = np.stack(
+            [np.asarray(series[:, start:stop], dtype=self.precision) for series in self.source["measurements"]]
+        )
+
+        self.timestamps = np.asarray(self.source["timestamps"][start:stop], dtype=np.int64)
+
+        Profiler.count("chunks_loaded")
+
+    def subset(self, rows):
+        """Creates a store with the sensors in the given rows (e.g., the sensors of a spatial tile). The new store
+        is not listed among the instances of the class and doesn't share arrays with the original one.
+
+        Parameters
+        ==========
+        rows : numpy.ndarray
+            Rows of the sensors (in increasing order)
+
+        Returns
+        =======
+        store : SensorStore
+            Store with the sensors
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        subset = copy.copy(self)
+
+        subset.size = len(rows)
+        subset.ids = self.ids[rows]
+        subset.types = self.types[rows]
+        subset.coordinates = self.coordinates[rows]
+        subset.aliases = [self.aliases[row] for row in rows]
+        subset.current_measurements = self.current_measurements[:, rows]
+        subset.inferences = self.inferences[:, rows]
+
+        # Only the series of the sensors in the subset are kept (series are not read in chunks anymore)
+        series = self.series[rows]
+        has_series = series >= 0
+        subset.series = np.full(len(rows), -1, dtype=np.int64)
+        subset.series[has_series] = np.arange(has_series.sum())
+        subset.series_count = int(has_series.sum())
+        subset.measurements = self.measurements[:, series[has_series]]
+        subset.source = None
+
+        return subset
+
+    def project(self):
+        """Projects the coordinates of all sensors onto a local plane centered at the middle of their bounding box
+        (see 'project_coordinates'), so that distances are measured in kilometers."""
+
+        if self.projection is not None:
+            return
+
+        coordinates = self.coordinates[: self.size]
+        origin = tuple(((np.nanmin(coordinates, axis=0) + np.nanmax(coordinates, axis=0)) / 2).tolist())
+
+        self.coordinates[: self.size] = project_coordinates(coordinates=coordinates, origin=origin)
+        self.projection = origin
+
+    def rows(self, type=None):
+        """Returns the rows of sensors of a given type.
+
+        Parameters
+        ==========
+        type : string (optional)
+            Sensor type (all sensors are returned if no type is informed)
+
+        Returns
+        =======
+        rows : numpy.ndarray
+            Rows of the sensors
+        """
+
+        if type is None:
+            return np.arange(self.size)
+
+        return np.flatnonzero(self.types[: self.size] == SensorStore.TYPES.index(type))
+
+    def rows_of(self, ids):
+        """Returns the rows of sensors with given identifiers.
+
+        Parameters
+        ==========
+        ids : numpy.ndarray
+            Sensor identifiers
+
+        Returns
+        =======
+        rows : numpy.ndarray
+            Rows of the sensors
+        """
+
+        # Identifiers are assigned in increasing order and sensors keep their relative order when others are removed
+        return np.searchsorted(self.ids[: self.size], ids)
+
+    def set_step(self, step):
+        """Updates the current measurements of all sensors that have series and the current timestamp.
+
+        Parameters
+        ==========
+        step : int
+            Index of the measurements (starting from zero) that will become the current ones
+        """
+
+        # Loading the chunk of time steps that contains the step (during chunked replays)
+        if self.source is not None:
+            if not self.chunk_start <= step < self.chunk_start + self.chunk_size:
+                self._load_chunk(start=step - step % self.chunk_size)
+            step -= self.chunk_start
+
+        rows = np.flatnonzero(self.series[: self.size] >= 0)
+        series = self.series[rows]
+
+        if step < self.measurements.shape[2]:
+            self.current_measurements[:, rows] = self.measurements[:, series, step]
+        else:
+            self.current_measurements[:, rows] = np.nan
+
+        if step < len(self.timestamps):
+            self.current_timestamp = self.timestamps[step].astype("datetime64[s]")
+        else:
+            self.current_timestamp = np.datetime64("NaT", "s")
+
+    def keep(self, rows):
+        """Removes all sensors except the ones in the given rows (sensors keep their relative order).
+
+        Parameters
+        ==========
+        rows : numpy.ndarray
+            Rows of the sensors that will be kept
+
+        Returns
+        =======
+        rows : numpy.ndarray
+            New rows of the kept sensors
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        size = len(rows)
+
+        # Sensors are usually removed from the end of the store (e.g., auxiliary sensors), which requires no copies
+        if not np.array_equal(rows, np.arange(size)):
+            for attribute in ["ids", "types", "coordinates", "series"]:
+                array = getattr(self, attribute)
+                array[:size] = array[rows]
+
+            # Arrays with one row per metric
+            for attribute in ["current_measurements", "inferences"]:
+                array = getattr(self, attribute)
+                array[:, :size] = array[:, rows]
+
+            self.aliases = [self.aliases[row] for row in rows]
+        else:
+            del self.aliases[size:]
+
+        self.size = size
+
+        return np.arange(size)
@@ -0,0 +1,173 @@
+# Python Libraries
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class SpatialIndex:
+    """KD-tree of physical sensors that supports adding, removing, and disabling sensors without being rebuilt
+    every time: removed or disabled sensors are masked out of the tree and added sensors are kept in a small
+    list searched by brute force. The tree is only rebuilt once these changes pile up.
+    """
+
+    # Fraction of the indexed sensors that can be masked out or pending before the tree is rebuilt
+    REBUILD_FRACTION = 0.25
+
+    # Minimum number of changes before the tree is rebuilt (avoids rebuilding small trees on every change)
+    MINIMUM_CHANGES = 64
+
+    def __init__(self, ids, coordinates):
+        """Creates a spatial index.
+
+        Parameters
+        ==========
+        ids : numpy.ndarray
+            Identifiers of the indexed sensors
+
+        coordinates : numpy.ndarray
+            (sensors x 2) coordinates of the indexed sensors
+        """
+
+        self.build(ids=ids, coordinates=coordinates)
+
+    def build(self, ids, coordinates):
+        """Builds the KD-tree from scratch.
+
+        Parameters
+        ==========
+        ids : numpy.ndarray
+            Identifiers of the indexed sensors
+
+        coordinates : numpy.ndarray
+            (sensors x 2) coordinates of the indexed sensors
+        """
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.tree = cKDTree(self.coordinates)
+
+        # Indexed sensors that were removed or disabled after the tree was built
+        self.masked = np.zeros(len(self.ids), dtype=bool)
+
+        # Sensors added (or enabled) after the tree was built, which are not in the tree
+        self.pending_ids = np.zeros(0, dtype=np.int64)
+        self.pending_coordinates = np.zeros((0, 2))
+
+    def __len__(self):
+        """Returns the number of active sensors in the index."""
+
+        return int((~self.masked).sum()) + len(self.pending_ids)
+
+    def add(self, id, coordinates):
+        """Adds a sensor to the index (also used to enable sensors that were disabled).
+
+        Parameters
+        ==========
+        id : int
+            Sensor identifier
+
+        coordinates : tuple
+            Sensor coordinates
+        """
+
+        position = np.searchsorted(self.ids, id)
+        if position < len(self.ids) and self.ids[position] == id:
+            self.masked[position] = False
+        else:
+            self.pending_ids = np.append(self.pending_ids, id)
+            self.pending_coordinates = np.vstack([self.pending_coordinates, coordinates])
+
+        self.rebuild_if_needed()
+
+    def remove(self, id):
+        """Removes a sensor from the index (also used to disable sensors).
+
+        Parameters
+        ==========
+        id : int
+            Sensor identifier
+        """
+
+        position = np.searchsorted(self.ids, id)
+        if position < len(self.ids) and self.ids[position] == id:
+            self.masked[position] = True
+        else:
+            pending = self.pending_ids != id
+            self.pending_ids = self.pending_ids[pending]
+            self.pending_coordinates = self.pending_coordinates[pending]
+
+        self.rebuild_if_needed()
+
+    def rebuild_if_needed(self):
+        """Rebuilds the KD-tree when too many sensors are masked out or pending."""
+
+        changes = int(self.masked.sum()) + len(self.pending_ids)
+        if changes > max(SpatialIndex.MINIMUM_CHANGES, SpatialIndex.REBUILD_FRACTION * len(self.ids)):
+            ids = np.concatenate([self.ids[~self.masked], self.pending_ids])
+            coordinates = np.vstack([self.coordinates[~self.masked], self.pending_coordinates])
+            order = np.argsort(ids, kind="stable")
+            self.build(ids=ids[order], coordinates=coordinates[order])
+
+    def query(self, coordinates, k):
+        """Finds the 'k' nearest active sensors of a group of points. Ties are broken by the sensor identifiers.
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray
+            (points x 2) coordinates of the points
+
+        k : int
+            Number of neighbors of each point
+
+        Returns
+        =======
+        neighbors : numpy.ndarray
+            (points x k) identifiers of the nearest sensors sorted by their distance
+
+        distances : numpy.ndarray
+            (points x k) distances of the nearest sensors
+        """
+
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        k = min(k, len(self))
+        if k == 0:
+            return np.zeros((len(coordinates), 0), dtype=np.int64), np.zeros((len(coordinates), 0))
+
+        # Querying extra neighbors to make up for masked sensors and to find ties between the k-th and the next neighbor
+        tree_k = min(k + 1 + int(self.masked.sum()), len(self.ids))
+        distances, indices = self.tree.query(coordinates, k=max(tree_k, 1))
+        distances, indices = distances.reshape(len(coordinates), -1), indices.reshape(len(coordinates), -1)
+
+        valid = indices < len(self.ids)
+        valid[valid] = ~self.masked[indices[valid]]
+        candidate_ids = np.where(valid, self.ids[np.minimum(indices, len(self.ids) - 1)], -1)
+        candidate_distances = np.where(valid, distances, np.inf)
+
+        # Sensors added after the tree was built are compared by brute force
+        if len(self.pending_ids) > 0:
+            pending_distances = np.sqrt(
+                ((coordinates[:, None, :] - self.pending_coordinates[None, :, :]) ** 2).sum(axis=-1)
+            )
+            candidate_ids = np.hstack([candidate_ids, np.broadcast_to(self.pending_ids, pending_distances.shape)])
+            candidate_distances = np.hstack([candidate_distances, pending_distances])
+
+        # Sorting candidates by distance and breaking ties by sensor identifier
+        order = np.lexsort((candidate_ids, candidate_distances), axis=-1)
+        candidate_ids = np.take_along_axis(candidate_ids, order, axis=1)
+        candidate_distances = np.take_along_axis(candidate_distances, order, axis=1)
+
+        # Points whose k-th neighbor is tied with the next one might have other tied sensors outside the candidates
+        if candidate_distances.shape[1] > k:
+            ties = np.flatnonzero(candidate_distances[:, k - 1] == candidate_distances[:, k])
+        else:
+            ties = []
+
+        for i in ties:
+            active = ~self.masked
+            ids = np.concatenate([self.ids[active], self.pending_ids])
+            sensor_coordinates = np.vstack([self.coordinates[active], self.pending_coordinates])
+            row_distances = np.sqrt(((sensor_coordinates - coordinates[i]) ** 2).sum(axis=1))
+            order = np.lexsort((ids, row_distances))[:k]
+            candidate_ids[i, :k] = ids[order]
+            candidate_distances[i, :k] = row_distances[order]
+
+        return candidate_ids[:, :k], candidate_distances[:, :k]
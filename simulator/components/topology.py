@@ -7,6 +7,9 @@ from simulator.misc.object_collection import ObjectCollection
 
 
 class Topology(ObjectCollection, nx.Graph):
+    """NetworkX topology used to render and analyze the sensors. Sensors are not added to the graph as they are
+    created, so the graph must be built (see 'build') before it is used.
+    """
 
     # Class attribute that allows the class to use ObjectCollection methods
     instances = []
@@ -16,9 +19,37 @@ class Topology(ObjectCollection, nx.Graph):
 
         nx.Graph.__init__(self)
 
+        # Whether the edges of the topology were created in a previous simulation step (edges are only removed when the
+        # topology is built again, so that steps that don't use the topology don't pay for it)
+        self.outdated_edges = False
+
         # Adding the new object to the list of instances of its class
         Topology.instances.append(self)
 
+    def build(self, sensors):
+        """Synchronizes the nodes of the topology with a list of sensors (removing the edges of previous steps).
+
+        Parameters
+        ==========
+        sensors : list
+            Sensors that will be the nodes of the topology
+
+        Returns
+        =======
+        topology : Topology
+            The topology itself
+        """
+
+        if self.outdated_edges:
+            self.remove_edges_from(list(self.edges()))
+            self.outdated_edges = False
+
+        current_sensors = set(sensors)
+        self.remove_nodes_from([sensor for sensor in self.nodes() if sensor not in current_sensors])
+        self.add_nodes_from(sensors)
+
+        return self
+
     def draw(self, showgui=True, savefig=True, figname="topology.jpg", dpi=200):
         """Draws the network topology."""
 
@@ -31,7 +62,7 @@ class Topology(ObjectCollection, nx.Graph):
         colors = []
         labels = {}
         for sensor in self.nodes():
-            pos[sensor] = (sensor.coordinates[1], sensor.coordinates[0])
+            pos[sensor] = (sensor.geographic_coordinates[1], sensor.geographic_coordinates[0])
             labels[sensor] = sensor.id
 
             if sensor.type == "physical":
@@ -40,6 +71,8 @@ class Topology(ObjectCollection, nx.Graph):
                 colors.append("red")
             elif sensor.type == "auxiliary":
                 colors.append("green")
+            elif sensor.type == "disabled":
+                colors.append("gray")
 
         nx.draw(
             self,
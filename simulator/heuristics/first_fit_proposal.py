@@ -1,32 +1,71 @@
 # General-purpose Simulator Modules
 from simulator.simulation_environment import SimulationEnvironment
+from simulator.heuristics.heuristic import Heuristic
+from simulator.components.geometry_plan import GeometryPlan
 
 
-def first_fit_proposal():
-    """Simple missing data imputation algorithm that estimates the value of a virtual sensor using triangulation."""
+def find_sensors(virtual_sensor):
+    """Finds the physical sensors (and their weights) used by the first-fit proposal to infer the value of a virtual
+    sensor. Besides the first triangle found, other triangles that cover the virtual sensor in the meshes created
+    with the next few neighbors are kept as alternatives for steps in which the chosen sensors miss measurements.
 
-    # Changing the heuristic name
-    SimulationEnvironment.first().heuristic = f"First-Fit Proposal"
+    Parameters
+    ==========
+    virtual_sensor : Sensor
+        Virtual sensor whose measurement will be inferred
 
-    virtual_sensors = SimulationEnvironment.first().virtual_sensors
+    Returns
+    =======
+    alternatives : list
+        Ranked list of physical sensors that can be used to infer the measurement and their weights
+    """
 
-    for virtual_sensor in virtual_sensors:
+    fallback_plans = SimulationEnvironment.first().fallback_plans
+    alternatives = []
+    found_triangles = set()
 
-        sensors = virtual_sensor.find_neighbors_sorted_by_distance()
-        covered_sensors = [sensors[0]]
-        sensors.pop(0)
+    # Number of neighbors added to the mesh after the first triangle is found (used to look for alternatives)
+    extra_neighbors = None
 
-        for sensor in sensors:
-            covered_sensors.append(sensor)
+    sensors = virtual_sensor.find_neighbors_sorted_by_distance()
+    covered_sensors = [sensors[0]]
+    sensors.pop(0)
 
-            # Checking if the virtual sensor is inside any triangle in a mesh of triangles formed with
-            # Delaunay algorithm. If so, infers the sensor measurement using linear interpolation.
-            triangles = virtual_sensor.can_be_triangulated(covered_sensors)
+    for sensor in sensors:
+        covered_sensors.append(sensor)
 
-            if triangles:
-                triangle = triangles[0]
+        # Checking if the virtual sensor is inside any triangle in a mesh of triangles formed with
+        # Delaunay algorithm. If so, infers the sensor measurement using linear interpolation.
+        triangles = virtual_sensor.can_be_triangulated(covered_sensors)
 
-                inference = virtual_sensor.calculate_measurement(physical_sensors=triangle, use_auxiliary_sensors=True)
-                virtual_sensor.inferred_measurement = inference
+        for triangle in triangles or []:
+            ids = frozenset(sensor.id for sensor in triangle)
+            if ids not in found_triangles and len(alternatives) <= fallback_plans:
+                found_triangles.add(ids)
+                weights = virtual_sensor.interpolation_weights(physical_sensors=triangle, use_auxiliary_sensors=True)
+                alternatives.append((triangle, weights))
 
+        if alternatives:
+            extra_neighbors = fallback_plans if extra_neighbors is None else extra_neighbors - 1
+            if len(alternatives) > fallback_plans or extra_neighbors <= 0:
                 break
+
+    return alternatives
+
+
+def create_plan(virtual_sensors):
+    """Creates the geometry plan of the virtual sensors."""
+
+    return GeometryPlan.create(virtual_sensors=virtual_sensors, find_sensors=find_sensors)
+
+
+@Heuristic.register
+class FirstFitProposal(Heuristic):
+    """Simple missing data imputation algorithm that estimates the value of a virtual sensor using triangulation."""
+
+    name = "first_fit_proposal"
+    label = "First-Fit Proposal"
+
+    def compile(self, store, virtual_sensors):
+        # Geometry only depends on the sensors' coordinates, so it is found once and reused in every step
+        return create_plan(virtual_sensors=virtual_sensors)
@@ -0,0 +1,180 @@
+# Python Libraries
+try:
+    from importlib.metadata import entry_points
+except ImportError:
+    # Python 3.7 needs the 'importlib_metadata' backport to find heuristics installed by other packages
+    try:
+        from importlib_metadata import entry_points
+    except ImportError:
+        entry_points = None
+
+
+class Heuristic:
+    """Heuristics infer the measurements of virtual sensors. Heuristics are registered under a name (used to pick them
+    in the command line), compile the geometry of the virtual sensors once, and infer the measurements of all virtual
+    sensors at every step. Other packages can add heuristics by listing their classes in the 'simulator.heuristics'
+    entry point group, so that they are available without changes to the simulator.
+    """
+
+    # Registered heuristics indexed by name
+    registry = {}
+
+    # Entry point group where other packages list their heuristics
+    ENTRY_POINT_GROUP = "simulator.heuristics"
+
+    # Name used to pick the heuristic and descriptive name used in the simulation results
+    name = None
+    label = None
+
+    # Capabilities of the heuristic. Batchable heuristics compile a geometry plan that infers the measurements of
+    # all virtual sensors at once (so their plans are cached, planned in tiles, and updated when the topology
+    # changes). 'needs_k' tells whether the heuristic uses the number of neighbors informed by the user and
+    # 'multi_metric' whether the same geometry can infer several metrics in the same simulation.
+    batchable = True
+    needs_k = False
+    multi_metric = True
+
+    # Number of neighbors used when the user doesn't inform it (i.e., k = 0). Simulations of heuristics that need the
+    # number of neighbors and have no default are rejected when it is not informed
+    default_neighbors = None
+
+    @classmethod
+    def register(cls, heuristic):
+        """Registers a heuristic class (can be used as a class decorator).
+
+        Parameters
+        ==========
+        heuristic : class
+            Subclass of Heuristic with a unique name
+
+        Returns
+        =======
+        heuristic : class
+            Registered heuristic class
+        """
+
+        if not heuristic.name:
+            raise Exception(f"Heuristic {heuristic.__name__} has no name.")
+
+        Heuristic.registry[heuristic.name] = heuristic
+
+        return heuristic
+
+    @classmethod
+    def find(cls, name):
+        """Returns the heuristic class registered under a given name. Heuristics of other packages are
+        only loaded when the name is not among the heuristics already registered.
+
+        Parameters
+        ==========
+        name : string
+            Name of the heuristic
+
+        Returns
+        =======
+        heuristic : class
+            Heuristic class
+        """
+
+        if name not in Heuristic.registry:
+            Heuristic.load_entry_points()
+
+        if name not in Heuristic.registry:
+            raise Exception("Invalid heuristic algorithm.")
+
+        return Heuristic.registry[name]
+
+    @classmethod
+    def load_entry_points(cls):
+        """Registers the heuristics listed by installed packages in the 'simulator.heuristics' entry point group.
+        Entry points are named after the heuristic and point to its class (e.g., 'my_heuristic = package.module:Class').
+        """
+
+        if entry_points is None:
+            return
+
+        found = entry_points()
+        if hasattr(found, "select"):
+            found = found.select(group=Heuristic.ENTRY_POINT_GROUP)
+        else:
+            found = found.get(Heuristic.ENTRY_POINT_GROUP, [])
+
+        for entry_point in found:
+            if entry_point.name in Heuristic.registry:
+                continue
+
+            heuristic = entry_point.load()
+            if heuristic.name is None:
+                heuristic.name = entry_point.name
+
+            Heuristic.register(heuristic)
+
+    def describe(self, environment):
+        """Returns the descriptive name of the heuristic used in the simulation results.
+
+        Parameters
+        ==========
+        environment : SimulationEnvironment
+            Simulation environment
+
+        Returns
+        =======
+        label : string
+            Descriptive name (including the number of neighbors when the heuristic uses it)
+        """
+
+        if self.needs_k:
+            return f"{self.label} (k={environment.neighbors})"
+
+        return self.label
+
+    def plan_options(self, environment):
+        """Returns the parameters that affect the geometry plan besides the sensors' coordinates and the number of
+        neighbors (they are part of the key of the plan in the plan cache).
+
+        Parameters
+        ==========
+        environment : SimulationEnvironment
+            Simulation environment
+
+        Returns
+        =======
+        options : dict
+            Parameters that affect the geometry plan
+        """
+
+        return {}
+
+    def compile(self, store, virtual_sensors):
+        """Creates the geometry plan of a group of virtual sensors (called once per simulation, and again for the
+        virtual sensors affected by changes in the topology). Only batchable heuristics need to implement it.
+
+        Parameters
+        ==========
+        store : SensorStore
+            Sensor store with the sensors that can be used to infer the measurements
+
+        virtual_sensors : list
+            Virtual sensors whose measurements will be inferred
+
+        Returns
+        =======
+        plan : GeometryPlan
+            Geometry plan of the virtual sensors
+        """
+
+        raise NotImplementedError(f"Heuristic {self.name} doesn't compile geometry plans.")
+
+    def infer(self, store, plan):
+        """Infers the measurements of all virtual sensors at the current step, storing them in 'store.inferences'.
+
+        Parameters
+        ==========
+        store : SensorStore
+            Sensor store that holds the current measurements and receives the inferences
+
+        plan : GeometryPlan
+            Geometry plan compiled by the heuristic (None for heuristics that aren't batchable)
+        """
+
+        plan.apply(store=store)
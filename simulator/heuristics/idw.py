@@ -3,6 +3,9 @@ import numpy as np
 
 # General-purpose Simulator Modules
 from simulator.simulation_environment import SimulationEnvironment
+from simulator.components.sensor import Sensor
+from simulator.heuristics.heuristic import Heuristic
+from simulator.components.geometry_plan import GeometryPlan
 
 
 def distance_matrix(x0, y0, x1, y1):
@@ -37,48 +40,52 @@ def distance_matrix(x0, y0, x1, y1):
     return dist_matrix
 
 
-def idw():
-    """The Inverse Distance Weighting (IDW) [1] calculates the value of unknown points using a weighted
-    mean of the values available at the known points. The weight of known points is given by the inverse
-    of their distance from the unknown point (the smallest the distance the higher the weight).
+def create_plan(virtual_sensors):
+    """Creates the geometry plan of the virtual sensors by finding the k nearest neighbors of all of them at once.
 
-    [1] Shepard, D. (1968, January). A two-dimensional interpolation function for
-    irregularly- spaced data. In Proceedings of the 1968 23rd ACM national conference (pp. 517-524).
+    Parameters
+    ==========
+    virtual_sensors : list
+        Virtual sensors whose measurements will be inferred
+
+    Returns
+    =======
+    plan : GeometryPlan
+        Geometry plan of the virtual sensors
     """
 
-    # Parameter that define the number of neighbor sensors that will be used to estimate the virtual sensor value
-    NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY = SimulationEnvironment.first().neighbors
+    environment = SimulationEnvironment.first()
 
-    # Adding the number of neighbors (given by the 'k' parameter) to the heuristic's name to ease post-simulation analysis
-    SimulationEnvironment.first().heuristic = (
-        f"Inverse Distance Weighting (k={NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY})"
+    # Finding extra neighbors that replace the nearest ones when they miss measurements
+    neighbors, distances = Sensor.find_nearest_neighbors(
+        sensors=virtual_sensors, k=environment.neighbors + environment.fallback_plans
     )
 
-    # Gathering the list of virtual sensors whose measurements need to be inferred
-    virtual_sensors = SimulationEnvironment.first().virtual_sensors
-
-    for virtual_sensor in virtual_sensors:
+    # Defining weights (which are normalized to sum to one at each step, as the sensors used may change)
+    weights = 1.0 / distances
 
-        # Finding the k nearest neighbors of the virtual sensor
-        neighbor_sensors = virtual_sensor.find_neighbors_sorted_by_distance()[
-            0:NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY
-        ]
+    # Each virtual sensor uses its k nearest neighbors that have measurements
+    quotas = np.full((len(virtual_sensors), 1), min(environment.neighbors, neighbors.shape[1]))
 
-        sensors_latitude = np.array([sensor.coordinates[0] for sensor in neighbor_sensors])
-        sensors_longitude = np.array([sensor.coordinates[1] for sensor in neighbor_sensors])
-        sensors_measurement = np.array([sensor.measurement for sensor in neighbor_sensors])
+    return GeometryPlan(
+        virtual_ids=[sensor.id for sensor in virtual_sensors], sensors=neighbors, weights=weights, quotas=quotas
+    )
 
-        dist = distance_matrix(
-            sensors_latitude, sensors_longitude, virtual_sensor.coordinates[0], virtual_sensor.coordinates[1]
-        )
 
-        # Defining weights
-        weights = 1.0 / dist
+@Heuristic.register
+class InverseDistanceWeighting(Heuristic):
+    """The Inverse Distance Weighting (IDW) [1] calculates the value of unknown points using a weighted
+    mean of the values available at the known points. The weight of known points is given by the inverse
+    of their distance from the unknown point (the smallest the distance the higher the weight).
 
-        # Make weights sum to one
-        weights /= weights.sum(axis=0)
+    [1] Shepard, D. (1968, January). A two-dimensional interpolation function for
+    irregularly- spaced data. In Proceedings of the 1968 23rd ACM national conference (pp. 517-524).
+    """
 
-        # Multiply the weights for each interpolated point by all observed Z-values
-        zi = np.dot(weights.T, sensors_measurement)
+    name = "idw"
+    label = "Inverse Distance Weighting"
+    needs_k = True
 
-        virtual_sensor.inferred_measurement = zi[0]
+    def compile(self, store, virtual_sensors):
+        # The weights of the k nearest neighbors of all virtual sensors are calculated once and applied in every step
+        return create_plan(virtual_sensors=virtual_sensors)
@@ -1,8 +1,47 @@
+# Python Libraries
+import numpy as np
+
 # General-purpose Simulator Modules
 from simulator.simulation_environment import SimulationEnvironment
+from simulator.components.sensor import Sensor
+from simulator.heuristics.heuristic import Heuristic
+from simulator.components.geometry_plan import GeometryPlan
+
+
+def create_plan(virtual_sensors):
+    """Creates the geometry plan of the virtual sensors by finding the k nearest neighbors of all of them at once.
+
+    Parameters
+    ==========
+    virtual_sensors : list
+        Virtual sensors whose measurements will be inferred
+
+    Returns
+    =======
+    plan : GeometryPlan
+        Geometry plan of the virtual sensors
+    """
+
+    environment = SimulationEnvironment.first()
 
+    # Finding extra neighbors that replace the nearest ones when they miss measurements
+    neighbors, _ = Sensor.find_nearest_neighbors(
+        sensors=virtual_sensors, k=environment.neighbors + environment.fallback_plans
+    )
 
-def knn():
+    # Each neighbor contributes equally to the arithmetic mean
+    weights = np.ones(neighbors.shape)
+
+    # Each virtual sensor uses its k nearest neighbors that have measurements
+    quotas = np.full((len(virtual_sensors), 1), min(environment.neighbors, neighbors.shape[1]))
+
+    return GeometryPlan(
+        virtual_ids=[sensor.id for sensor in virtual_sensors], sensors=neighbors, weights=weights, quotas=quotas
+    )
+
+
+@Heuristic.register
+class KNearestNeighbors(Heuristic):
     """Adapted version of the k-Nearest Neighbors (kNN) algorithm that calculates the
     value of a unknown points based on the arithmetic mean of the k nearest spatial neighbors.
     This algorithm is widely used to imputate missing data points [1, 2].
@@ -14,21 +53,10 @@ def knn():
     R. B. (2001). Missing value estimation methods for DNA microarrays. Bioinformatics, 17(6), 520-525.
     """
 
-    # Parameter that define the number of neighbor sensors that will be used to estimate the virtual sensor value
-    NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY = SimulationEnvironment.first().neighbors
-
-    # Adding the number of neighbors (given by the 'k' parameter) to the heuristic's name to ease post-simulation analysis
-    SimulationEnvironment.first().heuristic = f"k-Nearest Neighbors (k={NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY})"
-
-    # Gathering the list of virtual sensors whose measurements need to be inferred
-    virtual_sensors = SimulationEnvironment.first().virtual_sensors
-
-    # Inferring the values of the virtual sensors using the kNN algorithm
-    for virtual_sensor in virtual_sensors:
-        neighbor_sensors = virtual_sensor.find_neighbors_sorted_by_distance()[
-            0:NEIGHBORS_TO_ESTIMATE_MEASUREMENT_DIRECTLY
-        ]
-        neighbors_measurements = [neighbor.measurement for neighbor in neighbor_sensors]
+    name = "knn"
+    label = "k-Nearest Neighbors"
+    needs_k = True
 
-        # Calculating the sensor value through the arithmetic mean of its k nearest spatial neighbors
-        virtual_sensor.inferred_measurement = sum(neighbors_measurements) / len(neighbor_sensors)
+    def compile(self, store, virtual_sensors):
+        # The neighbors of all virtual sensors are found at once and the same weights are applied in every step
+        return create_plan(virtual_sensors=virtual_sensors)
@@ -0,0 +1,252 @@
+# Python Libraries
+import hashlib
+import warnings
+import numpy as np
+from scipy.optimize import curve_fit
+from scipy.spatial.distance import pdist
+from collections import OrderedDict
+
+# General-purpose Simulator Modules
+from simulator.simulation_environment import SimulationEnvironment
+from simulator.components.sensor import Sensor
+from simulator.components.sensor_store import SensorStore
+from simulator.components.geometry_plan import GeometryPlan
+from simulator.heuristics.heuristic import Heuristic
+
+# Number of neighbors used to infer measurements when the number of neighbors is not informed (i.e., k = 0)
+DEFAULT_NEIGHBORS = 8
+
+# Maximum number of physical sensors used to calculate the empirical variogram (pairs grow quadratically)
+VARIOGRAM_SAMPLE_SIZE = 2000
+
+# Number of distance classes (lags) of the empirical variogram
+VARIOGRAM_LAGS = 15
+
+# Variograms fitted in the current process indexed by dataset, metric, time window, and sensors used to fit them,
+# sorted from the least to the most recently used one, and the maximum number of variograms kept (long-running
+# processes, such as the simulator daemon, fit variograms for many datasets and topologies)
+variograms = OrderedDict()
+VARIOGRAM_CACHE_SIZE = 64
+
+
+def exponential_variogram(distances, nugget, sill, effective_range):
+    """Exponential variogram model.
+
+    Parameters
+    ==========
+    distances : numpy.ndarray
+        Distances between points
+
+    nugget : float
+        Semivariance at infinitesimal distances
+
+    sill : float
+        Semivariance at which the model levels off
+
+    effective_range : float
+        Distance at which the model reaches 95% of the sill
+
+    Returns
+    =======
+    semivariances : numpy.ndarray
+        Semivariance at each distance
+    """
+
+    semivariances = nugget + (sill - nugget) * (1 - np.exp(-3 * distances / effective_range))
+
+    # The semivariance of a point with itself is zero
+    return np.where(distances > 0, semivariances, 0)
+
+
+def fit_variogram(coordinates, measurements):
+    """Fits an exponential variogram to the measurements of a group of sensors.
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        (sensors x 2) coordinates of the sensors
+
+    measurements : numpy.ndarray
+        (sensors x steps) measurements of the sensors in the time window (NaN when missing)
+
+    Returns
+    =======
+    parameters : tuple
+        Nugget, sill and effective range of the fitted variogram
+    """
+
+    if len(coordinates) > VARIOGRAM_SAMPLE_SIZE:
+        sample = np.random.default_rng(1).choice(len(coordinates), size=VARIOGRAM_SAMPLE_SIZE, replace=False)
+        coordinates, measurements = coordinates[np.sort(sample)], measurements[np.sort(sample)]
+
+    distances = pdist(coordinates)
+
+    # Semivariance of each pair of sensors, averaged over the steps in which both sensors have measurements.
+    # Pairs are processed in blocks to bound the memory used by (pairs x steps) differences.
+    rows, columns = np.triu_indices(len(coordinates), k=1)
+    semivariances = np.empty(len(rows))
+    block_size = max(1, 2**22 // max(measurements.shape[1], 1))
+    with warnings.catch_warnings():
+        # Pairs without simultaneous measurements have undefined semivariances (NaN), which are discarded below
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for start in range(0, len(rows), block_size):
+            block = slice(start, start + block_size)
+            differences = measurements[rows[block]] - measurements[columns[block]]
+            semivariances[block] = np.nanmean(0.5 * differences**2, axis=1)
+
+    valid = ~np.isnan(semivariances)
+    distances, semivariances = distances[valid], semivariances[valid]
+
+    if len(distances) == 0:
+        raise Exception("Not enough measurements to fit the variogram.")
+
+    # Empirical variogram (mean semivariance per lag) up to half of the largest distance between sensors
+    edges = np.linspace(0, distances.max() / 2, VARIOGRAM_LAGS + 1)
+    lags = np.digitize(distances, edges[1:-1])
+    used = distances <= edges[-1]
+    counts = np.bincount(lags[used], minlength=VARIOGRAM_LAGS)
+    sums = np.bincount(lags[used], weights=semivariances[used], minlength=VARIOGRAM_LAGS)
+    filled = counts > 0
+
+    lag_distances = ((edges[:-1] + edges[1:]) / 2)[filled]
+    lag_semivariances = sums[filled] / counts[filled]
+
+    # Initial guess: no nugget, sill equal to the largest semivariance and range equal to half of the largest lag
+    initial = [0, max(lag_semivariances.max(), 1e-12), max(edges[-1] / 2, 1e-12)]
+    try:
+        parameters, _ = curve_fit(
+            exponential_variogram,
+            lag_distances,
+            lag_semivariances,
+            p0=initial,
+            bounds=([0, 0, 1e-12], [np.inf, np.inf, np.inf]),
+            maxfev=10000,
+        )
+    except (RuntimeError, ValueError):
+        parameters = initial
+
+    return tuple(float(parameter) for parameter in parameters)
+
+
+def create_plan(virtual_sensors):
+    """Creates the geometry plan of the virtual sensors by solving the ordinary kriging system of their neighborhoods.
+
+    Parameters
+    ==========
+    virtual_sensors : list
+        Virtual sensors whose measurements will be inferred
+
+    Returns
+    =======
+    plan : GeometryPlan
+        Geometry plan of the virtual sensors
+    """
+
+    environment = SimulationEnvironment.first()
+    store = SensorStore.first()
+
+    # Fitting the variogram once per metric and time window with the measurements of the physical sensors (during
+    # chunked replays, only the measurements of the chunk of time steps in memory are used). Tiled topologies fit
+    # one variogram per tile. Distances depend on whether coordinates are projected, and the variogram depends on
+    # which sensors are physical (e.g., sensors drawn as virtual sensors or disabled aren't used), so both are part
+    # of the key. Physical sensors without series (e.g., sensors added without measurements) aren't used
+    rows = store.rows("physical")
+    rows = rows[store.series[rows] >= 0]
+    coordinates = store.coordinates[rows]
+    measurements = store.measurements[0, store.series[rows], : environment.steps]
+
+    # The key also holds a digest of the coordinates and measurements used to fit the variogram, so that datasets
+    # refreshed under the same name (e.g., by incremental ingests) get new variograms
+    digest = hashlib.sha256(np.ascontiguousarray(coordinates).tobytes())
+    digest.update(np.ascontiguousarray(measurements).tobytes())
+    key = (
+        environment.dataset,
+        environment.metric,
+        environment.steps,
+        environment.tile,
+        store.projection,
+        np.sort(store.ids[rows]).tobytes(),
+        np.sort(store.ids[store.rows("virtual")]).tobytes(),
+        digest.hexdigest(),
+    )
+    if key not in variograms:
+        variograms[key] = fit_variogram(coordinates=coordinates, measurements=measurements)
+
+    variograms.move_to_end(key)
+    while len(variograms) > VARIOGRAM_CACHE_SIZE:
+        variograms.popitem(last=False)
+    nugget, sill, effective_range = variograms[key]
+
+    # Finding one extra neighbor, which replaces each of the k nearest neighbors in the alternative
+    # neighborhoods used when sensors miss measurements (starting with the farthest neighbor)
+    k = environment.neighbors or DEFAULT_NEIGHBORS
+    candidates, candidate_distances = Sensor.find_nearest_neighbors(
+        sensors=virtual_sensors, k=k + 1 if environment.fallback_plans > 0 else k
+    )
+    k = min(k, candidates.shape[1])
+    neighborhoods = [list(range(k))] + [
+        [i for i in range(k + 1) if i != k - j] for j in range(1, min(environment.fallback_plans, k) + 1)
+    ]
+    neighborhoods = np.array(neighborhoods[: 1 + candidates.shape[1] - k])
+
+    # (virtual sensors x neighborhoods x k) neighbors, their distances to the virtual sensors, and their coordinates
+    neighbors = candidates[:, neighborhoods]
+    distances = candidate_distances[:, neighborhoods]
+    coordinates = store.coordinates[store.rows_of(neighbors)]
+
+    # Ordinary kriging system of each neighborhood: semivariances between neighbors, bordered by the
+    # Lagrange multiplier row/column that forces weights to sum to one
+    systems = np.zeros(neighbors.shape[:2] + (k + 1, k + 1))
+    pairwise_distances = np.linalg.norm(coordinates[..., :, None, :] - coordinates[..., None, :, :], axis=-1)
+    systems[..., :k, :k] = exponential_variogram(pairwise_distances, nugget, sill, effective_range)
+    systems[..., :k, k] = 1
+    systems[..., k, :k] = 1
+
+    targets = np.ones(neighbors.shape[:2] + (k + 1,))
+    targets[..., :k] = exponential_variogram(distances, nugget, sill, effective_range)
+
+    # Each system is LU-factorized and solved once. Weights don't depend on measurements, so
+    # the same solution is applied to the measurements of every step.
+    try:
+        solutions = np.linalg.solve(systems, targets[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Neighborhoods with duplicated coordinates have singular systems, which are solved by least squares
+        solutions = np.array(
+            [
+                np.linalg.lstsq(system, target, rcond=None)[0]
+                for system, target in zip(systems.reshape(-1, k + 1, k + 1), targets.reshape(-1, k + 1))
+            ]
+        ).reshape(targets.shape)
+
+    return GeometryPlan(
+        virtual_ids=[sensor.id for sensor in virtual_sensors], sensors=neighbors, weights=solutions[..., :k]
+    )
+
+
+@Heuristic.register
+class OrdinaryKriging(Heuristic):
+    """Ordinary kriging [1] calculates the value of unknown points using a weighted mean of the values available at
+    the known points. Weights are the best linear unbiased estimator given a variogram, which models how the
+    dissimilarity between measurements grows with distance and is fitted to the measurements of the physical sensors.
+
+    [1] Cressie, N. (1990). The origins of kriging. Mathematical geology, 22(3), 239-252.
+    """
+
+    name = "kriging"
+    label = "Ordinary Kriging"
+    needs_k = True
+    default_neighbors = DEFAULT_NEIGHBORS
+
+    # Weights depend on the variogram of the metric, so they can't be shared by several metrics
+    multi_metric = False
+
+    def describe(self, environment):
+        # Adding the number of neighbors actually used (which has a default value) to ease post-simulation analysis
+        return f"{self.label} (k={environment.neighbors or DEFAULT_NEIGHBORS})"
+
+    def plan_options(self, environment):
+        # The variogram depends on the measurements, so the metric and time window are part of the plan cache key
+        return {"dataset": environment.dataset, "metric": environment.metric, "steps": environment.steps}
+
+    def compile(self, store, virtual_sensors):
+        return create_plan(virtual_sensors=virtual_sensors)
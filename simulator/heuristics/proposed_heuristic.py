@@ -1,44 +1,172 @@
 # Python Libraries
+import time
+import heapq
+from functools import partial
 from itertools import combinations
+from scipy.special import comb
 
 # General-purpose Simulator Modules
 from simulator.simulation_environment import SimulationEnvironment
+from simulator.heuristics.heuristic import Heuristic
+from simulator.components.geometry_plan import GeometryPlan
+from simulator.misc.profiler import Profiler
 
 # Helper Methods
 from simulator.misc.helper_methods import triangle_weight
 from simulator.misc.helper_methods import is_well_conditioned_triangle
 
 
-def proposed_heuristic():
+def find_sensors(virtual_sensor, neighbors=0, max_triangles=None, time_budget=None):
+    """Finds the physical sensors (and their weights) used by the proposed heuristic to infer the value of a virtual
+    sensor. Besides the chosen sensors, the next best triangles are kept as alternatives for steps in which the chosen
+    sensors miss measurements. By default, all physical sensors are considered and all triangles are evaluated.
+
+    Parameters
+    ==========
+    virtual_sensor : Sensor
+        Virtual sensor whose measurement will be inferred
+
+    neighbors : int (optional)
+        Number of nearest physical sensors considered (all physical sensors when 0)
+
+    max_triangles : int (optional)
+        Number of valid triangles after which the search stops (triangles of the nearest sensors are evaluated first)
+
+    time_budget : float (optional)
+        Time (in seconds) after which the triangle search stops
+
+    Returns
+    =======
+    alternatives : list
+        Ranked list of physical sensors that can be used to infer the measurement and their weights
+    """
+
+    environment = SimulationEnvironment.first()
+    alternatives = []
+
+    neighbor_sensors = virtual_sensor.find_neighbors_sorted_by_distance()
+    if neighbors > 0:
+        neighbor_sensors = neighbor_sensors[:neighbors]
+
+    # Checking if the virtual sensor is crossed by a line between two physical sensors. If so,
+    # infers the sensor measurement with a simple linear interpolation between the two physical sensors
+    aligned_sensors = virtual_sensor.crossed_by_line(neighbor_sensors, tolerance=environment.alignment_tolerance)
+    if aligned_sensors:
+        weights = virtual_sensor.interpolation_weights(physical_sensors=aligned_sensors, aligned=True)
+        alternatives.append((aligned_sensors, weights))
+
+    # Number of triangles kept (the best one and the alternatives that complete the fallback plans)
+    kept_triangles = max(1 + environment.fallback_plans - len(alternatives), 0)
+
+    if max_triangles is None and time_budget is None:
+        triangles = [
+            triangle
+            for triangle in combinations(neighbor_sensors, 3)
+            if virtual_sensor.is_inside_triangle(triangle) and is_well_conditioned_triangle(triangle)
+        ]
+        Profiler.count("triangles_enumerated", comb(len(neighbor_sensors), 3, exact=True))
+        Profiler.count("triangles_accepted", len(triangles))
+
+        # Ranking triangles based on a custom weight function. Only the best triangles are kept, so they are selected
+        # without sorting all triangles (ties keep the enumeration order, just like a stable sort)
+        triangles = heapq.nsmallest(kept_triangles, triangles, key=lambda t: triangle_weight(virtual_sensor, t))
+    else:
+        # Bounded search: triangles are evaluated until enough valid triangles are found or the time budget runs out.
+        # Triangles are enumerated by their farthest sensor (all triangles of the 3 nearest sensors, then those that
+        # include the 4th nearest sensor, and so on), so the nearest triangles are evaluated first. Valid triangles
+        # are weighted as they are found, so that the time budget also covers their ranking
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        indices = (
+            (first, second, farthest)
+            for farthest in range(2, len(neighbor_sensors))
+            for first, second in combinations(range(farthest), 2)
+        )
+        weighted_triangles = []
+        enumerated = 0
+        for first, second, farthest in indices:
+            enumerated += 1
+            triangle = (neighbor_sensors[first], neighbor_sensors[second], neighbor_sensors[farthest])
+            if virtual_sensor.is_inside_triangle(triangle) and is_well_conditioned_triangle(triangle):
+                # The enumeration order breaks ties between triangles with the same weight
+                weighted_triangles.append((triangle_weight(virtual_sensor, triangle), enumerated, triangle))
+                if max_triangles is not None and len(weighted_triangles) >= max_triangles:
+                    break
+
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        Profiler.count("triangles_enumerated", enumerated)
+        Profiler.count("triangles_accepted", len(weighted_triangles))
+
+        triangles = [triangle for _, _, triangle in heapq.nsmallest(kept_triangles, weighted_triangles)]
+
+    # Estimating the value of the virtual sensor through the auxiliary sensors positioned on the triangle edges
+    for triangle in triangles:
+        weights = virtual_sensor.interpolation_weights(physical_sensors=triangle, use_auxiliary_sensors=True)
+        alternatives.append((triangle, weights))
+
+    return alternatives
+
+
+def create_plan(virtual_sensors, bounded=False):
+    """Creates the geometry plan of the virtual sensors.
+
+    Parameters
+    ==========
+    virtual_sensors : list
+        Virtual sensors whose measurements will be inferred
+
+    bounded : boolean (optional)
+        Whether triangles are searched among the k nearest sensors only, within the triangle and time budgets of
+        the simulation environment
+
+    Returns
+    =======
+    plan : GeometryPlan
+        Geometry plan of the virtual sensors
+    """
+
+    if bounded:
+        environment = SimulationEnvironment.first()
+        return GeometryPlan.create(
+            virtual_sensors=virtual_sensors,
+            find_sensors=partial(
+                find_sensors,
+                neighbors=environment.neighbors,
+                max_triangles=environment.max_triangles,
+                time_budget=environment.triangle_time_budget,
+            ),
+        )
+
+    return GeometryPlan.create(virtual_sensors=virtual_sensors, find_sensors=find_sensors)
+
+
+@Heuristic.register
+class ProposedHeuristic(Heuristic):
     """Proposed heuristic that calculates the value of a virtual sensor."""
 
-    # Changing the heuristic name
-    SimulationEnvironment.first().heuristic = f"Proposal"
+    name = "proposed_heuristic"
+    label = "Proposal"
 
-    virtual_sensors = SimulationEnvironment.first().virtual_sensors
-    for virtual_sensor in virtual_sensors:
+    def compile(self, store, virtual_sensors):
+        # Geometry only depends on the sensors' coordinates, so it is found once and reused in every step
+        return create_plan(virtual_sensors=virtual_sensors)
 
-        neighbor_sensors = virtual_sensor.find_neighbors_sorted_by_distance()
 
-        # Checking if the virtual sensor is crossed by a line between two physical sensors. If so,
-        # infers the sensor measurement with a simple linear interpolation between the two physical sensors
-        aligned_sensors = virtual_sensor.crossed_by_line(neighbor_sensors)
-        if aligned_sensors:
-            inference = virtual_sensor.interpolate_measurement_aligned_sensors(
-                sensor1=aligned_sensors[0], sensor2=aligned_sensors[1]
-            )
-            virtual_sensor.inferred_measurement = inference
+@Heuristic.register
+class BoundedProposal(Heuristic):
+    """Proposed heuristic with a bounded triangle search, whose latency per virtual sensor has an upper bound (e.g.,
+    for constrained edge devices). Triangles are only searched among the k nearest sensors (all sensors when k = 0),
+    and the search stops after a given number of valid triangles or when its time budget runs out.
+    """
 
-        else:
-            triangles = [
-                triangle
-                for triangle in combinations(neighbor_sensors, 3)
-                if virtual_sensor.is_inside_triangle(triangle) and is_well_conditioned_triangle(triangle)
-            ]
+    name = "bounded_proposal"
+    label = "Bounded Proposal"
+    needs_k = True
 
-            # Finding the best triangle based on a custom weight function
-            triangle = sorted(triangles, key=lambda t: triangle_weight(virtual_sensor, t))[0]
+    def plan_options(self, environment):
+        # Budgets change which triangles are found, so they are part of the plan cache key
+        return {"max_triangles": environment.max_triangles, "triangle_time_budget": environment.triangle_time_budget}
 
-            # Estimating the value of the virtual sensor
-            inference = virtual_sensor.calculate_measurement(physical_sensors=triangle, use_auxiliary_sensors=True)
-            virtual_sensor.inferred_measurement = inference
+    def compile(self, store, virtual_sensors):
+        return create_plan(virtual_sensors=virtual_sensors, bounded=True)
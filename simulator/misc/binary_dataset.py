@@ -0,0 +1,127 @@
+# Python Libraries
+import os
+import json
+import numpy as np
+
+# Name of the file that describes the contents of a binary dataset directory
+MANIFEST_FILE = "manifest.json"
+
+# Identifier stored in the manifest so that other directories containing JSON files are not mistaken for datasets
+BINARY_FORMAT = "virtual-sensors-binary"
+
+
+def is_binary_dataset(path):
+    """Checks whether a directory holds a dataset stored in the binary format.
+
+    Parameters
+    ==========
+    path : string
+        Path of the dataset directory
+
+    Returns
+    =======
+    True or False : boolean
+        Indication of whether the directory contains a binary dataset manifest or not
+    """
+
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def write_binary_dataset(path, aliases, codes, coordinates, timestamps, metrics):
+    """Creates the directory structure of a binary dataset. Measurements are not written
+    here: each metric gets an empty memory-mapped array that can be filled in chunks.
+
+    Parameters
+    ==========
+    path : string
+        Path of the dataset directory
+
+    aliases : list
+        Station names
+
+    codes : list
+        Station codes
+
+    coordinates : numpy.ndarray
+        Station coordinates (one (latitude, longitude) row per station)
+
+    timestamps : numpy.ndarray
+        Timestamps (epoch seconds) shared by all stations
+
+    metrics : list
+        Names of the metrics stored in the dataset
+
+    Returns
+    =======
+    columns : dict
+        Memory-mapped (stations x timestamps) arrays indexed by metric name
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    np.save(os.path.join(path, "coordinates.npy"), np.asarray(coordinates, dtype=np.float64))
+    np.save(os.path.join(path, "timestamps.npy"), np.asarray(timestamps, dtype=np.int64))
+
+    # Metric names contain characters that are not welcome in file names, so files are named after the metric index
+    metric_files = {metric: f"metric_{index}.npy" for index, metric in enumerate(metrics)}
+
+    manifest = {
+        "format": BINARY_FORMAT,
+        "version": 1,
+        "stations": len(aliases),
+        "timestamps": len(timestamps),
+        "aliases": list(aliases),
+        "codes": list(codes),
+        "metrics": metric_files,
+    }
+    with open(os.path.join(path, MANIFEST_FILE), mode="w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False)
+
+    columns = {
+        metric: np.lib.format.open_memmap(
+            os.path.join(path, file), mode="w+", dtype=np.float32, shape=(len(aliases), len(timestamps))
+        )
+        for metric, file in metric_files.items()
+    }
+
+    return columns
+
+
+def read_binary_dataset(path, metric, mmap=True):
+    """Reads a dataset stored in the binary format.
+
+    Parameters
+    ==========
+    path : string
+        Path of the dataset directory
+
+    metric : string
+        Metric whose measurements will be read
+
+    mmap : boolean (optional)
+        Whether measurements are memory-mapped instead of loaded into memory
+
+    Returns
+    =======
+    dataset : dict
+        Station aliases, codes, coordinates, shared timestamps and (stations x timestamps) measurements
+    """
+
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest.get("format") != BINARY_FORMAT:
+        raise Exception(f"Invalid binary dataset: {path}")
+
+    if metric not in manifest["metrics"]:
+        raise Exception(f"Metric '{metric}' is not available in {path}.")
+
+    dataset = {
+        "aliases": manifest["aliases"],
+        "codes": manifest["codes"],
+        "coordinates": np.load(os.path.join(path, "coordinates.npy")),
+        "timestamps": np.load(os.path.join(path, "timestamps.npy")),
+        "measurements": np.load(os.path.join(path, manifest["metrics"][metric]), mmap_mode="r" if mmap else None),
+    }
+
+    return dataset
@@ -1,9 +1,13 @@
 # Python Libraries
 import math
 import statistics
+import numpy as np
 from scipy.spatial import distance
 from sklearn.metrics import mean_squared_error
 
+# Mean Earth radius (in kilometers) used to project geographic coordinates
+EARTH_RADIUS = 6371.0088
+
 
 def line(coordinates_a, coordinates_b):
     """Creates a line between two given coordinates.
@@ -55,6 +59,212 @@ def intersection(line1, line2):
         return False
 
 
+def encoded_positions(coordinates):
+    """Encodes a group of coordinates into single numbers (vectorized version of 'Sensor.get_encoded_position').
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        Array whose last dimension holds (latitude, longitude) pairs
+
+    Returns
+    =======
+    positions : numpy.ndarray
+        Encoded coordinates
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+
+    return (coordinates[..., 0] + 90) * 180 + coordinates[..., 1]
+
+
+def interpolate_aligned_measurements(positions1, positions2, measurements1, measurements2, targets):
+    """Linearly interpolates the measurements of a batch of points, each lying on the line formed by two
+    other points (the closed form of building a two-point 'scipy.interpolate.interp1d' for each point).
+
+    Parameters
+    ==========
+    positions1 : numpy.ndarray
+        Encoded positions of the first points that form the lines
+
+    positions2 : numpy.ndarray
+        Encoded positions of the second points that form the lines
+
+    measurements1 : numpy.ndarray
+        Measurements of the first points that form the lines
+
+    measurements2 : numpy.ndarray
+        Measurements of the second points that form the lines
+
+    targets : numpy.ndarray
+        Encoded positions of the points whose measurements will be interpolated
+
+    Returns
+    =======
+    measurements : numpy.ndarray
+        Interpolated measurements
+    """
+
+    arrays = [positions1, positions2, measurements1, measurements2, targets]
+    positions1, positions2, measurements1, measurements2, targets = np.broadcast_arrays(
+        *[np.asarray(array, dtype=np.float64) for array in arrays]
+    )
+
+    # Interpolating from the point with the lowest position, as 'interp1d' does
+    swap = positions2 < positions1
+    x_lo = np.where(swap, positions2, positions1)
+    x_hi = np.where(swap, positions1, positions2)
+    y_lo = np.where(swap, measurements2, measurements1)
+    y_hi = np.where(swap, measurements1, measurements2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (y_hi - y_lo) / (x_hi - x_lo)
+
+    measurements = slope * (targets - x_lo) + y_lo
+
+    return measurements
+
+
+def aligned_interpolation_weights(positions1, positions2, targets):
+    """Calculates the weights that 'interpolate_aligned_measurements' gives to the measurements of each pair
+    of points, so that the interpolated measurement is 'weights1 * measurements1 + weights2 * measurements2'.
+
+    Parameters
+    ==========
+    positions1 : numpy.ndarray
+        Encoded positions of the first points that form the lines
+
+    positions2 : numpy.ndarray
+        Encoded positions of the second points that form the lines
+
+    targets : numpy.ndarray
+        Encoded positions of the points whose measurements will be interpolated
+
+    Returns
+    =======
+    weights1, weights2 : numpy.ndarray
+        Weights of the measurements of the first and second points that form the lines
+    """
+
+    positions1, positions2, targets = np.broadcast_arrays(
+        *[np.asarray(array, dtype=np.float64) for array in [positions1, positions2, targets]]
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights2 = (targets - positions1) / (positions2 - positions1)
+
+    return 1 - weights2, weights2
+
+
+def project_coordinates(coordinates, origin):
+    """Projects geographic coordinates onto a local plane (equirectangular projection centered at 'origin'), where
+    distances are measured in kilometers. Unlike degrees, kilometers measure the same distance in both axes, even
+    though longitude degrees shrink as latitude grows.
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        Array whose last dimension holds (latitude, longitude) pairs
+
+    origin : tuple
+        (latitude, longitude) of the center of the projection
+
+    Returns
+    =======
+    projected_coordinates : numpy.ndarray
+        Array whose last dimension holds (north, east) distances (in kilometers) from the origin
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+
+    north = np.radians(coordinates[..., 0] - origin[0]) * EARTH_RADIUS
+    east = np.radians(coordinates[..., 1] - origin[1]) * EARTH_RADIUS * math.cos(math.radians(origin[0]))
+
+    return np.stack([north, east], axis=-1)
+
+
+def unproject_coordinates(coordinates, origin):
+    """Converts coordinates projected by 'project_coordinates' back to geographic coordinates.
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        Array whose last dimension holds (north, east) distances (in kilometers) from the origin
+
+    origin : tuple
+        (latitude, longitude) of the center of the projection
+
+    Returns
+    =======
+    geographic_coordinates : numpy.ndarray
+        Array whose last dimension holds (latitude, longitude) pairs
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+
+    latitude = origin[0] + np.degrees(coordinates[..., 0] / EARTH_RADIUS)
+    longitude = origin[1] + np.degrees(coordinates[..., 1] / (EARTH_RADIUS * math.cos(math.radians(origin[0]))))
+
+    return np.stack([latitude, longitude], axis=-1)
+
+
+def tile_neighborhoods(coordinates, points, tile_size, halo, nearest=None):
+    """Partitions points into the square tiles of a regular grid and finds the coordinates that lie within each
+    tile or its halo (i.e., the band of width 'halo' around the tile), so that each tile can be solved on its own.
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        (n x 2) coordinates of all sensors
+
+    points : numpy.ndarray
+        (m x 2) coordinates of the points that will be partitioned (e.g., virtual sensors)
+
+    tile_size : float
+        Width of the tiles (in the unit of the coordinates)
+
+    halo : float
+        Width of the band around each tile whose coordinates are part of its neighborhood
+
+    nearest : numpy.ndarray (optional)
+        (m x q) indices of coordinates that are always part of the neighborhood of the tile of each point (e.g., the
+        nearest neighbors of each point, so that tiles in sparse regions still have enough neighbors). -1 is ignored
+
+    Returns
+    =======
+    tiles : list
+        Grid position, indices of the points in the tile, and indices of the coordinates within the tile or its halo
+        (for each tile that has points). Points without coordinates are not part of any tile
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    # The grid starts at the lower left corner of the bounding box of the coordinates
+    origin = np.nanmin(np.vstack([coordinates, points]), axis=0)
+
+    located = ~np.isnan(points).any(axis=1)
+    cells = np.zeros((len(points), 2), dtype=np.int64)
+    cells[located] = np.floor((points[located] - origin) / tile_size)
+
+    tiles = []
+    for cell in np.unique(cells[located], axis=0):
+        lower = origin + cell * tile_size - halo
+        upper = origin + (cell + 1) * tile_size + halo
+
+        # Coordinates with NaN are never inside tiles
+        inside = ((coordinates >= lower) & (coordinates <= upper)).all(axis=1)
+        in_cell = located & (cells == cell).all(axis=1)
+
+        if nearest is not None:
+            indices = nearest[in_cell].ravel()
+            inside[indices[indices >= 0]] = True
+
+        tiles.append((tuple(cell.tolist()), np.flatnonzero(in_cell), np.flatnonzero(inside)))
+
+    return tiles
+
+
 def triangle_area(triangle):
     """Calculates the area of a triangle.
 
@@ -115,6 +325,61 @@ def matrix_determinant(coord1, coord2, coord3):
     return determinant
 
 
+def find_aligned_pair(coordinates, point, tolerance=0, block_size=2**22):
+    """Finds the first pair of points (in 'itertools.combinations' order) that forms a line crossing a given point.
+    Determinants of all pairs are calculated in blocks of rows with NumPy, following the same operations of
+    'matrix_determinant', and the point must lie between the pair of points according to their encoded positions.
+
+    Parameters
+    ==========
+    coordinates : numpy.ndarray
+        (n x 2) array with the coordinates of the points
+
+    point : tuple
+        Coordinates of the point that must be crossed by the line
+
+    tolerance : float (optional)
+        Maximum absolute determinant for which three points are considered aligned
+
+    block_size : int (optional)
+        Maximum number of pairs evaluated at once
+
+    Returns
+    =======
+    Tuple of indices or 'False'
+        Indices of the pair of points that forms a line crossing the given point
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    px, py = point
+
+    positions = encoded_positions(coordinates)
+    point_position = encoded_positions(point)
+
+    n = len(coordinates)
+    rows_per_block = max(1, block_size // max(n, 1))
+
+    for start in range(0, n, rows_per_block):
+        end = min(start + rows_per_block, n)
+        x1, y1, e1 = x[start:end, None], y[start:end, None], positions[start:end, None]
+
+        determinants = (x1 * py + y1 * x + px * y) - (py * x + x1 * y + y1 * px)
+
+        inside_line = ((point_position > e1) & (point_position < positions)) | (
+            (point_position < e1) & (point_position > positions)
+        )
+
+        # Only pairs (i, j) with i < j are valid combinations
+        combinations = np.arange(start, end)[:, None] < np.arange(n)
+
+        aligned = np.argwhere((np.abs(determinants) <= tolerance) & inside_line & combinations)
+        if len(aligned) > 0:
+            return (start + int(aligned[0][0]), int(aligned[0][1]))
+
+    return False
+
+
 def triangle_angles(triangle):
     """Calculates the angles of a given triangle.
 
@@ -181,10 +446,12 @@ def triangle_weight(virtual_sensor, triangle):
         Weight (or cost) of 'triangle' that denotes how suitable it is to estimate the value of 'virtual_sensor'
     """
 
-    auxiliary_sensors = virtual_sensor.create_auxiliary_sensors(physical_sensors=triangle)
+    # Only the positions of the auxiliary sensors are needed, so no auxiliary sensor objects are created
+    auxiliary_coordinates = virtual_sensor.auxiliary_coordinates(physical_sensors=triangle)
 
     distance_from_virtual_sensor = [
-        distance.euclidean(virtual_sensor.coordinates, sensor.coordinates) for sensor in auxiliary_sensors
+        float(np.linalg.norm(np.subtract(virtual_sensor.coordinates, coordinates)))
+        for coordinates in auxiliary_coordinates
     ]
 
     weight = statistics.mean(distance_from_virtual_sensor)
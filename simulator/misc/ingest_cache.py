@@ -0,0 +1,102 @@
+# Python Libraries
+import os
+import hashlib
+import numpy as np
+
+
+class IngestCache:
+    """This class persists the columns parsed from each dataset file along with how much of the file was read (byte
+    offset and number of lines), so that refreshed files (e.g., INMET exports that receive new rows every day) only
+    have their new rows parsed.
+    """
+
+    # Directory where parsed files are stored
+    directory = os.path.join(".cache", "datasets")
+
+    # Version of the cache files (changes whenever the way files are parsed changes, invalidating older entries)
+    VERSION = 1
+
+    @classmethod
+    def path(cls, file):
+        """Returns the cache file of a given dataset file."""
+
+        key = hashlib.sha256(f"{IngestCache.VERSION}|{os.path.abspath(file)}".encode()).hexdigest()
+
+        return os.path.join(IngestCache.directory, f"{key}.npz")
+
+    @classmethod
+    def load(cls, file):
+        """Loads what was parsed from a dataset file in previous ingests. Entries are discarded when the file was
+        rewritten instead of appended to (i.e., it is smaller than what was read or its header changed).
+
+        Parameters
+        ==========
+        file : string
+            Dataset file
+
+        Returns
+        =======
+        arrays : dict or None
+            Parsed columns and ingest state ('offset', 'lines', 'header_size', and 'header_digest') of the file
+            (None if the file was never parsed or was rewritten)
+        """
+
+        if not os.path.isfile(IngestCache.path(file)):
+            return None
+
+        try:
+            with np.load(IngestCache.path(file)) as cache_file:
+                arrays = {name: cache_file[name] for name in cache_file.files}
+        except (OSError, ValueError):
+            # Damaged entries (e.g., written by an interrupted ingest) are simply parsed again
+            return None
+
+        if os.path.getsize(file) < int(arrays["offset"]):
+            return None
+
+        if IngestCache.digest(file, int(arrays["header_size"])) != str(arrays["header_digest"]):
+            return None
+
+        return arrays
+
+    @classmethod
+    def save(cls, file, arrays):
+        """Stores what was parsed from a dataset file.
+
+        Parameters
+        ==========
+        file : string
+            Dataset file
+
+        arrays : dict
+            Parsed columns and ingest state of the file
+        """
+
+        os.makedirs(IngestCache.directory, exist_ok=True)
+
+        # Writing to a temporary file first so that concurrent ingests never read partially written entries
+        temporary_file = f"{IngestCache.path(file)}.{os.getpid()}.tmp"
+        with open(temporary_file, mode="wb") as cache_file:
+            np.savez(cache_file, **arrays)
+        os.replace(temporary_file, IngestCache.path(file))
+
+    @classmethod
+    def digest(cls, file, size):
+        """Returns the hash of the first bytes of a file (used to tell whether its header changed).
+
+        Parameters
+        ==========
+        file : string
+            Dataset file
+
+        size : int
+            Number of bytes hashed
+
+        Returns
+        =======
+        digest : string
+            Hash of the first bytes of the file
+        """
+
+        with open(file, mode="rb") as dataset_file:
+            return hashlib.sha256(dataset_file.read(size)).hexdigest()
@@ -5,6 +5,9 @@ class ObjectCollection:
     passing these lists to each method we want to call.
     """
 
+    # Allows subclasses to define '__slots__' (subclasses that don't define them keep using '__dict__')
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -0,0 +1,211 @@
+# Python Libraries
+import os
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+
+class PlanCache:
+    """This class persists geometry plans on disk, so that repeated simulations over the same stations
+    (e.g., sweeps over metrics or time windows) skip geometry. The cache directory is bounded in size
+    and the least recently used plans are evicted first.
+    """
+
+    enabled = True
+
+    # Directory where plans are stored
+    directory = os.path.join(".cache", "plans")
+
+    # Maximum size (in bytes) of the cache directory
+    max_size = 256 * 2**20
+
+    # Plans also kept in memory by long-running processes (e.g., the simulator daemon), sorted from the least to the
+    # most recently used one, and the maximum number of plans kept in memory (0 disables it)
+    memory = OrderedDict()
+    memory_size = 0
+
+    # Version of the plan files (changes whenever the way plans are created changes, invalidating older plans)
+    VERSION = 4
+
+    @classmethod
+    def configure(cls, directory=None, max_size=None, enabled=True, memory_size=None):
+        """Changes the cache settings.
+
+        Parameters
+        ==========
+        directory : string (optional)
+            Directory where plans are stored
+
+        max_size : int (optional)
+            Maximum size (in bytes) of the cache directory
+
+        enabled : boolean (optional)
+            Whether plans are persisted
+
+        memory_size : int (optional)
+            Maximum number of plans kept in memory
+        """
+
+        if directory is not None:
+            PlanCache.directory = directory
+
+        if max_size is not None:
+            PlanCache.max_size = max_size
+
+        if memory_size is not None:
+            PlanCache.memory_size = memory_size
+
+        PlanCache.enabled = enabled
+
+    @classmethod
+    def key(cls, coordinates, types, virtual_ids, heuristic, neighbors, options={}):
+        """Creates the key of a plan.
+
+        Parameters
+        ==========
+        coordinates : numpy.ndarray
+            Coordinates of all sensors
+
+        types : numpy.ndarray
+            Types of all sensors (e.g., disabled sensors can't be used by the plan)
+
+        virtual_ids : list
+            Identifiers of the virtual sensors
+
+        heuristic : string
+            Heuristic that created the plan
+
+        neighbors : int
+            Number of nearest neighbor sensors that can be used to estimate the value of a virtual sensor
+
+        options : dict (optional)
+            Other heuristic parameters that affect geometry
+
+        Returns
+        =======
+        key : string
+            Hash that identifies the plan
+        """
+
+        digest = hashlib.sha256()
+        digest.update(f"{PlanCache.VERSION}|{heuristic}|{neighbors}|{sorted(options.items())}".encode())
+        digest.update(np.ascontiguousarray(coordinates, dtype=np.float64).tobytes())
+        digest.update(np.asarray(types, dtype=np.int64).tobytes())
+        digest.update(np.asarray(virtual_ids, dtype=np.int64).tobytes())
+
+        return digest.hexdigest()
+
+    @classmethod
+    def path(cls, key):
+        """Returns the file that stores the plan with a given key."""
+
+        return os.path.join(PlanCache.directory, f"{key}.npz")
+
+    @classmethod
+    def load(cls, key):
+        """Loads a plan from the cache.
+
+        Parameters
+        ==========
+        key : string
+            Hash that identifies the plan
+
+        Returns
+        =======
+        arrays : dict or None
+            Arrays that describe the plan (None if the plan is not in the cache)
+        """
+
+        if not PlanCache.enabled:
+            return None
+
+        # Plans can be updated during simulations (e.g., when sensors fail), so copies of the plans in memory are used
+        if key in PlanCache.memory:
+            PlanCache.memory.move_to_end(key)
+            return {name: array.copy() for name, array in PlanCache.memory[key].items()}
+
+        if not os.path.isfile(PlanCache.path(key)):
+            return None
+
+        try:
+            with np.load(PlanCache.path(key)) as plan_file:
+                arrays = {name: plan_file[name] for name in plan_file.files}
+        except (OSError, ValueError):
+            # Damaged plans (e.g., written by an interrupted run) are simply created again
+            return None
+
+        # Refreshing the modification time, which is used to find the least recently used plans
+        os.utime(PlanCache.path(key))
+
+        PlanCache.remember(key=key, arrays=arrays)
+
+        return {name: array.copy() for name, array in arrays.items()} if PlanCache.memory_size > 0 else arrays
+
+    @classmethod
+    def save(cls, key, arrays):
+        """Stores a plan in the cache and evicts the least recently used plans if the cache is full.
+
+        Parameters
+        ==========
+        key : string
+            Hash that identifies the plan
+
+        arrays : dict
+            Arrays that describe the plan
+        """
+
+        if not PlanCache.enabled:
+            return
+
+        os.makedirs(PlanCache.directory, exist_ok=True)
+
+        # Writing to a temporary file first so that concurrent runs never read partially written plans
+        temporary_file = f"{PlanCache.path(key)}.{os.getpid()}.tmp"
+        with open(temporary_file, mode="wb") as plan_file:
+            np.savez(plan_file, **arrays)
+        os.replace(temporary_file, PlanCache.path(key))
+
+        PlanCache.remember(key=key, arrays={name: array.copy() for name, array in arrays.items()})
+        PlanCache.evict()
+
+    @classmethod
+    def remember(cls, key, arrays):
+        """Keeps a plan in memory, forgetting the least recently used plans if there are too many of them.
+
+        Parameters
+        ==========
+        key : string
+            Hash that identifies the plan
+
+        arrays : dict
+            Arrays that describe the plan
+        """
+
+        if PlanCache.memory_size == 0:
+            return
+
+        PlanCache.memory[key] = arrays
+        PlanCache.memory.move_to_end(key)
+        while len(PlanCache.memory) > PlanCache.memory_size:
+            PlanCache.memory.popitem(last=False)
+
+    @classmethod
+    def evict(cls):
+        """Removes the least recently used plans until the cache fits its size bound."""
+
+        plans = []
+        for file in os.listdir(PlanCache.directory):
+            if file.endswith(".npz"):
+                status = os.stat(os.path.join(PlanCache.directory, file))
+                plans.append((status.st_mtime, status.st_size, file))
+
+        size = sum(plan[1] for plan in plans)
+        for _, plan_size, file in sorted(plans):
+            if size <= PlanCache.max_size:
+                break
+
+            try:
+                os.remove(os.path.join(PlanCache.directory, file))
+            except FileNotFoundError:
+                pass
+            size -= plan_size
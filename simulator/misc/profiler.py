@@ -0,0 +1,172 @@
+# Python Libraries
+import sys
+import json
+import time
+from contextlib import contextmanager
+from contextlib import nullcontext
+
+# The peak memory of the process is only measured where the 'resource' module is available (i.e., Unix systems)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Profiler:
+    """This class gathers the time spent in each phase of the simulation and counts
+    events that occur in the hot path of heuristics (e.g., number of triangles evaluated).
+    Nothing is recorded unless the profiler is enabled.
+    """
+
+    enabled = False
+
+    # Accumulated time and number of executions of each phase
+    phases = {}
+
+    # Counters and phase times of each simulation step
+    steps = []
+
+    # Simulation step whose counters are being collected (phases that run outside of steps are not attributed to them)
+    current_step = None
+
+    @classmethod
+    def enable(cls):
+        """Enables the profiler and discards any previously collected data."""
+
+        Profiler.enabled = True
+        Profiler.phases = {}
+        Profiler.steps = []
+        Profiler.current_step = None
+
+    @classmethod
+    def phase(cls, name):
+        """Measures the time spent in a given phase of the simulation.
+
+        Parameters
+        ==========
+        name : string
+            Name of the phase
+
+        Returns
+        =======
+        Context manager that measures the time spent inside its block
+        """
+
+        if not Profiler.enabled:
+            return nullcontext()
+
+        return Profiler._measure(name)
+
+    @classmethod
+    @contextmanager
+    def _measure(cls, name):
+        """Context manager that accumulates the time spent inside its block."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+
+            phase = Profiler.phases.setdefault(name, {"calls": 0, "time": 0.0})
+            phase["calls"] += 1
+            phase["time"] += elapsed
+
+            if Profiler.current_step is not None:
+                step_phases = Profiler.current_step["phases"]
+                step_phases[name] = step_phases.get(name, 0.0) + elapsed
+
+    @classmethod
+    def start_step(cls, step):
+        """Starts collecting counters for a new simulation step.
+
+        Parameters
+        ==========
+        step : int
+            Simulation step
+        """
+
+        if Profiler.enabled:
+            Profiler.current_step = {"step": step, "counters": {}, "phases": {}}
+            Profiler.steps.append(Profiler.current_step)
+
+    @classmethod
+    def end_step(cls):
+        """Stops collecting counters for the current simulation step."""
+
+        Profiler.current_step = None
+
+    @classmethod
+    def count(cls, name, amount=1):
+        """Increments a hot-path counter of the current simulation step.
+
+        Parameters
+        ==========
+        name : string
+            Name of the counter
+
+        amount : int (optional)
+            Increment
+        """
+
+        if Profiler.current_step is not None:
+            counters = Profiler.current_step["counters"]
+            counters[name] = counters.get(name, 0) + amount
+
+    @classmethod
+    def peak_memory(cls):
+        """Returns the peak resident memory of the process.
+
+        Returns
+        =======
+        peak_memory : int or None
+            Peak resident memory in bytes (None if it can't be measured)
+        """
+
+        if resource is None:
+            return None
+
+        # Linux reports the peak resident memory in kilobytes, whereas macOS reports it in bytes
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return peak_memory if sys.platform == "darwin" else peak_memory * 1024
+
+    @classmethod
+    def report(cls):
+        """Summarizes the collected data.
+
+        Returns
+        =======
+        report : dict
+            Time spent in each phase, counter totals, peak memory (in bytes), and counters of each simulation step
+        """
+
+        counters = {}
+        for step in Profiler.steps:
+            for name, amount in step["counters"].items():
+                counters[name] = counters.get(name, 0) + amount
+
+        report = {
+            "phases": {
+                name: {"calls": phase["calls"], "time": phase["time"], "mean_time": phase["time"] / phase["calls"]}
+                for name, phase in Profiler.phases.items()
+            },
+            "counters": counters,
+            "peak_memory": Profiler.peak_memory(),
+            "steps": Profiler.steps,
+        }
+
+        return report
+
+    @classmethod
+    def export(cls, output_file):
+        """Writes the profiling report to a JSON file.
+
+        Parameters
+        ==========
+        output_file : string
+            Name of the output file
+        """
+
+        with open(output_file, mode="w") as report_file:
+            json.dump(Profiler.report(), report_file, indent=4)
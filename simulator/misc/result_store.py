@@ -0,0 +1,198 @@
+# Python Libraries
+import os
+import uuid
+import sqlite3
+import pandas as pd
+
+# PyArrow is an optional dependency (results are stored in SQLite when it is not installed)
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Tables of the result store: summaries of each run and inferences of each virtual sensor in each step
+TABLES = {
+    "runs": [
+        "run_id",
+        "dataset",
+        "metric",
+        "heuristic",
+        "algorithm",
+        "k",
+        "steps",
+        "virtual_sensors",
+        "rmse",
+        "mae",
+    ],
+    "inferences": ["run_id", "metric", "step", "timestamp", "sensor", "real_measurement", "inference"],
+}
+
+# File extensions of each format
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "sqlite": ".sqlite"}
+
+
+class ResultStore:
+    """Append-only store of simulation results. Results are buffered and written in batches, each of them
+    as a new Parquet or Arrow IPC file inside a directory (or as a transaction in a SQLite database), so
+    that results written before a sweep is interrupted are kept and large sweeps never need to be held in memory.
+    """
+
+    # Number of rows buffered before a batch is written
+    BATCH_SIZE = 100000
+
+    def __init__(self, path, formatting=None):
+        """Opens (or creates) a result store.
+
+        Parameters
+        ==========
+        path : string
+            Directory where Parquet or Arrow files are stored or SQLite database file
+
+        formatting : string (optional)
+            Storage format ('parquet', 'arrow', or 'sqlite'). By default, the format is inferred from the path
+            ('.sqlite' and '.db' files are SQLite databases), falling back to SQLite if PyArrow is not installed.
+        """
+
+        if formatting is None:
+            if os.path.splitext(path)[1] in [".sqlite", ".db"] or pa is None:
+                formatting = "sqlite"
+            else:
+                formatting = "parquet"
+
+        if formatting not in EXTENSIONS:
+            raise Exception(f"Invalid result format: {formatting}")
+
+        if formatting != "sqlite" and pa is None:
+            raise Exception(f"PyArrow is required to store results in the '{formatting}' format.")
+
+        self.path = path
+        self.formatting = formatting
+        self.buffers = {table: [] for table in TABLES}
+        self.buffered_rows = 0
+
+        if formatting == "sqlite":
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            self.connection = sqlite3.connect(path)
+            for table, columns in TABLES.items():
+                self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+            self.connection.commit()
+        else:
+            for table in TABLES:
+                os.makedirs(os.path.join(path, table), exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def append(self, runs, inferences):
+        """Appends the results of a run.
+
+        Parameters
+        ==========
+        runs : list
+            Summaries of the run, one for each inferred metric (see 'TABLES' for the expected keys)
+
+        inferences : list
+            Real measurement and inference of each virtual sensor in each step (see 'TABLES' for the expected keys)
+        """
+
+        self.buffers["runs"].extend(runs)
+        self.buffers["inferences"].extend(inferences)
+        self.buffered_rows += len(runs) + len(inferences)
+
+        if self.buffered_rows >= ResultStore.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered results."""
+
+        if self.buffered_rows == 0:
+            return
+
+        frames = {
+            table: pd.DataFrame(rows, columns=TABLES[table]) for table, rows in self.buffers.items() if len(rows) > 0
+        }
+
+        if self.formatting == "sqlite":
+            # Runs and their inferences are committed in the same transaction
+            with self.connection:
+                for table, frame in frames.items():
+                    frame.to_sql(table, self.connection, if_exists="append", index=False)
+        else:
+            # Each batch becomes a new file, which is written under a temporary name first so that readers never
+            # see partially written files. Inferences are written first, so runs are only listed once complete.
+            batch = uuid.uuid4().hex
+            for table in ["inferences", "runs"]:
+                if table not in frames:
+                    continue
+
+                file = os.path.join(self.path, table, f"part-{batch}{EXTENSIONS[self.formatting]}")
+                arrow_table = pa.Table.from_pandas(frames[table], preserve_index=False)
+
+                if self.formatting == "parquet":
+                    pq.write_table(arrow_table, f"{file}.tmp")
+                else:
+                    feather.write_feather(arrow_table, f"{file}.tmp", compression="uncompressed")
+                os.replace(f"{file}.tmp", file)
+
+        self.buffers = {table: [] for table in TABLES}
+        self.buffered_rows = 0
+
+    def close(self):
+        """Writes the buffered results and closes the store."""
+
+        self.flush()
+
+        if self.formatting == "sqlite":
+            self.connection.close()
+
+    def read(self, table, columns=None, run_ids=None):
+        """Reads a table of the store (only the requested columns and runs are loaded).
+
+        Parameters
+        ==========
+        table : string
+            Table name ('runs' or 'inferences')
+
+        columns : list (optional)
+            Columns that will be read (all columns by default)
+
+        run_ids : list (optional)
+            Runs whose results will be read (all runs by default)
+
+        Returns
+        =======
+        results : pandas.DataFrame
+            Results stored in the table
+        """
+
+        columns = columns or TABLES[table]
+
+        if self.formatting == "sqlite":
+            query = f"SELECT {', '.join(columns)} FROM {table}"
+            parameters = []
+            if run_ids is not None:
+                query += f" WHERE run_id IN ({', '.join('?' * len(run_ids))})"
+                parameters = list(run_ids)
+
+            return pd.read_sql_query(query, self.connection, params=parameters)
+
+        files = [
+            os.path.join(self.path, table, file)
+            for file in sorted(os.listdir(os.path.join(self.path, table)))
+            if file.endswith(EXTENSIONS[self.formatting])
+        ]
+        if len(files) == 0:
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(files, format="parquet" if self.formatting == "parquet" else "ipc")
+        filters = ds.field("run_id").isin(list(run_ids)) if run_ids is not None else None
+
+        return dataset.to_table(columns=columns, filter=filters).to_pandas()
@@ -0,0 +1,542 @@
+# Python Libraries
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# Helper Methods
+from simulator.misc.binary_dataset import write_binary_dataset
+
+# Default area where synthetic stations are placed (southern Brazil, roughly the area covered by 'inmet_2020_south')
+SOUTHERN_BRAZIL_BOUNDS = (-33.75, -22.5, -57.6, -48.0)
+
+# Number of decimal places used by INMET to store station coordinates
+COORDINATES_PRECISION = 6
+
+# Number of stations that have their series generated at once (keeps memory usage bounded for huge topologies)
+STATIONS_PER_CHUNK = 256
+
+# Columns of INMET files and the parameters of the synthetic field that generates their values. Each column is
+# given by a base value plus a static spatial component, a diurnal cycle, a slowly moving "weather" component,
+# and Gaussian noise. Columns with a 'source' reuse the field of another column shifted by 'offset', and columns
+# with a 'ceiling' never exceed the values of another column (e.g., the dew point never exceeds the temperature).
+INMET_COLUMNS = [
+    {
+        "name": "PRECIPITAÇÃO TOTAL, HORÁRIO (mm)",
+        "base": -2,
+        "spatial": 1,
+        "diurnal": 0,
+        "weather": 3,
+        "noise": 0.5,
+        "min": 0,
+        "max": None,
+        "decimals": 1,
+    },
+    {
+        "name": "PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)",
+        "base": 960,
+        "spatial": 40,
+        "diurnal": 1.5,
+        "weather": 5,
+        "noise": 0.3,
+        "min": None,
+        "max": None,
+        "decimals": 1,
+    },
+    {"name": "PRESSÃO ATMOSFERICA MAX.NA HORA ANT. (AUT) (mB)", "source": 1, "offset": 0.4, "decimals": 1},
+    {"name": "PRESSÃO ATMOSFERICA MIN. NA HORA ANT. (AUT) (mB)", "source": 1, "offset": -0.4, "decimals": 1},
+    {
+        "name": "RADIACAO GLOBAL (Kj/m²)",
+        "base": 2000,
+        "spatial": 300,
+        "diurnal": 0,
+        "weather": 500,
+        "noise": 60,
+        "min": 0,
+        "max": None,
+        "decimals": 1,
+    },
+    {
+        "name": "TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)",
+        "base": 20,
+        "spatial": 4,
+        "diurnal": 5,
+        "weather": 3,
+        "noise": 0.4,
+        "min": None,
+        "max": None,
+        "decimals": 1,
+    },
+    {
+        "name": "TEMPERATURA DO PONTO DE ORVALHO (°C)",
+        "ceiling": 5,
+        "base": 15,
+        "spatial": 3,
+        "diurnal": 1.5,
+        "weather": 3,
+        "noise": 0.4,
+        "min": None,
+        "max": None,
+        "decimals": 1,
+    },
+    {"name": "TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)", "source": 5, "offset": 0.5, "decimals": 1},
+    {"name": "TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)", "source": 5, "offset": -0.5, "decimals": 1},
+    {"name": "TEMPERATURA ORVALHO MAX. NA HORA ANT. (AUT) (°C)", "source": 6, "offset": 0.4, "decimals": 1},
+    {"name": "TEMPERATURA ORVALHO MIN. NA HORA ANT. (AUT) (°C)", "source": 6, "offset": -0.4, "decimals": 1},
+    {
+        "name": "UMIDADE REL. MAX. NA HORA ANT. (AUT) (%)",
+        "source": 13,
+        "offset": 3,
+        "min": 5,
+        "max": 100,
+        "decimals": 0,
+    },
+    {
+        "name": "UMIDADE REL. MIN. NA HORA ANT. (AUT) (%)",
+        "source": 13,
+        "offset": -3,
+        "min": 5,
+        "max": 100,
+        "decimals": 0,
+    },
+    {
+        "name": "UMIDADE RELATIVA DO AR, HORARIA (%)",
+        "base": 75,
+        "spatial": 8,
+        "diurnal": -15,
+        "weather": 10,
+        "noise": 2,
+        "min": 5,
+        "max": 100,
+        "decimals": 0,
+    },
+    {
+        "name": "VENTO, DIREÇÃO HORARIA (gr) (° (gr))",
+        "base": 180,
+        "spatial": 60,
+        "diurnal": 20,
+        "weather": 80,
+        "noise": 15,
+        "min": 0,
+        "max": 360,
+        "decimals": 0,
+    },
+    {
+        "name": "VENTO, RAJADA MAXIMA (m/s)",
+        "base": 5,
+        "spatial": 1.5,
+        "diurnal": 1.5,
+        "weather": 2,
+        "noise": 0.5,
+        "min": 0,
+        "max": None,
+        "decimals": 1,
+    },
+    {
+        "name": "VENTO, VELOCIDADE HORARIA (m/s)",
+        "base": 2,
+        "spatial": 0.8,
+        "diurnal": 0.8,
+        "weather": 1,
+        "noise": 0.3,
+        "min": 0,
+        "max": None,
+        "decimals": 1,
+    },
+]
+
+
+def generate_coordinates(stations, layout, bounds, rng, clusters=None, plot_size=None):
+    """Draws the coordinates of synthetic stations according to a given spatial layout.
+
+    Parameters
+    ==========
+    stations : int
+        Number of stations
+
+    layout : string
+        Spatial layout ('uniform', 'clustered', or 'grid')
+
+    bounds : tuple
+        Area covered by the stations (minimum latitude, maximum latitude, minimum longitude, maximum longitude)
+
+    rng : numpy.random.Generator
+        Random number generator
+
+    clusters : int (optional)
+        Number of clusters (layout 'clustered') or farm plots (layout 'grid')
+
+    plot_size : int (optional)
+        Number of stations on each side of a farm plot (layout 'grid')
+
+    Returns
+    =======
+    coordinates : numpy.ndarray
+        Unique station coordinates (one (latitude, longitude) row per station)
+    """
+
+    lat_min, lat_max, lon_min, lon_max = bounds
+
+    if layout == "grid":
+        # Stations are arranged as regular grids (farm plots) whose origins are placed on a coarse lattice
+        plot_size = plot_size or 5
+        plots = clusters or math.ceil(stations / plot_size**2)
+        lattice_side = math.ceil(math.sqrt(plots * 4))
+        cell_lat = (lat_max - lat_min) / lattice_side
+        cell_lon = (lon_max - lon_min) / lattice_side
+        spacing = min(cell_lat, cell_lon) / (2 * plot_size)
+
+        cells = rng.choice(lattice_side**2, size=plots, replace=False)
+        offsets = np.array([(i, j) for i in range(plot_size) for j in range(plot_size)]) * spacing
+
+        coordinates = []
+        for cell in cells:
+            origin = (lat_min + (cell // lattice_side) * cell_lat, lon_min + (cell % lattice_side) * cell_lon)
+            coordinates.extend(offsets + origin)
+        coordinates = np.array(coordinates)[rng.permutation(len(coordinates))[:stations]]
+
+        if len(coordinates) < stations:
+            raise Exception(f"{plots} plots with {plot_size ** 2} stations each cannot hold {stations} stations.")
+
+        return np.round(coordinates, COORDINATES_PRECISION)
+
+    if layout == "clustered":
+        centers = np.column_stack(
+            (rng.uniform(lat_min, lat_max, size=clusters or 10), rng.uniform(lon_min, lon_max, size=clusters or 10))
+        )
+        spread = 0.05 * min(lat_max - lat_min, lon_max - lon_min)
+
+    coordinates = np.empty((0, 2))
+
+    # Drawing coordinates until there are enough unique positions (rounding may create duplicates)
+    while len(coordinates) < stations:
+        missing = stations - len(coordinates)
+
+        if layout == "uniform":
+            drawn = np.column_stack(
+                (rng.uniform(lat_min, lat_max, size=missing), rng.uniform(lon_min, lon_max, size=missing))
+            )
+
+        elif layout == "clustered":
+            drawn = centers[rng.integers(0, len(centers), size=missing)] + rng.normal(0, spread, size=(missing, 2))
+            drawn[:, 0] = np.clip(drawn[:, 0], lat_min, lat_max)
+            drawn[:, 1] = np.clip(drawn[:, 1], lon_min, lon_max)
+
+        else:
+            raise Exception(f"Invalid layout: {layout}")
+
+        coordinates = np.unique(np.vstack((coordinates, np.round(drawn, COORDINATES_PRECISION))), axis=0)
+
+    return coordinates[rng.permutation(len(coordinates))[:stations]]
+
+
+def create_field(bounds, rng, waves=4):
+    """Creates the random parameters of a smooth spatio-temporal field.
+
+    Parameters
+    ==========
+    bounds : tuple
+        Area covered by the stations
+
+    rng : numpy.random.Generator
+        Random number generator
+
+    waves : int (optional)
+        Number of plane waves that compose the spatial and weather components of the field
+
+    Returns
+    =======
+    field : dict
+        Parameters of the field
+    """
+
+    lat_min, lat_max, lon_min, lon_max = bounds
+    extent = max(lat_max - lat_min, lon_max - lon_min)
+
+    # Wave lengths range from half to twice the size of the area, so the field is smooth between stations
+    def wave_vectors():
+        angles = rng.uniform(0, 2 * math.pi, size=waves)
+        lengths = rng.uniform(0.5 * extent, 2 * extent, size=waves)
+        return np.column_stack((np.cos(angles), np.sin(angles))) * (2 * math.pi / lengths)[:, None]
+
+    field = {
+        "spatial_vectors": wave_vectors(),
+        "spatial_phases": rng.uniform(0, 2 * math.pi, size=waves),
+        "weather_vectors": wave_vectors(),
+        "weather_phases": rng.uniform(0, 2 * math.pi, size=waves),
+        # Weather systems take a few days to cross the area
+        "weather_frequencies": rng.uniform(2 * math.pi / (24 * 10), 2 * math.pi / (24 * 2), size=waves),
+    }
+
+    return field
+
+
+def evaluate_field(field, column, coordinates, hours, rng):
+    """Calculates the values of a column for a group of stations.
+
+    Parameters
+    ==========
+    field : dict
+        Parameters of the field
+
+    column : dict
+        Parameters of the column (see 'INMET_COLUMNS')
+
+    coordinates : numpy.ndarray
+        Station coordinates
+
+    hours : numpy.ndarray
+        Hours elapsed since the beginning of the series
+
+    rng : numpy.random.Generator
+        Random number generator
+
+    Returns
+    =======
+    values : numpy.ndarray
+        (stations x hours) array of values
+    """
+
+    waves = len(field["spatial_phases"])
+
+    spatial = np.cos(coordinates @ field["spatial_vectors"].T + field["spatial_phases"]).sum(axis=1) / math.sqrt(waves)
+
+    weather = np.zeros((len(coordinates), len(hours)))
+    for i in range(waves):
+        weather += np.cos(
+            (coordinates @ field["weather_vectors"][i])[:, None]
+            - field["weather_frequencies"][i] * hours[None, :]
+            + field["weather_phases"][i]
+        )
+    weather /= math.sqrt(waves)
+
+    # Diurnal cycle based on the local solar time of each station (peak at 15:00)
+    local_hours = (hours[None, :] + coordinates[:, 1:2] / 15) % 24
+    diurnal = np.cos(2 * math.pi * (local_hours - 15) / 24)
+
+    values = (
+        column["base"]
+        + column["spatial"] * spatial[:, None]
+        + column["diurnal"] * diurnal
+        + column["weather"] * weather
+        + rng.normal(0, column["noise"], size=weather.shape)
+    )
+
+    if column["name"].startswith("RADIACAO"):
+        # Solar radiation follows the sun elevation (peak at 12:30 and no radiation during the night)
+        values = values * np.clip(np.cos(2 * math.pi * (local_hours - 12.5) / 24), 0, None)
+
+    if column["min"] is not None or column["max"] is not None:
+        values = np.clip(values, column["min"], column["max"])
+
+    return values
+
+
+def generate_series(fields, coordinates, hours, rng, missing_rate=0.0):
+    """Generates the series of all columns for a group of stations.
+
+    Parameters
+    ==========
+    fields : list
+        Field parameters of each column
+
+    coordinates : numpy.ndarray
+        Station coordinates
+
+    hours : numpy.ndarray
+        Hours elapsed since the beginning of the series
+
+    rng : numpy.random.Generator
+        Random number generator
+
+    missing_rate : float (optional)
+        Fraction of values that are removed to mimic readings missed by the stations
+
+    Returns
+    =======
+    series : list
+        (stations x hours) array of values for each column
+    """
+
+    series = [
+        None if "source" in column else evaluate_field(field, column, coordinates, hours, rng)
+        for column, field in zip(INMET_COLUMNS, fields)
+    ]
+
+    # Columns derived from other columns are only calculated once all the fields they depend on are available
+    for i, column in enumerate(INMET_COLUMNS):
+        if "ceiling" in column:
+            series[i] = np.minimum(series[i], series[column["ceiling"]])
+
+    for i, column in enumerate(INMET_COLUMNS):
+        if "source" in column:
+            series[i] = series[column["source"]] + column["offset"]
+            if "min" in column or "max" in column:
+                series[i] = np.clip(series[i], column.get("min"), column.get("max"))
+
+    series = [np.round(values, column["decimals"]) for values, column in zip(series, INMET_COLUMNS)]
+
+    if missing_rate > 0:
+        for values in series:
+            values[rng.random(values.shape) < missing_rate] = np.nan
+
+    return series
+
+
+def write_inmet_file(path, alias, code, coordinates, timestamps, series):
+    """Writes the series of a station following the format adopted by INMET.
+
+    Parameters
+    ==========
+    path : string
+        Output file
+
+    alias : string
+        Station name
+
+    code : string
+        Station code
+
+    coordinates : tuple
+        Station coordinates
+
+    timestamps : pandas.DataFrame
+        Measurement timestamps already formatted as INMET's 'Data' and 'Hora UTC' columns
+
+    series : list
+        Values of each column
+    """
+
+    metadata = [
+        ("REGIAO:", "S"),
+        ("UF:", "XX"),
+        ("ESTACAO:", alias),
+        ("CODIGO (WMO):", code),
+        ("LATITUDE:", f"{coordinates[0]:.{COORDINATES_PRECISION}f}".replace(".", ",")),
+        ("LONGITUDE:", f"{coordinates[1]:.{COORDINATES_PRECISION}f}".replace(".", ",")),
+        ("ALTITUDE:", "0"),
+        ("DATA DE FUNDACAO:", "01/01/00"),
+    ]
+
+    body = timestamps.copy()
+    for values, column in zip(series, INMET_COLUMNS):
+        body[column["name"]] = values
+
+    # INMET files end every line with a separator
+    body[""] = ""
+
+    # Values are already rounded to the number of decimal places of each column and missing values are left empty.
+    # The body has no other dots than decimal separators, so converting them at once is much faster than asking
+    # pandas to format each value with a comma as the decimal separator (header names do have dots)
+    content = body.to_csv(sep=";", index=False, header=False, na_rep="").replace(".", ",")
+
+    with open(path, mode="w", newline="", encoding="ISO-8859-1") as inmet_file:
+        inmet_file.writelines(f"{key};{value}\n" for key, value in metadata)
+        inmet_file.write(";".join(body.columns) + "\n")
+        inmet_file.write(content)
+
+
+def generate_dataset(
+    name,
+    stations,
+    layout="uniform",
+    formatting="INMET-BR",
+    year=2020,
+    bounds=SOUTHERN_BRAZIL_BOUNDS,
+    clusters=None,
+    plot_size=None,
+    missing_rate=0.0,
+    seed=1,
+):
+    """Creates a synthetic dataset inside the 'data' directory so that it can be loaded by 'Simulator.load_dataset'.
+
+    Parameters
+    ==========
+    name : string
+        Name of the dataset directory
+
+    stations : int
+        Number of stations
+
+    layout : string (optional)
+        Spatial layout of the stations ('uniform', 'clustered', or 'grid')
+
+    formatting : string (optional)
+        Output format ('INMET-BR' for one CSV file per station or 'binary' for NumPy arrays)
+
+    year : int (optional)
+        Year covered by the hourly series
+
+    bounds : tuple (optional)
+        Area covered by the stations (minimum latitude, maximum latitude, minimum longitude, maximum longitude)
+
+    clusters : int (optional)
+        Number of clusters (layout 'clustered') or farm plots (layout 'grid')
+
+    plot_size : int (optional)
+        Number of stations on each side of a farm plot (layout 'grid')
+
+    missing_rate : float (optional)
+        Fraction of measurements left empty
+
+    seed : int (optional)
+        Seed of the random number generator
+
+    Returns
+    =======
+    path : string
+        Path of the created dataset
+    """
+
+    rng = np.random.default_rng(seed)
+    path = os.path.join("data", name)
+
+    coordinates = generate_coordinates(stations, layout, bounds, rng, clusters=clusters, plot_size=plot_size)
+    fields = [create_field(bounds, rng) for _ in INMET_COLUMNS]
+
+    timestamps = pd.date_range(f"{year}-01-01 00:00", f"{year}-12-31 23:00", freq="H")
+    hours = np.arange(len(timestamps), dtype=np.float64)
+
+    aliases = [f"SYNTHETIC {i:06d}" for i in range(1, stations + 1)]
+    codes = [f"S{i:06d}" for i in range(1, stations + 1)]
+
+    if formatting == "binary":
+        columns = write_binary_dataset(
+            path=path,
+            aliases=aliases,
+            codes=codes,
+            coordinates=coordinates,
+            timestamps=timestamps.values.astype("datetime64[s]").astype(np.int64),
+            metrics=[column["name"] for column in INMET_COLUMNS],
+        )
+    elif formatting == "INMET-BR":
+        os.makedirs(path, exist_ok=True)
+        formatted_timestamps = pd.DataFrame(
+            {"Data": timestamps.strftime("%Y/%m/%d"), "Hora UTC": timestamps.strftime("%H%M UTC")}
+        )
+    else:
+        raise Exception(f"Invalid dataset format: {formatting}")
+
+    for start in range(0, stations, STATIONS_PER_CHUNK):
+        end = min(start + STATIONS_PER_CHUNK, stations)
+        series = generate_series(fields, coordinates[start:end], hours, rng, missing_rate=missing_rate)
+
+        if formatting == "binary":
+            for values, column in zip(series, INMET_COLUMNS):
+                columns[column["name"]][start:end] = values
+        else:
+            for i in range(start, end):
+                write_inmet_file(
+                    path=os.path.join(path, f"INMET_S_XX_{codes[i]}_{aliases[i]}_01-01-{year}_A_31-12-{year}.CSV"),
+                    alias=aliases[i],
+                    code=codes[i],
+                    coordinates=coordinates[i],
+                    timestamps=formatted_timestamps,
+                    series=[values[i - start] for values in series],
+                )
+
+    if formatting == "binary":
+        for values in columns.values():
+            values.flush()
+
+    return path
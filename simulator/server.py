@@ -0,0 +1,335 @@
+# Python Libraries
+import os
+import json
+import time
+import random
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
+
+# General-purpose Simulator Modules
+import simulator.simulator
+from simulator.simulator import Simulator
+from simulator.misc.plan_cache import PlanCache
+
+# Parameters that must be informed in run requests
+REQUIRED_PARAMETERS = ["dataset", "metric", "algorithm"]
+
+# Directory under which the result stores informed in run requests are created
+RESULTS_DIRECTORY = "results"
+
+# Parameters of run requests and their default values
+RUN_PARAMETERS = {
+    "dataset": None,
+    "metric": None,
+    "algorithm": None,
+    "steps": 12,
+    "sensors": 3,
+    "neighbors": 0,
+    "alignment_tolerance": 0,
+    "fallback_plans": 4,
+    "topology_events": [],
+    "seed": 1,
+    "results": None,
+    "run_id": None,
+    "projected": False,
+    "incremental": False,
+    "max_triangles": None,
+    "triangle_time_budget": None,
+}
+
+
+def resolve_results_path(results, directory):
+    """Resolves the result store informed in a run request under the results directory of the daemon, so that clients
+    can't make workers create or overwrite files elsewhere.
+
+    Parameters
+    ==========
+    results : string
+        Result store informed in the request (relative to the results directory)
+
+    directory : string
+        Results directory of the daemon
+
+    Returns
+    =======
+    path : string or None
+        Path of the result store (None if it is outside the results directory)
+    """
+
+    directory = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(directory, results))
+
+    if os.path.commonpath([directory, path]) != directory:
+        return None
+
+    return path
+
+
+def initialize_worker(plan_cache):
+    """Prepares a worker process to run simulations. Workers keep the datasets and geometry plans of previous
+    simulations in memory, so that simulations over the same datasets skip parsing and geometry.
+
+    Parameters
+    ==========
+    plan_cache : dict
+        Settings of the geometry plan cache (see 'PlanCache.configure')
+    """
+
+    # Results are returned to clients, so nothing is printed (and the topology is not rendered)
+    simulator.simulator.VERBOSITY = 0
+
+    Simulator.dataset_cache = {}
+    PlanCache.configure(**plan_cache)
+
+
+def run_job(job):
+    """Runs a simulation requested to the daemon.
+
+    Parameters
+    ==========
+    job : dict
+        Simulation parameters (see 'RUN_PARAMETERS')
+
+    Returns
+    =======
+    result : dict
+        Simulation parameters and accuracy metrics
+    """
+
+    start = time.perf_counter()
+
+    # Using the same seed adopted by the command line interface, so that both pick the same virtual sensors
+    random.seed(job["seed"])
+    np.random.seed(job["seed"])
+
+    Simulator.load_dataset(
+        target=job["dataset"], metric=job["metric"], projected=job["projected"], incremental=job["incremental"]
+    )
+    Simulator.run(
+        steps=job["steps"],
+        metric=job["metric"],
+        algorithm=job["algorithm"],
+        neighbors=job["neighbors"],
+        sensors=job["sensors"],
+        alignment_tolerance=job["alignment_tolerance"],
+        topology_events=job["topology_events"],
+        fallback_plans=job["fallback_plans"],
+        max_triangles=job["max_triangles"],
+        triangle_time_budget=job["triangle_time_budget"],
+    )
+    Simulator.show_output(output_file=None)
+
+    run_id = job["run_id"]
+    if job["results"]:
+        run_id = Simulator.export_results(
+            path=job["results"], algorithm=job["algorithm"], neighbors=job["neighbors"], run_id=run_id
+        )
+
+    result = {
+        **{parameter: value for parameter, value in job.items() if parameter != "topology_events"},
+        "run_id": run_id,
+        "heuristic": Simulator.environment.heuristic,
+        "virtual_sensors": [sensor.id for sensor in Simulator.environment.virtual_sensors],
+        "rmse": Simulator.summary["rmse"],
+        "mae": Simulator.summary["mae"],
+        "metrics": Simulator.summary["metrics"],
+        "metrics_by_sensor": [
+            {
+                "sensor": metrics["sensor"].id,
+                "metric": metrics["metric"],
+                "rmse": metrics["rmse"],
+                "mae": metrics["mae"],
+            }
+            for metrics in Simulator.calculate_metrics_by_sensor()
+        ],
+        "duration": time.perf_counter() - start,
+    }
+
+    return result
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    """HTTP server that runs simulations requested by clients in a pool of worker processes. Requests wait in
+    a bounded queue, and requests that arrive when the queue is full are rejected instead of piling up.
+    """
+
+    # Each request is handled by a thread that waits for its simulation (and doesn't block the server shutdown)
+    daemon_threads = True
+
+    def __init__(self, address, workers=1, queue_size=16, plan_cache={}, results_directory=RESULTS_DIRECTORY):
+        """Creates the server.
+
+        Parameters
+        ==========
+        address : tuple
+            Host and port of the server
+
+        workers : int (optional)
+            Number of simulations executed in parallel
+
+        queue_size : int (optional)
+            Number of simulations that can wait for a worker
+
+        plan_cache : dict (optional)
+            Settings of the geometry plan cache (see 'PlanCache.configure')
+
+        results_directory : string (optional)
+            Directory under which the result stores informed in run requests are created
+        """
+
+        super().__init__(address, SimulatorRequestHandler)
+
+        self.workers = workers
+        self.results_directory = results_directory
+        self.queue_size = queue_size
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker, initargs=(plan_cache,))
+
+        # Slots of simulations that are running or waiting for a worker
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+        # Number of simulations in each state
+        self.lock = threading.Lock()
+        self.jobs = {"pending": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def count(self, state, value=1):
+        """Updates the number of simulations in a given state."""
+
+        with self.lock:
+            self.jobs[state] += value
+
+    def server_close(self):
+        """Stops the server and its worker processes."""
+
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests of the simulator daemon:
+
+    - POST /runs: runs a simulation (JSON object with the parameters listed in 'RUN_PARAMETERS') and returns its results
+    - GET /status: returns the number of workers and the number of simulations in each state
+    """
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.respond(status=404, content={"error": f"Invalid path: {self.path}"})
+            return
+
+        with self.server.lock:
+            content = {"workers": self.server.workers, "queue_size": self.server.queue_size, **self.server.jobs}
+
+        self.respond(status=200, content=content)
+
+    def do_POST(self):
+        if self.path != "/runs":
+            self.respond(status=404, content={"error": f"Invalid path: {self.path}"})
+            return
+
+        # Parsing and validating the simulation parameters
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job = {parameter: request.get(parameter, default) for parameter, default in RUN_PARAMETERS.items()}
+        except (ValueError, AttributeError):
+            self.respond(status=400, content={"error": "Requests must be JSON objects."})
+            return
+
+        invalid_parameters = sorted(set(request) - set(RUN_PARAMETERS))
+        missing_parameters = [parameter for parameter in REQUIRED_PARAMETERS if job[parameter] is None]
+        if invalid_parameters or missing_parameters:
+            self.respond(
+                status=400,
+                content={
+                    "error": f"Invalid parameters: {invalid_parameters}. Missing parameters: {missing_parameters}"
+                },
+            )
+            return
+
+        # Result stores can only be created inside the results directory of the daemon
+        if job["results"]:
+            results = resolve_results_path(results=str(job["results"]), directory=self.server.results_directory)
+            if results is None:
+                self.respond(status=400, content={"error": "Result stores must be inside the results directory."})
+                return
+            job["results"] = results
+
+        # Rejecting the simulation if the queue is full
+        if not self.server.slots.acquire(blocking=False):
+            self.server.count("rejected")
+            self.respond(status=503, content={"error": "The simulation queue is full."})
+            return
+
+        self.server.count("pending")
+        try:
+            result = self.server.executor.submit(run_job, job).result()
+        except Exception as error:
+            self.server.count("failed")
+            self.respond(status=500, content={"error": f"{type(error).__name__}: {error}"})
+        else:
+            self.server.count("completed")
+            self.respond(status=200, content=result)
+        finally:
+            self.server.count("pending", -1)
+            self.server.slots.release()
+
+    def respond(self, status, content):
+        """Sends a JSON response.
+
+        Parameters
+        ==========
+        status : int
+            HTTP status code
+
+        content : dict
+            Response content
+        """
+
+        body = json.dumps(content, default=str).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requests are only logged when the simulator is verbose
+        if simulator.simulator.VERBOSITY >= 2:
+            super().log_message(format, *args)
+
+
+def serve(host="127.0.0.1", port=8765, workers=1, queue_size=16, plan_cache={}, results_directory=RESULTS_DIRECTORY):
+    """Starts the simulator daemon, which runs simulations requested over HTTP until it is interrupted.
+
+    Parameters
+    ==========
+    host : string (optional)
+        Address the server listens to (only local clients can connect by default)
+
+    port : int (optional)
+        Port the server listens to
+
+    workers : int (optional)
+        Number of simulations executed in parallel
+
+    queue_size : int (optional)
+        Number of simulations that can wait for a worker
+
+    plan_cache : dict (optional)
+        Settings of the geometry plan cache (see 'PlanCache.configure')
+
+    results_directory : string (optional)
+        Directory under which the result stores informed in run requests are created
+    """
+
+    with SimulatorServer(
+        (host, port), workers=workers, queue_size=queue_size, plan_cache=plan_cache, results_directory=results_directory
+    ) as server:
+        print(f"Simulator daemon listening on http://{host}:{server.server_address[1]} ({workers} workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
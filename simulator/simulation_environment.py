@@ -1,12 +1,26 @@
 # Python Libraries
 import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 # General-Purpose Components
 from simulator.misc.object_collection import ObjectCollection
+from simulator.misc.profiler import Profiler
+from simulator.misc.plan_cache import PlanCache
 
 # Simulator Components
 from simulator.components.sensor import Sensor
 from simulator.components.topology import Topology
+from simulator.components.sensor_store import SensorStore
+from simulator.components.geometry_plan import GeometryPlan
+
+# Helper Methods
+from simulator.misc.helper_methods import project_coordinates
+from simulator.misc.helper_methods import tile_neighborhoods
+
+# Minimum number of nearest physical sensors of each virtual sensor that are part of its tile (even if they are outside
+# the tile halo), so that tiles in sparse regions still have enough sensors to plan their geometry
+TILE_NEIGHBORS = 16
 
 
 class SimulationEnvironment(ObjectCollection):
@@ -17,7 +31,21 @@ class SimulationEnvironment(ObjectCollection):
     # Class attribute that allows the class to use ObjectCollection methods
     instances = []
 
-    def __init__(self, steps, dataset, metric, heuristic):
+    def __init__(
+        self,
+        steps,
+        dataset,
+        metric,
+        heuristic,
+        alignment_tolerance=0,
+        fallback_plans=4,
+        accumulate_metrics=False,
+        tile_size=None,
+        tile_halo=None,
+        tile_workers=1,
+        max_triangles=None,
+        triangle_time_budget=None,
+    ):
         """Initializes the simulation object.
 
         Parameters
@@ -28,11 +56,35 @@ class SimulationEnvironment(ObjectCollection):
         dataset : string
             Name of the dataset file or directory containing a list of dataset files
 
-        metric : string
-            Metric to be inferred
+        metric : string or list
+            Metric to be inferred (or list of metrics inferred in the same simulation)
 
         heuristic : string
             Heuristic algorithm that will be executed during simulation
+
+        alignment_tolerance : float (optional)
+            Maximum absolute determinant for which a virtual sensor is considered aligned with two physical sensors
+
+        fallback_plans : int (optional)
+            Number of alternative groups of sensors kept for virtual sensors whose sensors miss measurements
+
+        accumulate_metrics : boolean (optional)
+            Whether only the accuracy metrics are accumulated, instead of the inferences of every step
+
+        tile_size : float (optional)
+            Width of the square tiles whose geometry is planned independently (the topology isn't tiled by default)
+
+        tile_halo : float (optional)
+            Width of the band around tiles whose sensors can also be used by the tile (half the tile size by default)
+
+        tile_workers : int (optional)
+            Number of processes that plan the geometry of tiles in parallel
+
+        max_triangles : int (optional)
+            Number of valid triangles after which bounded triangle searches stop (unbounded by default)
+
+        triangle_time_budget : float (optional)
+            Time (in seconds) after which bounded triangle searches of each virtual sensor stop (unbounded by default)
         """
 
         # Auto increment identifier
@@ -41,8 +93,14 @@ class SimulationEnvironment(ObjectCollection):
         # List object that can be used to store any event that occurs during the simulation
         self.metrics = []
 
-        # Metric that will be inferred
-        self.metric = metric
+        # Long replays only accumulate the number of inferences and the sum of their squared and absolute errors
+        # for each metric and virtual sensor, so that memory doesn't grow with the number of steps
+        self.accumulate_metrics = accumulate_metrics
+        self.accuracy = None
+
+        # Metrics that will be inferred (their measurements are inferred with the same geometry)
+        self.metrics_of_interest = [metric] if isinstance(metric, str) else list(metric)
+        self.metric = ", ".join(self.metrics_of_interest)
 
         # Dataset
         self.dataset = dataset
@@ -50,6 +108,12 @@ class SimulationEnvironment(ObjectCollection):
         # Heuristic algorithm used to infer the value of virtual sensors
         self.heuristic = heuristic
 
+        # Tolerance used to check whether virtual sensors are aligned with physical sensors
+        self.alignment_tolerance = alignment_tolerance
+
+        # Number of alternative groups of sensors (ranked by the heuristics) used when sensors miss measurements
+        self.fallback_plans = fallback_plans
+
         # Simulation steps
         self.steps = steps
         self.current_step = 1
@@ -57,6 +121,24 @@ class SimulationEnvironment(ObjectCollection):
         # Logic sensors whose measurements will be estimated
         self.virtual_sensors = []
 
+        # Physical sensors and weights used to infer the measurements of virtual sensors (created by heuristics)
+        self.plan = None
+        self.create_plan = None
+
+        # Changes in the topology (e.g., sensor failures) scheduled for each simulation step
+        self.topology_events = {}
+
+        # Large topologies can be partitioned into tiles, whose virtual sensors are planned with the sensors of the
+        # tile and its halo only (possibly in separate processes). 'tile' is set in the environments planning tiles
+        self.tile_size = tile_size
+        self.tile_halo = tile_size / 2 if tile_size is not None and tile_halo is None else tile_halo
+        self.tile_workers = tile_workers
+        self.tile = None
+
+        # Budgets of bounded triangle searches (used by heuristics whose inference latency must be bounded)
+        self.max_triangles = max_triangles
+        self.triangle_time_budget = triangle_time_budget
+
         # Adding the new object to the list of instances of its class
         SimulationEnvironment.instances.append(self)
 
@@ -68,13 +150,19 @@ class SimulationEnvironment(ObjectCollection):
         sensors : int
             Number of virtual sensors whose measurements will be inferred
 
-        algorithm : string
-            Heuristic algorithm that will be executed
+        heuristic : Heuristic
+            Heuristic that infers the measurements of the virtual sensors
 
         neighbors : int
             Number of nearest neighbor sensors that can be used to estimate the value of a virtual sensor
         """
 
+        if len(self.metrics_of_interest) > 1 and not heuristic.multi_metric:
+            raise Exception(f"{heuristic.label} infers a single metric per simulation.")
+
+        if heuristic.needs_k and neighbors < 1 and heuristic.default_neighbors is None:
+            raise Exception(f"{heuristic.label} needs the number of neighbors (k) to be at least 1.")
+
         # Picking 'n' virtual sensors whose measurements will be estimated
         self.virtual_sensors = random.sample([sensor for sensor in Sensor.all() if sensor.type == "physical"], sensors)
         for sensor in self.virtual_sensors:
@@ -82,58 +170,478 @@ class SimulationEnvironment(ObjectCollection):
 
         self.neighbors = neighbors
 
+        # Naming the heuristic once (e.g., with the number of neighbors it uses) to ease post-simulation analysis
+        self.heuristic = heuristic.describe(environment=self)
+
+        # Sensor types changed, so geometry found in previous runs can't be reused
+        Sensor.aligned_sensors_cache.clear()
+        Sensor.spatial_index = None
+        self.plan = None
+
         # The simulation goes on while the stopping criteria is not met
         while self.current_step <= self.steps:
+            Profiler.start_step(self.current_step)
+
             # Updating system state
-            self.update_system_state()
+            with Profiler.phase("state_update"):
+                self.update_system_state()
 
-            # Running a set of user-defined tasks
-            heuristic()
+            # Inferring the measurements of the virtual sensors
+            with Profiler.phase("heuristic"):
+                self.infer(heuristic)
 
             # Removing temporary items in the topology
-            self.clean_environment()
+            with Profiler.phase("clean_environment"):
+                self.clean_environment()
 
             # Collecting simulation metrics for the current step and moving to the next step
-            self.collect_metrics()
+            with Profiler.phase("metrics"):
+                self.collect_metrics()
             self.current_step += 1
 
+            Profiler.end_step()
+
+    def infer(self, heuristic):
+        """Infers the measurements of the virtual sensors in the current step. Batchable heuristics compile their
+        geometry plan in the first step (or load it from the plan cache) and reuse it in the following steps.
+
+        Parameters
+        ==========
+        heuristic : Heuristic
+            Heuristic that infers the measurements of the virtual sensors
+        """
+
+        plan = None
+        if heuristic.batchable:
+            plan = self.geometry_plan(
+                heuristic=heuristic.name,
+                create_plan=heuristic.compile,
+                options=heuristic.plan_options(environment=self),
+            )
+
+        heuristic.infer(store=SensorStore.first(), plan=plan)
+
+    def geometry_plan(self, heuristic, create_plan, options={}):
+        """Returns the geometry plan of the virtual sensors, which is created once per run
+        or loaded from the plan cache if the same geometry was already used in previous runs.
+
+        Parameters
+        ==========
+        heuristic : string
+            Heuristic that creates the plan
+
+        create_plan : function
+            Function that receives the sensor store and the list of virtual sensors and returns their geometry plan
+
+        options : dict (optional)
+            Other parameters that affect the plan (besides the sensors' coordinates and the number of neighbors)
+
+        Returns
+        =======
+        plan : GeometryPlan
+            Geometry plan of the virtual sensors
+        """
+
+        # Keeping the function that creates the plan, so that it can be updated when the topology changes
+        self.create_plan = create_plan
+
+        if self.plan is None:
+            with Profiler.phase("geometry"):
+                store = SensorStore.first()
+                key = PlanCache.key(
+                    coordinates=store.coordinates[: store.size],
+                    types=store.types[: store.size],
+                    virtual_ids=[sensor.id for sensor in self.virtual_sensors],
+                    heuristic=heuristic,
+                    neighbors=self.neighbors,
+                    options={
+                        "alignment_tolerance": self.alignment_tolerance,
+                        "fallback_plans": self.fallback_plans,
+                        **({"tile_size": self.tile_size, "tile_halo": self.tile_halo} if self.tile_size else {}),
+                        **options,
+                    },
+                )
+
+                arrays = PlanCache.load(key)
+                if arrays is not None:
+                    Profiler.count("plan_cache_hits")
+                    self.plan = GeometryPlan.from_arrays(arrays)
+                else:
+                    self.plan = self.plan_virtual_sensors(self.virtual_sensors)
+                    PlanCache.save(key, self.plan.to_arrays())
+
+        return self.plan
+
+    def plan_virtual_sensors(self, virtual_sensors):
+        """Creates the geometry plan of a group of virtual sensors (tile by tile when the topology is tiled).
+
+        Parameters
+        ==========
+        virtual_sensors : list
+            Virtual sensors whose measurements will be inferred
+
+        Returns
+        =======
+        plan : GeometryPlan
+            Geometry plan of the virtual sensors
+        """
+
+        if self.tile_size is None:
+            return self.create_plan(store=SensorStore.first(), virtual_sensors=virtual_sensors)
+
+        store = SensorStore.first()
+        virtual_ids = np.array([sensor.id for sensor in virtual_sensors], dtype=np.int64)
+
+        nearest_ids, _ = Sensor.find_nearest_neighbors(
+            sensors=virtual_sensors, k=max(TILE_NEIGHBORS, self.neighbors + self.fallback_plans + 1)
+        )
+        tiles = tile_neighborhoods(
+            coordinates=store.coordinates[: store.size],
+            points=store.coordinates[store.rows_of(virtual_ids)],
+            tile_size=self.tile_size,
+            halo=self.tile_halo,
+            nearest=np.where(nearest_ids >= 0, store.rows_of(nearest_ids), -1),
+        )
+        Profiler.count("tiles", len(tiles))
+
+        # Each tile only receives the sensors within the tile and its halo
+        settings = {
+            "steps": self.steps,
+            "dataset": self.dataset,
+            "metric": self.metrics_of_interest,
+            "heuristic": self.heuristic,
+            "alignment_tolerance": self.alignment_tolerance,
+            "fallback_plans": self.fallback_plans,
+            "max_triangles": self.max_triangles,
+            "triangle_time_budget": self.triangle_time_budget,
+        }
+        jobs = [
+            (self.create_plan, store.subset(rows), virtual_ids[points], {**settings, "neighbors": self.neighbors}, tile)
+            for tile, points, rows in tiles
+        ]
+
+        if self.tile_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.tile_workers, len(jobs))) as executor:
+                plans = list(executor.map(create_tile_plan, *zip(*jobs)))
+        else:
+            plans = [create_tile_plan(*job) for job in jobs]
+
+        # Merging the plans of all tiles (virtual sensors without coordinates are not part of any tile)
+        plan = GeometryPlan(
+            virtual_ids=virtual_ids,
+            sensors=np.full((len(virtual_ids), 1, 1), -1),
+            weights=np.zeros((len(virtual_ids), 1, 1)),
+        )
+        for tile_plan in plans:
+            plan.update(tile_plan)
+
+        return plan
+
+    def schedule_topology_event(self, step, action, **parameters):
+        """Schedules a change in the topology (e.g., a sensor failure) that happens at the beginning of a given step.
+
+        Parameters
+        ==========
+        step : int
+            Simulation step in which the change happens
+
+        action : string
+            Change in the topology ('add', 'remove', 'disable', or 'enable')
+
+        parameters : dict
+            Parameters of the method that performs the change (e.g., 'sensor' for 'disable')
+        """
+
+        if action not in ["add", "remove", "disable", "enable"]:
+            raise Exception(f"Invalid topology event: {action}")
+
+        self.topology_events.setdefault(step, []).append((action, parameters))
+
+    def add_sensor(self, coordinates, measurements, timestamps=[], alias=""):
+        """Adds a physical sensor in the middle of the simulation.
+
+        Parameters
+        ==========
+        coordinates : tuple
+            Sensor coordinates (latitude and longitude, projected like the coordinates of the other sensors)
+
+        measurements : list
+            Sensor measurements (one for each simulation step, starting from the first one). When several metrics are
+            inferred, it is a list with the measurements of each metric
+
+        timestamps : list (optional)
+            Timestamps of the sensor measurements, used to place them on the time axis when they don't start at the
+            first simulation step (a list with the timestamps of each metric when several metrics are inferred)
+
+        alias : string (optional)
+            Name that identifies the sensor
+
+        Returns
+        =======
+        sensor : Sensor
+            Created sensor
+        """
+
+        store = SensorStore.first()
+        if store.projection is not None:
+            coordinates = tuple(project_coordinates(coordinates=coordinates, origin=store.projection).tolist())
+
+        sensor = Sensor(
+            coordinates=coordinates, type="physical", measurements=measurements, timestamps=timestamps, alias=alias
+        )
+
+        if Sensor.spatial_index is not None:
+            Sensor.spatial_index.add(id=sensor.id, coordinates=sensor.coordinates)
+
+        self.update_geometry_plan(added_sensors=[sensor])
+
+        return sensor
+
+    def remove_sensor(self, sensor):
+        """Removes a physical sensor in the middle of the simulation.
+
+        Parameters
+        ==========
+        sensor : Sensor
+            Physical (or disabled) sensor that will be removed
+        """
+
+        if sensor.type not in ["physical", "disabled"]:
+            raise Exception(f"Only physical sensors can be removed (Sensor_{sensor.id} is {sensor.type}).")
+
+        if Sensor.spatial_index is not None and sensor.type == "physical":
+            Sensor.spatial_index.remove(id=sensor.id)
+
+        # Removing the sensor before updating the plan, so that heuristics don't pick it again
+        Sensor.remove([sensor])
+        self.update_geometry_plan(removed_ids=[sensor.id])
+
+    def disable_sensor(self, sensor):
+        """Disables a physical sensor (e.g., due to a failure), so that its measurements are not used anymore.
+
+        Parameters
+        ==========
+        sensor : Sensor
+            Physical sensor that will be disabled
+        """
+
+        if sensor.type != "physical":
+            raise Exception(f"Only physical sensors can be disabled (Sensor_{sensor.id} is {sensor.type}).")
+
+        sensor.type = "disabled"
+
+        if Sensor.spatial_index is not None:
+            Sensor.spatial_index.remove(id=sensor.id)
+
+        self.update_geometry_plan(removed_ids=[sensor.id])
+
+    def enable_sensor(self, sensor):
+        """Enables a physical sensor that was disabled (e.g., when it comes back online).
+
+        Parameters
+        ==========
+        sensor : Sensor
+            Disabled sensor that will be enabled
+        """
+
+        if sensor.type != "disabled":
+            raise Exception(f"Only disabled sensors can be enabled (Sensor_{sensor.id} is {sensor.type}).")
+
+        sensor.type = "physical"
+
+        if Sensor.spatial_index is not None:
+            Sensor.spatial_index.add(id=sensor.id, coordinates=sensor.coordinates)
+
+        self.update_geometry_plan(added_sensors=[sensor])
+
+    def update_geometry_plan(self, removed_ids=[], added_sensors=[]):
+        """Updates the geometry plan of the virtual sensors affected by changes in the topology. Virtual sensors are
+        affected when they use a sensor that is not available anymore or when a new sensor is at least as close to
+        them as the farthest sensor they use (or when they had no sensors to infer their measurements).
+
+        Parameters
+        ==========
+        removed_ids : list (optional)
+            Identifiers of the sensors that were removed or disabled
+
+        added_sensors : list (optional)
+            Sensors that were added or enabled
+        """
+
+        if self.plan is None:
+            return
+
+        with Profiler.phase("geometry"):
+            store = SensorStore.first()
+            # Sensors of all alternatives of each virtual sensor
+            sensors = self.plan.sensors.reshape(len(self.plan.virtual_ids), -1)
+            used = sensors >= 0
+
+            affected = np.isin(sensors, removed_ids).any(axis=1)
+
+            if len(added_sensors) > 0:
+                virtual_coordinates = store.coordinates[store.rows_of(self.plan.virtual_ids)]
+
+                # Distance between each virtual sensor and the farthest sensor it uses
+                sensor_coordinates = store.coordinates[store.rows_of(np.where(used, sensors, 0))]
+                distances = np.linalg.norm(sensor_coordinates - virtual_coordinates[:, None, :], axis=-1)
+                radii = np.where(used, distances, -np.inf).max(axis=1)
+                radii[~used.any(axis=1)] = np.inf
+
+                added_coordinates = np.array([sensor.coordinates for sensor in added_sensors])
+                added_distances = np.linalg.norm(
+                    added_coordinates[None, :, :] - virtual_coordinates[:, None, :], axis=-1
+                )
+                affected |= (added_distances <= radii[:, None]).any(axis=1)
+
+            virtual_sensors = [sensor for sensor, is_affected in zip(self.virtual_sensors, affected) if is_affected]
+            Profiler.count("plan_updates", len(virtual_sensors))
+
+            if len(virtual_sensors) > 0:
+                self.plan.update(self.plan_virtual_sensors(virtual_sensors))
+
     def update_system_state(self):
         """ """
 
+        # Applying the changes in the topology scheduled for the current step
+        for action, parameters in self.topology_events.pop(self.current_step, []):
+            getattr(self, f"{action}_sensor")(**parameters)
+
         # Updating sensors measurements and their timestamps
-        for sensor in [sensor for sensor in Sensor.all() if sensor.type == "physical" or sensor.type == "virtual"]:
-            sensor.measurement = sensor.measurements[self.current_step - 1]
-            sensor.timestamp = sensor.timestamps[self.current_step - 1]
+        SensorStore.first().set_step(self.current_step - 1)
 
     def clean_environment(self):
         """ """
 
-        # Removing auxiliary sensors and any links used to triangulate measurements of a virtual sensor
-        Topology.first().remove_edges_from(list(Topology.first().edges()))
-
-        auxiliary_sensors = [sensor for sensor in Sensor.all() if sensor.type == "auxiliary"]
-
-        Sensor.instances = [sensor for sensor in Sensor.all() if sensor.type == "physical" or sensor.type == "virtual"]
-        Topology.first().remove_nodes_from(auxiliary_sensors)
+        # Removing auxiliary sensors used to triangulate measurements of a virtual sensor. The NetworkX topology
+        # is not touched here, as it is only built from the remaining sensors when it is rendered or analyzed (links
+        # created in this step are removed at that point)
+        Sensor.remove_auxiliary_sensors()
+        Topology.first().outdated_edges = True
 
     def collect_metrics(self):
         """Stores relevant events that occur during the simulation."""
 
+        if self.accumulate_metrics:
+            self.accumulate_accuracy()
+            return
+
+        store = SensorStore.first()
         measurements = []
 
+        # All sensors share the same time axis
+        current_timestamp = store.current_timestamp.item()
+
         for sensor in Sensor.all():
 
-            if sensor.inferred_measurement is not None:
+            for index, metric in enumerate(self.metrics_of_interest):
+                inference = store.inferences[index, sensor.row]
+                if inference != inference:
+                    continue
+
+                # Sensors without series (e.g., auxiliary sensors) have no real measurements
+                timestamp, real_measurement = None, None
+                if store.series[sensor.row] >= 0:
+                    timestamp = current_timestamp
+                    real_measurement = float(store.current_measurements[index, sensor.row])
 
                 measurements.append(
                     {
                         "sensor": sensor.id,
-                        "timestamp": sensor.timestamp,
-                        "real_measurement": sensor.measurement,
-                        "inference": sensor.inferred_measurement,
+                        "metric": metric,
+                        "timestamp": timestamp,
+                        "real_measurement": real_measurement,
+                        "inference": float(inference),
                     }
                 )
 
         step_metrics = {"step": self.current_step, "measurements": measurements}
 
         self.metrics.append(step_metrics)
+
+    def accumulate_accuracy(self):
+        """Accumulates the errors of the inferences of each virtual sensor at the current step."""
+
+        store = SensorStore.first()
+
+        if self.accuracy is None:
+            shape = (len(self.metrics_of_interest), len(self.virtual_sensors))
+            self.accuracy = {
+                "count": np.zeros(shape, dtype=np.int64),
+                "squared_errors": np.zeros(shape),
+                "absolute_errors": np.zeros(shape),
+            }
+
+        rows = [sensor.row for sensor in self.virtual_sensors]
+        errors = store.inferences[:, rows] - store.current_measurements[:, rows]
+
+        # Steps in which the measurement is missing or could not be inferred are skipped
+        inferred = ~np.isnan(errors)
+        errors = np.where(inferred, errors, 0)
+
+        self.accuracy["count"] += inferred
+        self.accuracy["squared_errors"] += errors**2
+        self.accuracy["absolute_errors"] += np.abs(errors)
+
+
+def create_tile_plan(create_plan, store, virtual_ids, settings, tile):
+    """Creates the geometry plan of the virtual sensors of a tile using only the sensors of the tile (and its halo).
+    Tiles can be planned by worker processes, so the simulation objects of the calling process are restored after
+    the plan is created.
+
+    Parameters
+    ==========
+    create_plan : function
+        Function that receives the sensor store and the list of virtual sensors and returns their geometry plan
+
+    store : SensorStore
+        Sensor store with the sensors of the tile and its halo
+
+    virtual_ids : numpy.ndarray
+        Identifiers of the virtual sensors of the tile
+
+    settings : dict
+        Parameters of the simulation environment (including the number of neighbors)
+
+    tile : tuple
+        Position of the tile in the grid
+
+    Returns
+    =======
+    plan : GeometryPlan
+        Geometry plan of the virtual sensors of the tile
+    """
+
+    state = (
+        Sensor.instances,
+        Sensor.aligned_sensors_cache,
+        Sensor.spatial_index,
+        SensorStore.instances,
+        SimulationEnvironment.instances,
+    )
+
+    try:
+        Sensor.instances = []
+        Sensor.aligned_sensors_cache = {}
+        Sensor.spatial_index = None
+        SensorStore.instances = [store]
+        SimulationEnvironment.instances = []
+        Sensor.attach(store=store)
+
+        settings = dict(settings)
+        neighbors = settings.pop("neighbors")
+        environment = SimulationEnvironment(**settings)
+        environment.neighbors = neighbors
+        environment.tile = tile
+        environment.virtual_sensors = [Sensor.instances[row] for row in store.rows_of(virtual_ids)]
+
+        return create_plan(store=store, virtual_sensors=environment.virtual_sensors)
+
+    finally:
+        (
+            Sensor.instances,
+            Sensor.aligned_sensors_cache,
+            Sensor.spatial_index,
+            SensorStore.instances,
+            SimulationEnvironment.instances,
+        ) = state
@@ -1,29 +1,47 @@
 # Python Libraries
+import io
 import os
 import csv
-import re
+import copy
+import hashlib
+import uuid
 import statistics
 import numpy as np
 import pandas as pd
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.metrics import mean_squared_error
 from sklearn.metrics import mean_absolute_error
 
 # General-purpose Simulator Modules
 from simulator.simulation_environment import SimulationEnvironment
+from simulator.misc.binary_dataset import is_binary_dataset
+from simulator.misc.binary_dataset import read_binary_dataset
+from simulator.misc.profiler import Profiler
+from simulator.misc.ingest_cache import IngestCache
+from simulator.misc.result_store import ResultStore
 
 # Simulator Components
 from simulator.components.sensor import Sensor
 from simulator.components.topology import Topology
+from simulator.components.sensor_store import SensorStore
 
-# Heuristic Algorithms
-from simulator.heuristics.proposed_heuristic import proposed_heuristic
-from simulator.heuristics.first_fit_proposal import first_fit_proposal
-from simulator.heuristics.knn import knn
-from simulator.heuristics.idw import idw
+# Heuristic Algorithms (built-in heuristics are registered when imported)
+from simulator.heuristics.heuristic import Heuristic
+from simulator.heuristics.proposed_heuristic import ProposedHeuristic
+from simulator.heuristics.proposed_heuristic import BoundedProposal
+from simulator.heuristics.first_fit_proposal import FirstFitProposal
+from simulator.heuristics.knn import KNearestNeighbors
+from simulator.heuristics.idw import InverseDistanceWeighting
+from simulator.heuristics.kriging import OrdinaryKriging
 
 VERBOSITY = 1
 
+# Number of threads that read dataset files ahead of the parser and maximum number of files read ahead (which bounds
+# the memory used by files waiting to be parsed)
+INGEST_THREADS = 4
+INGEST_READ_AHEAD = 8
+
 
 class Simulator:
     """This class allows the creation objects that
@@ -33,22 +51,79 @@ class Simulator:
     environment = None
     dataset = None
 
+    # Overall accuracy metrics of the last simulation (calculated by 'show_output')
+    summary = None
+
+    # Sensor stores of the datasets already loaded, indexed by dataset and metric. Long-running processes (e.g., the
+    # simulator daemon) set it to a dictionary so that datasets are parsed only once (None disables it)
+    dataset_cache = None
+
     @classmethod
-    def load_dataset(cls, target, metric, formatting="INMET-BR"):
+    def load_dataset(
+        cls,
+        target,
+        metric,
+        formatting="INMET-BR",
+        projected=False,
+        precision="float64",
+        chunk_size=None,
+        incremental=False,
+    ):
         """Loads data from input files and creates a topology with sensor objects.
 
         target : string
             String representing a CSV file or a directory containing a list of CSV files
 
+        metric : string or list
+            Metric to be inferred (or list of metrics inferred in the same simulation)
+
         formatting : string
             Information on the type of formatting needs to be performed to load the dataset
+
+        projected : boolean (optional)
+            Whether coordinates are projected onto a local plane (in kilometers) instead of kept in degrees
+
+        precision : string (optional)
+            Data type of the stored measurements ('float64' or 'float32')
+
+        chunk_size : int (optional)
+            Number of time steps kept in memory at once. When informed, measurements are read in chunks from the
+            memory-mapped files of datasets in the binary format instead of being loaded at once
+
+        incremental : boolean (optional)
+            Whether files are parsed incrementally: what was parsed from each file is kept in the ingest cache, so
+            that only the rows appended to the files (and new files) since the previous ingest are parsed
         """
 
         # Storing the dataset name
         Simulator.dataset = target
+        metrics = (metric,) if isinstance(metric, str) else tuple(metric)
+
+        # Removing objects created by previous simulations of the same process
+        Sensor.instances = []
+        SensorStore.instances = []
+        Topology.instances = []
+        SimulationEnvironment.instances = []
+        Sensor.aligned_sensors_cache.clear()
+        Sensor.spatial_index = None
+        Simulator.environment = None
+        Simulator.summary = None
 
         topo = Topology()
 
+        # Reusing datasets that were already loaded. Simulations change sensor types, so each one gets its own copy.
+        # Datasets read in chunks are not kept, as their measurements stay in their files. In incremental ingests,
+        # the size and modification time of the files are part of the key, so that refreshed datasets are reloaded
+        caching = Simulator.dataset_cache is not None and chunk_size is None
+        key = (target, metrics, projected, Simulator.dataset_version(target=target) if incremental else None)
+        if caching and key in Simulator.dataset_cache:
+            store = copy.deepcopy(Simulator.dataset_cache[key])
+            SensorStore.instances.append(store)
+            Sensor.attach(store=store)
+            return
+
+        store = SensorStore(metrics=len(metrics), precision=precision)
+
         data = os.listdir("data")
 
         if target not in data:
@@ -65,23 +140,76 @@ class Simulator:
             elif ".json" in target:
                 print(f"JSON input file: {target}")
 
+            elif chunk_size is not None:
+                if not is_binary_dataset(f"data/{target}"):
+                    raise Exception("Chunked replays need datasets in the binary format (see 'generate_dataset.py').")
+
+                # Sensors are created along with their memory-mapped series, so there's nothing else to parse
+                with Profiler.phase("sensor_creation"):
+                    Simulator.stream_dataset_binary(target=target, metric=list(metrics), chunk_size=chunk_size)
+                dataset = None
+
+            elif is_binary_dataset(f"data/{target}"):
+                with Profiler.phase("ingest"):
+                    dataset = Simulator.parse_dataset_binary(target=target, metric=list(metrics))
+
             elif formatting == "INMET-BR":
-                dataset = Simulator.parse_dataset_inmet_br(target=target, metric=metric)
+                with Profiler.phase("ingest"):
+                    dataset = Simulator.parse_dataset_inmet_br(
+                        target=target, metric=list(metrics), incremental=incremental
+                    )
             else:
                 raise Exception("Invalid dataset.")
 
-            # Adding sensors to the NetworkX topology
-            for data in dataset:
-                Sensor(
-                    coordinates=data["coordinates"],
-                    type="physical",
-                    timestamps=data["timestamps"],
-                    measurements=data["measurements"],
-                    alias=data["alias"],
-                )
+            # Creating sensor objects (the NetworkX topology is only built from them when needed). Sensors share
+            # the time axis of the dataset, so their measurements are stored without timestamps
+            if dataset is not None:
+                with Profiler.phase("sensor_creation"):
+                    store.set_time_axis(timestamps=dataset["timestamps"])
+                    for data in dataset["sensors"]:
+                        Sensor(
+                            coordinates=data["coordinates"],
+                            type="physical",
+                            measurements=data["measurements"],
+                            alias=data["alias"],
+                        )
+
+            # Projecting coordinates once, so that all heuristics measure distances in kilometers
+            if projected:
+                store.project()
+
+            if caching:
+                # Forgetting previous versions of the dataset
+                for previous_key in [cached_key for cached_key in Simulator.dataset_cache if cached_key[:3] == key[:3]]:
+                    del Simulator.dataset_cache[previous_key]
+
+                Simulator.dataset_cache[key] = copy.deepcopy(store)
 
     @classmethod
-    def parse_dataset_inmet_br(cls, target, metric):
+    def dataset_version(cls, target):
+        """Returns the size and modification time of the files of a dataset, which change when files are refreshed.
+
+        Parameters
+        ==========
+        target : string
+            Dataset file or directory
+
+        Returns
+        =======
+        version : tuple
+            Name, size, and modification time of each file
+        """
+
+        path = f"data/{target}"
+        files = sorted(os.listdir(path)) if os.path.isdir(path) else [""]
+
+        return tuple(
+            (file, status.st_size, status.st_mtime_ns)
+            for file, status in ((file, os.stat(os.path.join(path, file))) for file in files)
+        )
+
+    @classmethod
+    def parse_dataset_inmet_br(cls, target, metric, incremental=False):
         """Parse data following the format adopted by the
         Brazilian National Institute of Meteorology (INMET).
 
@@ -90,57 +218,353 @@ class Simulator:
         target : String
             List of files or directory containing the dataset
 
+        metric : String or List
+            Metric to be parsed (or list of metrics)
+
+        incremental : Boolean (optional)
+            Whether only the rows appended to the files (and new files) since the previous ingest are parsed
+
         Returns
         =======
-        dataset : List
-            Parsed dataset
+        dataset : Dictionary
+            Parsed dataset: timestamps (seconds since the epoch) of the time axis shared by all sensors and sensors
+            whose measurements are aligned with it (NaN when missing). When several metrics are parsed, measurements
+            have one row per metric
         """
 
-        dataset = []
+        sensors = []
+        metrics = [metric] if isinstance(metric, str) else metric
 
-        files = [file for file in os.listdir(f"data/{target}") if ".csv" in file.lower()]
+        files = [f"data/{target}/{file}" for file in os.listdir(f"data/{target}") if ".csv" in file.lower()]
 
-        for file in files:
+        for station in Simulator.stream_stations_inmet_br(files=files, incremental=incremental):
+            # Numeric columns follow the date and hour columns
+            names = station["names"].tolist()
+            latitude, longitude = (None if np.isnan(value) else value for value in station["coordinates"].tolist())
 
-            sensor = {}
+            sensors.append(
+                {
+                    "coordinates": (latitude, longitude),
+                    "alias": str(station["alias"]),
+                    "timestamps": station["timestamps"],
+                    "measurements": np.array([station["values"][names.index(name) - 2] for name in metrics]),
+                }
+            )
+
+        # Aligning the measurements of all sensors with the timestamps of the dataset
+        timestamps = np.unique(np.concatenate([sensor["timestamps"] for sensor in sensors]))
+        for sensor in sensors:
+            measurements = np.full((len(metrics), len(timestamps)), np.nan)
+            measurements[:, np.searchsorted(timestamps, sensor.pop("timestamps"))] = sensor["measurements"]
 
-            with open(f"data/{target}/{file}", newline="", encoding="ISO-8859-1") as csvfile:
-                content = list(csv.reader(csvfile, delimiter=";", quotechar="|"))
+            # Sensors that measure a single metric have a single series
+            sensor["measurements"] = measurements[0] if len(metrics) == 1 else measurements
 
-                # Parsing basic attributes
-                latitude = float(re.sub(",", ".", content[4][1])) if len(content[4][1]) > 0 else None
-                longitude = float(re.sub(",", ".", content[5][1])) if len(content[5][1]) > 0 else None
-                sensor["coordinates"] = (latitude, longitude)
-                sensor["alias"] = content[2][1]
+        return {"timestamps": timestamps, "sensors": sensors}
 
-                # Converting part of the CSV with data measurements to a pandas dataframe to ease manipulation
-                starting_row = 1449
-                ending_row = starting_row + 23
-                raw_measurements = pd.DataFrame(content[starting_row : starting_row + ending_row])
-                raw_measurements.columns = content[8]  # Defining the dataframe header with names of each column
+    @classmethod
+    def stream_stations_inmet_br(cls, files, incremental=False):
+        """Parses station files following the format adopted by INMET. A pool of threads reads the files ahead of
+        the parser (which consumes them in order), so that reading files (e.g., from network-mounted storage with
+        cold caches) overlaps with parsing instead of running one after the other.
 
-                # Removing rows with missing values
-                raw_measurements[metric].replace("", np.nan, inplace=True)
-                raw_measurements.dropna(subset=[metric], inplace=True)
+        Parameters
+        ==========
+        files : List
+            Station files
 
-                # Parsing sensor measurements
-                sensor["measurements"] = [
-                    float(re.sub(",", ".", measurement)) for measurement in list(raw_measurements[metric])
-                ]
+        incremental : Boolean (optional)
+            Whether what was parsed from the files in previous ingests is reused
 
-                # Parsing measurement timestamps
-                dates = list(raw_measurements["Data"])
-                hours = list(raw_measurements["Hora UTC"])
-                sensor["timestamps"] = [
-                    datetime.strptime(f"{dates[i]} {hours[i][0:4]}", "%Y/%m/%d %H%M") for i in range(0, len(dates))
-                ]
+        Returns
+        =======
+        stations : Generator
+            Parsed stations (see 'parse_station_inmet_br'), in the same order of the files
+        """
 
-            dataset.append(sensor)
+        with ThreadPoolExecutor(max_workers=INGEST_THREADS) as executor:
+            # Files being read or waiting to be parsed
+            pending = deque()
 
-        return dataset
+            for file in files:
+                pending.append(executor.submit(Simulator.read_station_inmet_br, file=file, incremental=incremental))
+
+                if len(pending) >= INGEST_READ_AHEAD:
+                    yield Simulator.parse_station_inmet_br(**pending.popleft().result(), incremental=incremental)
+
+            while len(pending) > 0:
+                yield Simulator.parse_station_inmet_br(**pending.popleft().result(), incremental=incremental)
 
     @classmethod
-    def run(cls, steps, metric, algorithm, sensors, neighbors):
+    def read_station_inmet_br(cls, file, incremental=False):
+        """Reads the content of a station file that wasn't parsed yet (the whole file, or the rows appended since
+        the previous ingest in incremental ingests).
+
+        Parameters
+        ==========
+        file : String
+            Station file
+
+        incremental : Boolean (optional)
+            Whether what was parsed from the file in previous ingests is reused
+
+        Returns
+        =======
+        content : Dictionary
+            Station file, what was parsed from it in previous ingests (None if nothing is reused), and its content
+            that wasn't parsed yet
+        """
+
+        station = IngestCache.load(file=file) if incremental else None
+
+        with open(file, mode="rb") as station_file:
+            station_file.seek(0 if station is None else int(station["offset"]))
+            content = station_file.read()
+
+        # ISO-8859-1 has one byte per character, so offsets in the decoded content are also offsets in the file
+        return {"file": file, "station": station, "content": content.decode("ISO-8859-1")}
+
+    @classmethod
+    def parse_station_inmet_br(cls, file, station, content, incremental=False):
+        """Parses the content of a station file following the format adopted by INMET. In incremental ingests, the
+        parsed columns and how much of the file was read are kept in the ingest cache, so that only rows appended
+        since the previous ingest are parsed.
+
+        Parameters
+        ==========
+        file : String
+            Station file
+
+        station : Dictionary
+            What was parsed from the file in previous ingests (None if the whole file is parsed)
+
+        content : String
+            Content of the file that wasn't parsed yet
+
+        incremental : Boolean (optional)
+            Whether what is parsed from the file is kept in the ingest cache
+
+        Returns
+        =======
+        station : Dictionary
+            Station alias and coordinates, column names, timestamps (seconds since the epoch) of the parsed rows and
+            values of the numeric columns (one row per column, NaN when missing)
+        """
+
+        # Lines with the station attributes and column names, and lines with the measurements used by simulations
+        header_lines = 9
+        starting_row = 1449
+        ending_row = starting_row + 1472
+
+        first_line = 0 if station is None else int(station["lines"])
+
+        # Only complete lines are kept in the ingest state, as the last line may still be being written
+        complete = content.rfind("\n") + 1
+        lines = content[:complete].split("\n")[:-1]
+
+        if station is None:
+            header = Simulator.read_lines_inmet_br(lines=lines[:header_lines])
+            header_size = sum(len(line) + 1 for line in lines[:header_lines])
+            station = {
+                "alias": header[2][1],
+                "coordinates": np.array(
+                    [float(row[1].replace(",", ".")) if len(row[1]) > 0 else np.nan for row in header[4:6]]
+                ),
+                "names": np.array(header[8]),
+                "timestamps": np.empty(0, dtype=np.int64),
+                "values": np.empty((len(header[8]) - 2, 0)),
+                "offset": 0,
+                "lines": 0,
+                "header_size": header_size,
+                "header_digest": hashlib.sha256(content[:header_size].encode("ISO-8859-1")).hexdigest(),
+            }
+
+        def append_rows(station, lines, first_line):
+            # Parsing the rows within the simulated time window
+            rows = lines[max(starting_row - first_line, 0) : max(ending_row - first_line, 0)]
+            if len(rows) == 0:
+                return station
+
+            timestamps, values = Simulator.parse_rows_inmet_br(rows=rows, columns=len(station["names"]))
+
+            return {
+                **station,
+                "timestamps": np.concatenate([station["timestamps"], timestamps]),
+                "values": np.concatenate([station["values"], values], axis=1),
+            }
+
+        if len(lines) > 0:
+            station = append_rows(station=station, lines=lines, first_line=first_line)
+            station["offset"] = int(station["offset"]) + complete
+            station["lines"] = first_line + len(lines)
+
+            if incremental and station["lines"] >= header_lines:
+                IngestCache.save(file=file, arrays=station)
+
+        # The last line of files that don't end with a line break is parsed (if it has all columns, i.e., it isn't
+        # still being written) but left out of the ingest state
+        if content[complete:].count(";") >= len(station["names"]) - 1:
+            station = append_rows(station=station, lines=[content[complete:]], first_line=int(station["lines"]))
+
+        return station
+
+    @classmethod
+    def read_lines_inmet_br(cls, lines):
+        """Splits lines of INMET files into their fields.
+
+        Parameters
+        ==========
+        lines : List
+            Lines (without line breaks)
+
+        Returns
+        =======
+        rows : List
+            Fields of each line
+        """
+
+        return list(csv.reader([line.rstrip("\r") for line in lines], delimiter=";", quotechar="|"))
+
+    @classmethod
+    def parse_rows_inmet_br(cls, rows, columns):
+        """Parses rows of measurements of INMET files.
+
+        Parameters
+        ==========
+        rows : List
+            Lines with measurements (without line breaks)
+
+        columns : Integer
+            Number of columns of the file
+
+        Returns
+        =======
+        timestamps : numpy.ndarray
+            Timestamps (seconds since the epoch) of the rows
+
+        values : numpy.ndarray
+            Values of the numeric columns (one row per column, NaN when missing)
+        """
+
+        # Decoding all rows at once: numeric columns (with decimal commas) become float columns and empty cells NaN
+        raw_measurements = pd.read_csv(
+            io.StringIO("\n".join(rows)),
+            sep=";",
+            quotechar="|",
+            decimal=",",
+            header=None,
+            names=range(columns),
+            index_col=False,
+            dtype={0: str, 1: str},
+        )
+
+        # Parsing measurement timestamps at once from the fixed-width date ('YYYY/MM/DD') and hour ('HHMM UTC') fields
+        dates = raw_measurements[0] + raw_measurements[1].str[0:4]
+        timestamps = pd.to_datetime(dates, format="%Y/%m/%d%H%M").values.astype("datetime64[s]").astype(np.int64)
+
+        # Values of the numeric columns (one row per column)
+        values = raw_measurements.iloc[:, 2:].to_numpy(dtype=np.float64).T
+
+        return timestamps, values
+
+    @classmethod
+    def parse_dataset_binary(cls, target, metric):
+        """Parse data stored in the binary format (NumPy arrays), which is used
+        by synthetic datasets too large to be stored as INMET CSV files.
+
+        Parameters
+        ==========
+        target : String
+            Directory containing the dataset
+
+        metric : String or List
+            Metric to be parsed (or list of metrics)
+
+        Returns
+        =======
+        dataset : Dictionary
+            Parsed dataset: timestamps (seconds since the epoch) of the time axis shared by all sensors and sensors
+            whose measurements are aligned with it (NaN when missing). When several metrics are parsed, measurements
+            have one row per metric
+        """
+
+        metrics = [metric] if isinstance(metric, str) else metric
+
+        contents = [read_binary_dataset(path=f"data/{target}", metric=name) for name in metrics]
+
+        # Using the same time window adopted when parsing INMET files
+        starting_hour = 1440
+        ending_hour = starting_hour + 1472
+        timestamps = np.asarray(contents[0]["timestamps"][starting_hour:ending_hour], dtype=np.int64)
+        measurements = np.stack(
+            [np.asarray(content["measurements"][:, starting_hour:ending_hour], np.float64) for content in contents]
+        )
+
+        sensors = [
+            {
+                "coordinates": tuple(coordinates),
+                "alias": alias,
+                # Sensors that measure a single metric have a single series
+                "measurements": measurements[0, i] if len(metrics) == 1 else measurements[:, i],
+            }
+            for i, (coordinates, alias) in enumerate(zip(contents[0]["coordinates"].tolist(), contents[0]["aliases"]))
+        ]
+
+        return {"timestamps": timestamps, "sensors": sensors}
+
+    @classmethod
+    def stream_dataset_binary(cls, target, metric, chunk_size):
+        """Creates the sensors of a dataset stored in the binary format, whose measurements are read
+        in chunks of time steps from the memory-mapped dataset files during the simulation.
+
+        Parameters
+        ==========
+        target : String
+            Directory containing the dataset
+
+        metric : String or List
+            Metric to be read (or list of metrics)
+
+        chunk_size : int
+            Number of time steps read at once
+        """
+
+        metrics = [metric] if isinstance(metric, str) else metric
+
+        contents = [read_binary_dataset(path=f"data/{target}", metric=name) for name in metrics]
+
+        for coordinates, alias in zip(contents[0]["coordinates"].tolist(), contents[0]["aliases"]):
+            Sensor(coordinates=tuple(coordinates), type="physical", alias=alias)
+
+        # Using the same first hour adopted when parsing binary datasets. Replays can go on until the last hour
+        # of the dataset, and missing measurements are kept as NaN so that all series share the same time axis
+        starting_hour = 1440
+        store = SensorStore.first()
+        store.stream(
+            rows=np.arange(len(contents[0]["aliases"])),
+            measurements=[content["measurements"][:, starting_hour:] for content in contents],
+            timestamps=contents[0]["timestamps"][starting_hour:],
+            chunk_size=chunk_size,
+        )
+
+    @classmethod
+    def run(
+        cls,
+        steps,
+        metric,
+        algorithm,
+        sensors,
+        neighbors,
+        alignment_tolerance=0,
+        topology_events=[],
+        fallback_plans=4,
+        accumulate_metrics=False,
+        tile_size=None,
+        tile_halo=None,
+        tile_workers=1,
+        max_triangles=None,
+        triangle_time_budget=None,
+    ):
         """Starts the simulation.
 
         Parameters
@@ -148,8 +572,8 @@ class Simulator:
         steps : int
             Number of simulation steps
 
-        metric : string
-            Metric to be inferred
+        metric : string or list
+            Metric to be inferred (or list of metrics inferred in the same simulation)
 
         algorithm : string
             Heuristic algorithm that will be executed
@@ -159,25 +583,90 @@ class Simulator:
 
         neighbors : int
             Number of nearest neighbor sensors that can be used to estimate the value of a virtual sensor
+
+        alignment_tolerance : float (optional)
+            Maximum absolute determinant for which a virtual sensor is considered aligned with two physical sensors
+
+        topology_events : list (optional)
+            Sensors disabled, enabled, or removed during the simulation ('step', 'action', and 'sensor' dictionaries)
+
+        fallback_plans : int (optional)
+            Number of alternative groups of sensors kept for virtual sensors whose sensors miss measurements
+
+        accumulate_metrics : boolean (optional)
+            Whether only the accuracy metrics are accumulated, instead of the inferences of every step
+
+        tile_size : float (optional)
+            Width of the square tiles whose geometry is planned independently (the topology isn't tiled by default)
+
+        tile_halo : float (optional)
+            Width of the band around tiles whose sensors can also be used by the tile (half the tile size by default)
+
+        tile_workers : int (optional)
+            Number of processes that plan the geometry of tiles in parallel
+
+        max_triangles : int (optional)
+            Number of valid triangles after which bounded triangle searches stop (unbounded by default)
+
+        triangle_time_budget : float (optional)
+            Time (in seconds) after which bounded triangle searches of each virtual sensor stop (unbounded by default)
         """
 
         # Creating a simulation environment
         Simulator.environment = SimulationEnvironment(
-            steps=int(steps), dataset=Simulator.dataset, metric=metric, heuristic=algorithm
+            steps=int(steps),
+            dataset=Simulator.dataset,
+            metric=metric,
+            heuristic=algorithm,
+            alignment_tolerance=alignment_tolerance,
+            fallback_plans=fallback_plans,
+            accumulate_metrics=accumulate_metrics,
+            tile_size=tile_size,
+            tile_halo=tile_halo,
+            tile_workers=tile_workers,
+            max_triangles=max_triangles,
+            triangle_time_budget=triangle_time_budget,
         )
 
         # Informing the simulation environment what's the heuristic will be executed
         Simulator.environment.heuristic = algorithm
 
+        # Scheduling changes in the topology (e.g., sensors that fail and come back online)
+        for event in topology_events:
+            Simulator.environment.schedule_topology_event(
+                step=int(event["step"]), action=event["action"], sensor=Sensor.find_by_id(int(event["sensor"]))
+            )
+
         # Starting the simulation
         Simulator.environment.run(
             sensors=sensors, heuristic=Simulator.heuristic(algorithm=algorithm), neighbors=neighbors
         )
 
+    @classmethod
+    def load_topology_events(cls, input_file):
+        """Loads changes in the topology from a CSV file with 'step', 'action', and 'sensor' columns, where actions
+        are 'disable', 'enable', or 'remove' and sensors are identified by their IDs.
+
+        Parameters
+        ==========
+        input_file : string
+            Name of the CSV file
+
+        Returns
+        =======
+        topology_events : list
+            Changes in the topology
+        """
+
+        with open(input_file, newline="") as events_file:
+            topology_events = list(csv.DictReader(events_file))
+
+        return topology_events
+
     @classmethod
     def heuristic(cls, algorithm):
-        """Checks if the heuristic informed by the user is valid
-        and passes it as a parameter to the simulation environment.
+        """Checks if the heuristic informed by the user is valid (built-in heuristics and heuristics installed by other
+        packages through the 'simulator.heuristics' entry point group are accepted) and creates it.
 
         Parameters
         ==========
@@ -186,24 +675,11 @@ class Simulator:
 
         Returns
         =======
-        heuristic : function
-            Function that accommodates the heuristic algorithm that will be executed
+        heuristic : Heuristic
+            Heuristic that will be executed
         """
 
-        if algorithm == "proposed_heuristic":
-            Simulator.environment.heuristic = "Proposed Heuristic"
-            return proposed_heuristic
-        elif algorithm == "first_fit_proposal":
-            Simulator.environment.heuristic = "Proposed Heuristic (Simplified Version)"
-            return first_fit_proposal
-        elif algorithm == "knn":
-            Simulator.environment.heuristic = "k-Nearest Neighbors"
-            return knn
-        elif algorithm == "idw":
-            Simulator.environment.heuristic = "Inverse Distance Weighting"
-            return idw
-        else:
-            raise Exception("Invalid heuristic algorithm.")
+        return Heuristic.find(name=algorithm)()
 
     @classmethod
     def show_output(cls, output_file):
@@ -215,13 +691,156 @@ class Simulator:
             Name of the output file containing the simulation results
         """
 
+        with Profiler.phase("metrics"):
+            metrics_by_sensor = Simulator.calculate_metrics_by_sensor()
+
+        if VERBOSITY >= 2:
+            print("=== METRICS BY SENSOR ===")
+            for sensor_metrics in metrics_by_sensor:
+                print(f'Sensor_{sensor_metrics["sensor"]}')
+                if len(Simulator.environment.metrics_of_interest) > 1:
+                    print(f'    Metric: {sensor_metrics["metric"]}')
+                print(
+                    f'    Real Measurements ({len(sensor_metrics["real_measurements"])}): {sensor_metrics["real_measurements"]}'
+                )
+                print(
+                    f'    Inferences ({len(sensor_metrics["inferences"])}): {[round(inference, 1) for inference in sensor_metrics["inferences"]]}'
+                )
+                print(f'    Root Mean Squared Error (RMSE): {sensor_metrics["rmse"]}')
+                print(f'    Mean Absolute Error (MAE): {sensor_metrics["mae"]}')
+
+        if VERBOSITY >= 1:
+            print("=== OVERALL RESULTS ===")
+            print(f"Heuristic: {Simulator.environment.heuristic}")
+
+        # Summarizing the accuracy of each metric. The summary of the simulation is the one of its first metric
+        summaries = {}
+        for metric in Simulator.environment.metrics_of_interest:
+            # Sensors whose measurements were never inferred have no accuracy metrics
+            list_of_rmse_results = [
+                sensor_metrics["rmse"]
+                for sensor_metrics in metrics_by_sensor
+                if sensor_metrics["metric"] == metric and sensor_metrics["rmse"] is not None
+            ]
+            list_of_mae_results = [
+                sensor_metrics["mae"]
+                for sensor_metrics in metrics_by_sensor
+                if sensor_metrics["metric"] == metric and sensor_metrics["rmse"] is not None
+            ]
+
+            stdev_rmse = statistics.stdev(list_of_rmse_results)
+            stdev_mae = statistics.stdev(list_of_mae_results)
+            rmse = sum(list_of_rmse_results) / len(list_of_rmse_results)
+            mae = sum(list_of_mae_results) / len(list_of_mae_results)
+
+            summaries[metric] = {"rmse": rmse, "mae": mae}
+
+            if VERBOSITY >= 1:
+                print(f"Metric: {metric}")
+                print(f"Sensors: {[sensor.id for sensor in Simulator.environment.virtual_sensors]}")
+
+                if VERBOSITY >= 2:
+                    print("Raw Results:")
+                    print(f"    RMSE: {list_of_rmse_results}")
+                    print(f"    MAE: {list_of_mae_results}")
+
+                print("Summary:")
+                print(f"    Root Mean Squared Error (RMSE): {rmse}")
+                print(f"    Mean Absolute Error (MAE): {mae}")
+
+                if VERBOSITY >= 2:
+                    print(f"    Standard Deviation RMSE: {stdev_rmse}")
+                    print(f"    Standard Deviation MAE: {stdev_mae}")
+
+        Simulator.summary = {**next(iter(summaries.values())), "metrics": summaries}
+
+        if VERBOSITY >= 1:
+            with Profiler.phase("render"):
+                Topology.first().build(sensors=Sensor.all()).draw(showgui=False, savefig=True)
+
+    @classmethod
+    def export_results(cls, path, algorithm, neighbors, run_id=None):
+        """Appends the summary of the simulation (one for each inferred metric) and the inferences
+        of each virtual sensor in each step to a result store (inferences are not stored when only
+        the accuracy metrics were accumulated).
+
+        Parameters
+        ==========
+        path : string
+            Result store (directory with Parquet files or SQLite database file)
+
+        algorithm : string
+            Heuristic algorithm that was executed
+
+        neighbors : int
+            Number of nearest neighbor sensors that could be used to estimate the value of a virtual sensor
+
+        run_id : string (optional)
+            Identifier of the run in the result store (a random identifier is used by default)
+
+        Returns
+        =======
+        run_id : string
+            Identifier of the run in the result store
+        """
+
+        run_id = run_id or uuid.uuid4().hex
+
+        summaries = Simulator.summary["metrics"] if Simulator.summary else {}
+        runs = [
+            {
+                "run_id": run_id,
+                "dataset": Simulator.dataset,
+                "metric": metric,
+                "heuristic": Simulator.environment.heuristic,
+                "algorithm": algorithm,
+                "k": neighbors,
+                "steps": Simulator.environment.steps,
+                "virtual_sensors": ",".join(str(sensor.id) for sensor in Simulator.environment.virtual_sensors),
+                "rmse": summaries[metric]["rmse"] if metric in summaries else None,
+                "mae": summaries[metric]["mae"] if metric in summaries else None,
+            }
+            for metric in Simulator.environment.metrics_of_interest
+        ]
+
+        virtual_ids = set(sensor.id for sensor in Simulator.environment.virtual_sensors)
+        inferences = [
+            {"run_id": run_id, "step": step["step"], **measurement}
+            for step in Simulator.environment.metrics
+            for measurement in step["measurements"]
+            if measurement["sensor"] in virtual_ids
+        ]
+
+        with ResultStore(path=path) as store:
+            store.append(runs=runs, inferences=inferences)
+
+        return run_id
+
+    @classmethod
+    def calculate_metrics_by_sensor(cls):
+        """Calculates the accuracy metrics of the inferences of each virtual sensor.
+
+        Returns
+        =======
+        metrics_by_sensor : list
+            Real measurements, inferences, timestamps, and accuracy metrics of each virtual sensor (and each metric)
+        """
+
+        if Simulator.environment.accumulate_metrics:
+            return Simulator.accumulated_metrics_by_sensor()
+
         metrics_by_sensor = []
 
-        for sensor in Simulator.environment.virtual_sensors:
+        for metric, sensor in [
+            (metric, sensor)
+            for metric in Simulator.environment.metrics_of_interest
+            for sensor in Simulator.environment.virtual_sensors
+        ]:
 
             # Initializing a dictionary that will centralize all metrics from the sensor
             sensor_metrics = {
                 "sensor": sensor,
+                "metric": metric,
                 "real_measurements": [],
                 "inferences": [],
                 "timestamps": [],
@@ -229,68 +848,71 @@ class Simulator:
                 "mae": None,
             }
 
-            # Collecting real measurements and inferences from the sensor in each step
+            # Collecting real measurements and inferences from the sensor in each step. Steps in which the measurement
+            # could not be inferred (e.g., all sensors that could be used to infer it missed measurements) are skipped
             for step in Simulator.environment.metrics:
-                metrics = next(metrics for metrics in step["measurements"] if metrics["sensor"] == sensor.id)
+                metrics = next(
+                    (
+                        metrics
+                        for metrics in step["measurements"]
+                        if metrics["sensor"] == sensor.id and metrics["metric"] == metric
+                    ),
+                    None,
+                )
+                if metrics is None or metrics["real_measurement"] != metrics["real_measurement"]:
+                    continue
+
                 sensor_metrics["timestamps"].append(metrics["timestamp"])
                 sensor_metrics["real_measurements"].append(metrics["real_measurement"])
                 sensor_metrics["inferences"].append(metrics["inference"])
 
             # Calculating accuracy metrics for the sensor inferences
-            sensor_metrics["rmse"] = mean_squared_error(
-                sensor_metrics["real_measurements"],
-                sensor_metrics["inferences"],
-                squared=False,
-            )
-            sensor_metrics["mae"] = mean_absolute_error(
-                sensor_metrics["real_measurements"], sensor_metrics["inferences"]
-            )
-
-            # Adding sensor metrics to the list of metrics of all sensors
-            metrics_by_sensor.append(sensor_metrics)
-
-        list_of_rmse_results = []
-        list_of_mae_results = []
-
-        if VERBOSITY >= 2:
-            print("=== METRICS BY SENSOR ===")
-        for sensor_metrics in metrics_by_sensor:
-            if VERBOSITY >= 2:
-                print(f'Sensor_{sensor_metrics["sensor"]}')
-                print(
-                    f'    Real Measurements ({len(sensor_metrics["real_measurements"])}): {sensor_metrics["real_measurements"]}'
+            if len(sensor_metrics["inferences"]) > 0:
+                sensor_metrics["rmse"] = mean_squared_error(
+                    sensor_metrics["real_measurements"],
+                    sensor_metrics["inferences"],
+                    squared=False,
                 )
-                print(
-                    f'    Inferences ({len(sensor_metrics["inferences"])}): {[round(inference, 1) for inference in sensor_metrics["inferences"]]}'
+                sensor_metrics["mae"] = mean_absolute_error(
+                    sensor_metrics["real_measurements"], sensor_metrics["inferences"]
                 )
-                print(f'    Root Mean Squared Error (RMSE): {sensor_metrics["mse"]}')
-                print(f'    Mean Absolute Error (MAE): {sensor_metrics["mae"]}')
-
-            list_of_rmse_results.append(sensor_metrics["rmse"])
-            list_of_mae_results.append(sensor_metrics["mae"])
-
-        stdev_rmse = statistics.stdev(list_of_rmse_results)
-        stdev_mae = statistics.stdev(list_of_mae_results)
-        rmse = sum(list_of_rmse_results) / len(list_of_rmse_results)
-        mae = sum(list_of_mae_results) / len(list_of_mae_results)
 
-        if VERBOSITY >= 1:
-            print("=== OVERALL RESULTS ===")
-            print(f"Heuristic: {Simulator.environment.heuristic}")
-            print(f"Metric: {Simulator.environment.metric}")
-            print(f"Sensors: {[sensor.id for sensor in Simulator.environment.virtual_sensors]}")
+            # Adding sensor metrics to the list of metrics of all sensors
+            metrics_by_sensor.append(sensor_metrics)
 
-            if VERBOSITY >= 2:
-                print("Raw Results:")
-                print(f"    RMSE: {list_of_rmse_results}")
-                print(f"    MAE: {list_of_mae_results}")
+        return metrics_by_sensor
 
-            print("Summary:")
-            print(f"    Root Mean Squared Error (RMSE): {rmse}")
-            print(f"    Mean Absolute Error (MAE): {mae}")
+    @classmethod
+    def accumulated_metrics_by_sensor(cls):
+        """Calculates the accuracy metrics of each virtual sensor from the errors accumulated during the simulation
+        (real measurements, inferences, and timestamps are not kept, so they are left empty).
 
-            if VERBOSITY >= 2:
-                print(f"    Standard Deviation RMSE: {stdev_rmse}")
-                print(f"    Standard Deviation MAE: {stdev_mae}")
+        Returns
+        =======
+        metrics_by_sensor : list
+            Accuracy metrics of each virtual sensor (and each metric)
+        """
 
-            Topology.first().draw(showgui=False, savefig=True)
+        metrics_by_sensor = []
+        accuracy = Simulator.environment.accuracy
+
+        for index, metric in enumerate(Simulator.environment.metrics_of_interest):
+            for position, sensor in enumerate(Simulator.environment.virtual_sensors):
+                sensor_metrics = {
+                    "sensor": sensor,
+                    "metric": metric,
+                    "real_measurements": [],
+                    "inferences": [],
+                    "timestamps": [],
+                    "rmse": None,
+                    "mae": None,
+                }
+
+                count = accuracy["count"][index, position] if accuracy is not None else 0
+                if count > 0:
+                    sensor_metrics["rmse"] = float(np.sqrt(accuracy["squared_errors"][index, position] / count))
+                    sensor_metrics["mae"] = float(accuracy["absolute_errors"][index, position] / count)
+
+                metrics_by_sensor.append(sensor_metrics)
+
+        return metrics_by_sensor
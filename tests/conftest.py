@@ -0,0 +1,17 @@
+# Python Libraries
+import pytest
+
+# General-purpose Simulator Modules
+from simulator.components.sensor_store import SensorStore
+from simulator.simulation_environment import SimulationEnvironment
+
+
+@pytest.fixture(autouse=True)
+def isolated_instances():
+    """Restores the objects registered by each class after every test, as classes keep their instances globally."""
+
+    classes = [SensorStore, SimulationEnvironment]
+    instances = {cls: list(cls.instances) for cls in classes}
+    yield
+    for cls in classes:
+        cls.instances[:] = instances[cls]
@@ -0,0 +1,87 @@
+# Python Libraries
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.components.sensor_store import SensorStore
+from simulator.components.geometry_plan import GeometryPlan
+
+
+def create_store(measurements):
+    """Creates a store with one virtual sensor (ID 1) and physical sensors (IDs 2, 3, ...) with given measurements."""
+
+    store = SensorStore()
+    store.add(id=1, type="virtual", coordinates=(0, 0))
+    for id, measurement in enumerate(measurements, start=2):
+        store.add(id=id, type="physical", coordinates=(id, 0))
+        store.current_measurements[0, store.size - 1] = measurement
+
+    return store
+
+
+def test_plans_apply_the_weights_of_their_sensors():
+    store = create_store([10, 20])
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, 3]], weights=[[0.25, 0.75]])
+
+    plan.apply(store=store)
+
+    assert store.inferences[0, 0] == 17.5
+
+
+def test_sensors_without_measurements_prevent_inferences():
+    store = create_store([10, np.nan])
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, 3]], weights=[[0.25, 0.75]])
+
+    plan.apply(store=store)
+
+    assert np.isnan(store.inferences[0, 0])
+
+
+def test_padding_is_ignored():
+    store = create_store([10, 20])
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, -1]], weights=[[1, 0]])
+
+    plan.apply(store=store)
+
+    assert store.inferences[0, 0] == 10
+
+
+def test_plans_survive_persistence():
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, 3]], weights=[[0.25, 0.75]])
+
+    loaded = GeometryPlan.from_arrays(plan.to_arrays())
+
+    assert np.array_equal(loaded.sensors, plan.sensors)
+    assert np.array_equal(loaded.weights, plan.weights)
+    assert np.array_equal(loaded.quotas, plan.quotas)
+
+
+def test_quotas_use_the_first_sensors_with_measurements_and_normalize_their_weights():
+    store = create_store([10, np.nan, 40, 80])
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, 3, 4, 5]], weights=[[1, 1, 3, 4]], quotas=[[2]])
+
+    plan.apply(store=store)
+
+    # The second sensor misses its measurement, so the first and the third sensors are used
+    assert store.inferences[0, 0] == 32.5
+
+
+def test_quotas_that_cant_be_met_prevent_inferences():
+    store = create_store([10, np.nan, np.nan])
+    plan = GeometryPlan(virtual_ids=[1], sensors=[[2, 3, 4]], weights=[[1, 1, 1]], quotas=[[2]])
+
+    plan.apply(store=store)
+
+    assert np.isnan(store.inferences[0, 0])
+
+
+def test_virtual_sensors_fall_back_to_the_first_complete_alternative():
+    store = create_store([10, np.nan, 30, 40])
+    plan = GeometryPlan(
+        virtual_ids=[1],
+        sensors=[[[2, 3], [4, 5], [2, 4]]],
+        weights=[[[0.5, 0.5], [0.5, 0.5], [0.5, 0.5]]],
+    )
+
+    plan.apply(store=store)
+
+    assert store.inferences[0, 0] == 35
@@ -0,0 +1,15 @@
+# Python Libraries
+import pytest
+
+# General-purpose Simulator Modules
+from simulator.simulation_environment import SimulationEnvironment
+from simulator.heuristics.knn import KNearestNeighbors
+from simulator.heuristics.idw import InverseDistanceWeighting
+
+
+@pytest.mark.parametrize("heuristic", [KNearestNeighbors, InverseDistanceWeighting])
+def test_heuristics_that_need_k_reject_simulations_without_it(heuristic):
+    environment = SimulationEnvironment(steps=1, dataset="", metric="", heuristic=heuristic.name)
+
+    with pytest.raises(Exception, match="number of neighbors"):
+        environment.run(sensors=0, heuristic=heuristic(), neighbors=0)
@@ -0,0 +1,100 @@
+# Python Libraries
+import numpy as np
+import pytest
+
+# General-purpose Simulator Modules
+from simulator.simulator import Simulator
+from simulator.misc.ingest_cache import IngestCache
+
+# Lines of INMET files before the rows used by simulations (see 'Simulator.parse_station_inmet_br')
+HEADER = [
+    "REGIAO:;S",
+    "UF:;PR",
+    "ESTACAO:;CURITIBA",
+    "CODIGO (WMO):;A807",
+    "LATITUDE:;-25,448688",
+    "LONGITUDE:;-49,230602",
+    "ALTITUDE:;922,91",
+    "DATA DE FUNDACAO:;28/01/03",
+    "Data;Hora UTC;TEMPERATURA (°C);UMIDADE (%);",
+]
+SKIPPED_ROWS = 1449 - len(HEADER)
+
+
+def rows(hours, first_hour=0):
+    """Creates rows of measurements of consecutive hours (starting on 2020/03/01)."""
+
+    return [
+        f"2020/03/{1 + hour // 24:02d};{hour % 24:02d}00 UTC;{hour},5;{'' if hour % 3 == 0 else hour};"
+        for hour in range(first_hour, first_hour + hours)
+    ]
+
+
+def write(file, lines, mode="w"):
+    with open(file, mode=mode, encoding="ISO-8859-1", newline="") as station_file:
+        station_file.write("".join(f"{line}\n" for line in lines))
+
+
+def ingest(file, incremental=True):
+    content = Simulator.read_station_inmet_br(file=file, incremental=incremental)
+
+    return Simulator.parse_station_inmet_br(**content, incremental=incremental)
+
+
+@pytest.fixture
+def station_file(tmp_path, monkeypatch):
+    """Creates a station file with 5 rows of measurements and points the ingest cache to a temporary directory."""
+
+    monkeypatch.setattr(IngestCache, "directory", str(tmp_path / "cache"))
+
+    file = str(tmp_path / "station.csv")
+    write(file, HEADER + rows(SKIPPED_ROWS, first_hour=-SKIPPED_ROWS) + rows(5))
+
+    return file
+
+
+def assert_same_station(station, expected):
+    assert np.array_equal(station["timestamps"], expected["timestamps"])
+    assert np.array_equal(station["values"], expected["values"], equal_nan=True)
+
+
+def test_appended_rows_are_parsed_from_the_cached_offset(station_file):
+    ingest(station_file)
+    write(station_file, rows(3, first_hour=5), mode="a")
+
+    content = Simulator.read_station_inmet_br(file=station_file, incremental=True)
+    station = Simulator.parse_station_inmet_br(**content, incremental=True)
+
+    # Only the appended rows are read again
+    assert content["content"].count("\n") == 3
+    assert station["values"].shape == (3, 8)
+    assert_same_station(station, ingest(station_file, incremental=False))
+
+
+def test_partial_last_lines_are_left_out_of_the_ingest_state(station_file):
+    with open(station_file, mode="a", encoding="ISO-8859-1") as file:
+        file.write("2020/03/01;0500 UTC;5,5")
+
+    assert ingest(station_file)["values"].shape == (3, 5)
+    assert int(IngestCache.load(file=station_file)["lines"]) == 1449 + 5
+
+    with open(station_file, mode="a", encoding="ISO-8859-1") as file:
+        file.write(";5;\n")
+
+    assert_same_station(ingest(station_file), ingest(station_file, incremental=False))
+
+
+def test_truncated_files_are_parsed_again(station_file):
+    ingest(station_file)
+    write(station_file, HEADER + rows(SKIPPED_ROWS, first_hour=-SKIPPED_ROWS) + rows(2))
+
+    assert IngestCache.load(file=station_file) is None
+    assert ingest(station_file)["values"].shape == (3, 2)
+
+
+def test_files_whose_header_changed_are_parsed_again(station_file):
+    ingest(station_file)
+    write(station_file, [HEADER[0].replace("S", "N")] + HEADER[1:] + rows(SKIPPED_ROWS, -SKIPPED_ROWS) + rows(6))
+
+    assert IngestCache.load(file=station_file) is None
+    assert_same_station(ingest(station_file), ingest(station_file, incremental=False))
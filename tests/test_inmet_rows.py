@@ -0,0 +1,47 @@
+# Python Libraries
+import os
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.simulator import Simulator
+
+
+def test_rows_are_decoded_with_decimal_commas_and_missing_values():
+    rows = [
+        "2020/03/01;0000 UTC;0;916,5;-1,25;;",
+        "2020/03/01;1300 UTC;;1000;,3;12;",
+    ]
+
+    timestamps, values = Simulator.parse_rows_inmet_br(rows=rows, columns=7)
+
+    assert timestamps.tolist() == [
+        int(np.datetime64("2020-03-01T00:00", "s").astype(np.int64)),
+        int(np.datetime64("2020-03-01T13:00", "s").astype(np.int64)),
+    ]
+    assert values.shape == (5, 2)
+    assert np.array_equal(
+        values, [[0, np.nan], [916.5, 1000], [-1.25, 0.3], [np.nan, 12], [np.nan, np.nan]], equal_nan=True
+    )
+
+
+def test_columns_without_values_are_numeric():
+    timestamps, values = Simulator.parse_rows_inmet_br(rows=["2020/03/01;0100 UTC;;;"], columns=5)
+
+    assert values.dtype == np.float64
+    assert np.isnan(values).all()
+
+
+def test_rows_of_dataset_files_match_a_cell_by_cell_decoding():
+    directory = os.path.join(os.path.dirname(__file__), "..", "data", "inmet_2020_south")
+    file = os.path.join(directory, sorted(os.listdir(directory))[0])
+    with open(file, encoding="ISO-8859-1") as station_file:
+        lines = station_file.read().split("\n")
+    columns = len(lines[8].split(";"))
+    rows = lines[1449:1521]
+
+    _, values = Simulator.parse_rows_inmet_br(rows=rows, columns=columns)
+
+    expected = [
+        [float(cell.replace(",", ".")) if cell else np.nan for cell in row.split(";")[2:columns]] for row in rows
+    ]
+    assert np.array_equal(values.T, expected, equal_nan=True)
@@ -0,0 +1,102 @@
+# Python Libraries
+import os
+import numpy as np
+import pytest
+from collections import OrderedDict
+
+# General-purpose Simulator Modules
+from simulator.misc.plan_cache import PlanCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Points the plan cache to a temporary directory."""
+
+    monkeypatch.setattr(PlanCache, "directory", str(tmp_path))
+    monkeypatch.setattr(PlanCache, "enabled", True)
+    monkeypatch.setattr(PlanCache, "memory", OrderedDict())
+    monkeypatch.setattr(PlanCache, "memory_size", 0)
+    monkeypatch.setattr(PlanCache, "max_size", PlanCache.max_size)
+
+    return PlanCache
+
+
+def key(**changes):
+    """Creates the key of a small plan with some of its parameters changed."""
+
+    parameters = {
+        "coordinates": np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]]),
+        "types": np.array([0, 1, 0]),
+        "virtual_ids": [2],
+        "heuristic": "idw",
+        "neighbors": 2,
+        "options": {"fallback_plans": 4},
+    }
+    parameters.update(changes)
+
+    return PlanCache.key(**parameters)
+
+
+def plan_arrays():
+    return {"virtual_ids": np.array([2]), "sensors": np.array([[[1, 3]]]), "weights": np.array([[[0.5, 0.5]]])}
+
+
+def test_key_depends_on_everything_that_affects_the_plan():
+    assert key() == key()
+
+    changed_keys = [
+        key(coordinates=np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 2.0]])),
+        key(types=np.array([0, 1, 3])),
+        key(virtual_ids=[3]),
+        key(heuristic="knn"),
+        key(neighbors=3),
+        key(options={"fallback_plans": 2}),
+    ]
+
+    assert len(set(changed_keys + [key()])) == len(changed_keys) + 1
+
+
+def test_version_invalidates_keys(monkeypatch):
+    original_key = key()
+
+    monkeypatch.setattr(PlanCache, "VERSION", PlanCache.VERSION + 1)
+
+    assert key() != original_key
+
+
+def test_saved_plans_are_loaded(cache):
+    cache.save(key(), plan_arrays())
+
+    arrays = cache.load(key())
+
+    assert set(arrays) == set(plan_arrays())
+    assert np.array_equal(arrays["sensors"], plan_arrays()["sensors"])
+    assert cache.load(key(neighbors=3)) is None
+
+
+def test_disabled_cache_neither_saves_nor_loads(cache):
+    cache.save(key(), plan_arrays())
+    cache.enabled = False
+
+    assert cache.load(key()) is None
+
+    cache.save(key(neighbors=3), plan_arrays())
+    assert not os.path.isfile(cache.path(key(neighbors=3)))
+
+
+def test_damaged_plans_are_ignored(cache):
+    with open(cache.path(key()), mode="wb") as plan_file:
+        plan_file.write(b"not a plan")
+
+    assert cache.load(key()) is None
+
+
+def test_least_recently_used_plans_are_evicted(cache):
+    cache.save(key(), plan_arrays())
+    os.utime(cache.path(key()), (0, 0))
+    cache.max_size = os.path.getsize(cache.path(key()))
+
+    cache.save(key(neighbors=3), plan_arrays())
+
+    assert not os.path.isfile(cache.path(key()))
+    assert os.path.isfile(cache.path(key(neighbors=3)))
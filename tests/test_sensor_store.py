@@ -0,0 +1,74 @@
+# Python Libraries
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.components.sensor_store import SensorStore
+
+
+def create_store():
+    """Creates a store with the time axis 0..3 and three sensors (the second one has no series)."""
+
+    store = SensorStore(capacity=2)
+    store.set_time_axis(timestamps=np.arange(4))
+    store.add(id=1, type="physical", coordinates=(0, 0), measurements=[10, 11, 12, 13])
+    store.add(id=2, type="virtual", coordinates=(1, 0))
+    store.add(id=3, type="physical", coordinates=(0, 1), measurements=[20, 22], timestamps=[1, 3])
+
+    return store
+
+
+def test_add_grows_rows_and_keeps_attributes():
+    store = create_store()
+
+    assert store.size == 3
+    assert len(store.ids) >= 3
+    assert store.ids[: store.size].tolist() == [1, 2, 3]
+    assert store.rows("physical").tolist() == [0, 2]
+    assert store.rows("virtual").tolist() == [1]
+    assert store.coordinates[1].tolist() == [1, 0]
+    assert store.series[: store.size].tolist() == [0, -1, 1]
+
+
+def test_series_are_aligned_with_the_time_axis():
+    store = create_store()
+
+    # Measurements whose timestamps are missing from the time axis are NaN
+    assert np.array_equal(store.measurements[0, 1], [np.nan, 20, np.nan, 22], equal_nan=True)
+
+    store.set_step(1)
+    assert np.array_equal(store.current_measurements[0, : store.size], [11, np.nan, 20], equal_nan=True)
+    assert store.current_timestamp == np.datetime64(1, "s")
+
+    # Steps past the end of the series have no measurements
+    store.set_step(4)
+    assert np.isnan(store.current_measurements[0, : store.size]).all()
+
+
+def test_rows_of_finds_rows_after_removals():
+    store = create_store()
+
+    rows = store.keep(np.array([0, 2]))
+
+    assert rows.tolist() == [0, 1]
+    assert store.ids[: store.size].tolist() == [1, 3]
+    assert store.rows_of(np.array([3, 1])).tolist() == [1, 0]
+    assert store.series[: store.size].tolist() == [0, 1]
+
+
+def test_identifiers_are_never_lowered_by_removals():
+    store = create_store()
+
+    store.keep(np.array([0]))
+
+    assert store.last_id == 3
+
+
+def test_subset_holds_only_the_series_of_its_sensors():
+    store = create_store()
+
+    subset = store.subset(np.array([1, 2]))
+
+    assert subset not in SensorStore.instances
+    assert subset.ids.tolist() == [2, 3]
+    assert subset.series.tolist() == [-1, 0]
+    assert np.array_equal(subset.measurements[0, 0], store.measurements[0, 1], equal_nan=True)
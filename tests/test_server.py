@@ -0,0 +1,21 @@
+# Python Libraries
+import os
+
+# General-purpose Simulator Modules
+from simulator.server import resolve_results_path
+
+
+def test_result_stores_are_resolved_inside_the_results_directory(tmp_path):
+    path = resolve_results_path(results="sweep/results.sqlite", directory=str(tmp_path))
+
+    assert path == os.path.join(os.path.realpath(tmp_path), "sweep", "results.sqlite")
+
+
+def test_result_stores_outside_the_results_directory_are_rejected(tmp_path):
+    directory = tmp_path / "results"
+    directory.mkdir()
+    os.symlink(tmp_path, directory / "link")
+
+    assert resolve_results_path(results="../results.sqlite", directory=str(directory)) is None
+    assert resolve_results_path(results=str(tmp_path / "results.sqlite"), directory=str(directory)) is None
+    assert resolve_results_path(results="link/results.sqlite", directory=str(directory)) is None
@@ -0,0 +1,76 @@
+# Python Libraries
+import numpy as np
+
+# General-purpose Simulator Modules
+from simulator.components.spatial_index import SpatialIndex
+
+
+def brute_force(ids, coordinates, points, k):
+    """Finds the 'k' nearest sensors of each point by comparing all distances (ties broken by identifier)."""
+
+    neighbors = []
+    for point in points:
+        distances = np.sqrt(((coordinates - point) ** 2).sum(axis=1))
+        neighbors.append(ids[np.lexsort((ids, distances))[:k]])
+
+    return np.array(neighbors)
+
+
+def test_masked_and_pending_sensors_match_brute_force(monkeypatch):
+    monkeypatch.setattr(SpatialIndex, "MINIMUM_CHANGES", 1000)
+    rng = np.random.default_rng(0)
+    coordinates = {id: rng.uniform(0, 10, size=2) for id in range(1, 41)}
+    points = rng.uniform(0, 10, size=(20, 2))
+
+    index = SpatialIndex(ids=np.arange(1, 31), coordinates=np.array([coordinates[id] for id in range(1, 31)]))
+    for id in [3, 7, 12]:
+        index.remove(id=id)
+    for id in range(31, 41):
+        index.add(id=id, coordinates=coordinates[id])
+    index.remove(id=35)
+    index.add(id=7, coordinates=coordinates[7])
+
+    active = np.array(sorted(set(coordinates) - {3, 12, 35}))
+    assert len(index) == len(active)
+    assert index.masked.sum() == 2 and len(index.pending_ids) == 9
+
+    neighbors, distances = index.query(points, k=5)
+    expected = brute_force(active, np.array([coordinates[id] for id in active]), points, k=5)
+
+    assert np.array_equal(neighbors, expected)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+
+def test_tree_is_rebuilt_when_changes_pile_up(monkeypatch):
+    monkeypatch.setattr(SpatialIndex, "MINIMUM_CHANGES", 2)
+    index = SpatialIndex(ids=np.arange(1, 5), coordinates=np.array([[0, 0], [1, 0], [2, 0], [3, 0]]))
+
+    index.remove(id=1)
+    index.add(id=5, coordinates=(4, 0))
+    assert index.masked.sum() == 1 and len(index.pending_ids) == 1
+
+    index.remove(id=2)
+    assert index.ids.tolist() == [3, 4, 5]
+    assert not index.masked.any() and len(index.pending_ids) == 0
+
+    neighbors, _ = index.query(np.array([[0, 0]]), k=2)
+    assert neighbors.tolist() == [[3, 4]]
+
+
+def test_ties_are_broken_by_identifier():
+    index = SpatialIndex(ids=np.arange(1, 6), coordinates=np.array([[1, 0], [0, 1], [-1, 0], [0, -1], [5, 5]]))
+    index.remove(id=1)
+
+    neighbors, distances = index.query(np.array([[0, 0]]), k=2)
+
+    assert neighbors.tolist() == [[2, 3]]
+    assert distances.tolist() == [[1, 1]]
+
+
+def test_queries_never_return_more_sensors_than_indexed():
+    index = SpatialIndex(ids=np.arange(1, 3), coordinates=np.array([[0, 0], [1, 0]]))
+    index.remove(id=2)
+
+    neighbors, _ = index.query(np.array([[0, 0]]), k=4)
+
+    assert neighbors.tolist() == [[1]]